@@ -0,0 +1,74 @@
+# admision.py (CONTROL DE ADMISIÓN ANTES DE LA DECISIÓN TÁCTICA)
+#
+# El jugador responde más o menos una alerta cada decision_timeout_seconds. Si llegan más
+# alertas de las que puede atender, se acumulan en el dashboard y cada una espera su plazo
+# completo. El control de admisión mide el ritmo al que se resuelven las decisiones (media
+# móvil exponencial del tiempo entre decisiones mientras hay alertas esperando) y cuántas
+# alertas esperan decisión. Si la espera prevista de una alerta nueva (esperando x tiempo por
+# decisión) supera max_wait_seconds, o ya esperan max_backlog, las alertas con priority_score
+# hasta shed_max_priority_score se resuelven automáticamente sin pasar por el jugador.
+# Las críticas pasan siempre. Solo descarta en pipeline_mode, con varias decisiones en curso
+# (decision_workers): el bucle en serie espera cada decisión antes de leer el siguiente evento,
+# así que nunca hay más de una alerta esperando y todas llegan al jugador. Hasta medirlo, el tiempo por decisión es el plazo completo, así
+# que max_wait_seconds debe cubrir al menos max_backlog plazos o la espera prevista satura antes
+# que el backlog (con los valores por defecto, 3 x 40 s = 120 s: se satura con 3 esperando).
+
+import threading
+import time
+
+SUAVIZADO = 0.3 # Peso de la última medida en las medias móviles
+
+
+class ControlAdmision:
+    """Capacidad de decisión de una sesión: alertas esperando, ritmo de decisiones y alertas descartadas."""
+
+    def __init__(self, max_backlog=3, max_wait_seconds=120, shed_max_priority_score=5, segundos_por_decision=40):
+        self.max_backlog = max_backlog
+        self.max_wait_seconds = max_wait_seconds
+        self.shed_max_priority_score = shed_max_priority_score
+        self.segundos_por_decision = float(segundos_por_decision) # Hasta medir, lo que permite el plazo de decisión
+        self.espera_media = None # Segundos desde la admisión hasta la decisión
+        self.pendientes = 0
+        self.admitidas = 0
+        self.descartadas = 0
+        self.descartadas_por_nivel = {}
+        self._inicio_servicio = None # Desde cuándo se espera la siguiente decisión
+        self._lock = threading.Lock()
+
+    def espera_prevista(self):
+        with self._lock:
+            return self.pendientes * self.segundos_por_decision
+
+    def admitir(self, priority_score, nivel):
+        """True si la alerta debe ir al jugador; False si hay que resolverla automáticamente."""
+        with self._lock:
+            saturado = (self.pendientes >= self.max_backlog
+                        or self.pendientes * self.segundos_por_decision > self.max_wait_seconds)
+            if saturado and nivel != "critico" and priority_score <= self.shed_max_priority_score:
+                self.descartadas += 1
+                self.descartadas_por_nivel[nivel] = self.descartadas_por_nivel.get(nivel, 0) + 1
+                return False
+            self.admitidas += 1
+            self.pendientes += 1
+            if self._inicio_servicio is None:
+                self._inicio_servicio = time.monotonic()
+            return True
+
+    def decision_completada(self, espera_seconds):
+        ahora = time.monotonic()
+        with self._lock:
+            self.pendientes = max(0, self.pendientes - 1)
+            if self._inicio_servicio is not None:
+                intervalo = ahora - self._inicio_servicio
+                self.segundos_por_decision += SUAVIZADO * (intervalo - self.segundos_por_decision)
+            self._inicio_servicio = ahora if self.pendientes else None # Sin alertas esperando no se cuenta el tiempo ocioso
+            self.espera_media = espera_seconds if self.espera_media is None else self.espera_media + SUAVIZADO * (espera_seconds - self.espera_media)
+
+    def resumen(self):
+        with self._lock:
+            total = self.admitidas + self.descartadas
+            return {"admitidas": self.admitidas, "descartadas": self.descartadas,
+                    "tasa_descarte": round(self.descartadas / total, 4) if total else 0.0,
+                    "descartadas_por_nivel": dict(self.descartadas_por_nivel), "pendientes": self.pendientes,
+                    "segundos_por_decision": round(self.segundos_por_decision, 2),
+                    "espera_media_seconds": round(self.espera_media, 2) if self.espera_media is not None else None}
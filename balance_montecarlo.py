@@ -0,0 +1,178 @@
+# balance_montecarlo.py (ANÁLISIS DE BALANCE POR MONTE CARLO CON NUMPY)
+#
+# Evalúa millones de partidas a la vez para ver cuánto dura una partida y con qué
+# probabilidad se gana bajo cada estrategia, usando las tablas de game_balance y
+# game_state de config.json. En lugar de jugar el bucle evento a evento (simulacion.py),
+# calcula una vez el efecto (daño, pánico) de cada combinación zona x nivel de amenaza
+# con las mismas políticas scriptadas y efecto_de_decision de bots.py, sortea las
+# secuencias de eventos como matrices y obtiene HP y pánico con sumas acumuladas.
+# El pánico no baja de 0 (igual que en el juego): se aplica con la recursión de Lindley,
+# X_t = S_t - min(0, min_{s<=t} S_s), también vectorizada.
+#
+# Uso:
+#   python balance_montecarlo.py --games 1000000
+#   python balance_montecarlo.py --games 200000 --timeout-rate 0.3 --zones base --json balance.json
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+import bots
+import simulacion
+from reloj import RelojVirtual
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def distribucion_zonas(origen):
+    """[(zona de la base de conocimiento, probabilidad)] de los eventos de la partida."""
+    if origen == "base":
+        zonas = [zona for zona in bots.KNOWLEDGE_BASE if zona != "Unknown Location"]
+        return [(zona, 1 / len(zonas)) for zona in zonas]
+    # "juego": las ubicaciones de generar_evento_aleatorio, resueltas como lo hace BotEnriquecedor
+    probabilidades = {}
+    for fuente in bots.RANDOM_EVENT_SOURCES:
+        for ubicacion in fuente["locations"]:
+            zona = bots.LOCATION_INDEX.resolver(ubicacion)[0] or "Unknown Location"
+            probabilidades[zona] = probabilidades.get(zona, 0) + 1 / len(bots.RANDOM_EVENT_SOURCES) / len(fuente["locations"])
+    return list(probabilidades.items())
+
+
+def tabla_efectos(politica, zonas, niveles):
+    """Matrices (daño, pánico) de forma (zonas, niveles) para una política de simulacion.py."""
+    decidir = simulacion.crear_politica(politica, RelojVirtual(), 0)
+    dano = np.zeros((len(zonas), len(niveles)), dtype=np.int32)
+    panico = np.zeros_like(dano)
+    for z, zona in enumerate(zonas):
+        cercanos = bots.KNOWLEDGE_BASE.get(zona, {}).get("nearby_heroes", [])
+        for n, nivel in enumerate(niveles):
+            enriched_data = {"event_id": f"MC-{z}-{n}", "threat_assessment": {"initial_level": nivel},
+                             "location_details": {"zone_name": zona, "known_nearby_heroes": cercanos}}
+            routing_data = decidir(enriched_data)
+            dano[z, n], panico[z, n] = bots.efecto_de_decision(nivel, routing_data["decision_type"],
+                                                              routing_data["target_destinations"], cercanos)
+    return dano, panico
+
+
+def simular_lote(rng, probabilidades, dano, panico, partidas, horizonte, cfg_estado, tramo=32):
+    """Juega partidas de hasta horizonte eventos. Devuelve (duración en eventos, victoria, terminada) por partida.
+
+    Se sortea por tramos de eventos y solo para las partidas que siguen: la mayoría termina mucho
+    antes del horizonte y no hace falta generar (ni sumar) el resto de su secuencia.
+    """
+    max_panic = cfg_estado.get("max_global_panic", 100)
+    umbral_derrota = max_panic if max_panic <= 100 else np.inf # El pánico nunca pasa de 100
+    hp = np.full(partidas, cfg_estado.get("initial_eggman_hp", 100), dtype=np.int64)
+    panico_actual = np.full(partidas, cfg_estado.get("initial_global_panic", 0), dtype=np.int64)
+    duracion = np.full(partidas, horizonte)
+    gana = np.zeros(partidas, dtype=bool)
+    terminada = np.zeros(partidas, dtype=bool)
+    activas = np.arange(partidas)
+
+    for desde in range(0, horizonte, tramo):
+        eventos = rng.choice(len(probabilidades), size=(len(activas), min(tramo, horizonte - desde)), p=probabilidades)
+        hp_tramo = hp[activas, None] - np.cumsum(dano[eventos], axis=1)
+        suma_panico = panico_actual[activas, None] + np.cumsum(panico[eventos], axis=1)
+        panico_tramo = suma_panico - np.minimum(0, np.minimum.accumulate(suma_panico, axis=1))
+
+        victoria = hp_tramo <= 0 # comprobar_fin_de_juego mira la victoria antes que la derrota
+        fin = victoria | (panico_tramo >= umbral_derrota)
+        acaba = fin.any(axis=1)
+        ultimo = fin.argmax(axis=1)[acaba]
+        terminan = activas[acaba]
+        duracion[terminan] = desde + ultimo + 1
+        gana[terminan] = victoria[acaba, ultimo]
+        terminada[terminan] = True
+
+        sigue = ~acaba
+        activas = activas[sigue]
+        hp[activas] = hp_tramo[sigue, -1]
+        panico_actual[activas] = panico_tramo[sigue, -1]
+        if not len(activas):
+            break
+    return duracion, gana, terminada
+
+
+def analizar(politica, args, zonas, probabilidades_zona, niveles, pesos_nivel, rng):
+    normal = tabla_efectos(politica, zonas, niveles)
+    sin_respuesta = tabla_efectos("timeout", zonas, niveles)
+    # Tipo de evento = (zona, nivel, ¿el jugador no respondió?) aplanado en un índice
+    p_zona_nivel = np.outer(probabilidades_zona, pesos_nivel).ravel()
+    probabilidades = np.concatenate([p_zona_nivel * (1 - args.timeout_rate), p_zona_nivel * args.timeout_rate])
+    dano = np.concatenate([normal[0].ravel(), sin_respuesta[0].ravel()])
+    panico = np.concatenate([normal[1].ravel(), sin_respuesta[1].ravel()])
+    cfg_estado = bots.CONFIG.get("game_state", {})
+
+    duraciones, victorias, terminadas = [], [], []
+    for inicio in range(0, args.games, args.batch_size):
+        lote = simular_lote(rng, probabilidades, dano, panico, min(args.batch_size, args.games - inicio), args.max_events, cfg_estado)
+        duraciones.append(lote[0]); victorias.append(lote[1]); terminadas.append(lote[2])
+    duraciones, victorias, terminadas = np.concatenate(duraciones), np.concatenate(victorias), np.concatenate(terminadas)
+
+    n_victorias = int(victorias.sum())
+    n_terminadas = int(terminadas.sum())
+    terminadas_duracion = duraciones[terminadas]
+    return {
+        "politica": politica,
+        "partidas": args.games,
+        "tasa_victoria": round(n_victorias / args.games, 4),
+        "tasa_derrota": round((n_terminadas - n_victorias) / args.games, 4),
+        "tasa_sin_terminar": round((args.games - n_terminadas) / args.games, 4),
+        "eventos_por_partida": {
+            "media": round(float(terminadas_duracion.mean()), 2) if n_terminadas else None,
+            **({f"p{p}": int(v) for p, v in zip(PERCENTILES, np.percentile(terminadas_duracion, PERCENTILES))} if n_terminadas else {}),
+        },
+        "histograma_eventos": np.bincount(terminadas_duracion, minlength=args.max_events + 1)[1:].tolist(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Análisis de balance por Monte Carlo (NumPy) de las tablas de daño y pánico.")
+    parser.add_argument("--games", type=int, default=1000000, help="partidas por estrategia")
+    parser.add_argument("--policies", default=",".join(simulacion.POLITICAS), help="estrategias separadas por comas")
+    parser.add_argument("--max-events", type=int, default=200, help="eventos máximos por partida (las que no terminan cuentan como sin terminar)")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="probabilidad de que el jugador no responda a un evento (0-1)")
+    parser.add_argument("--zones", choices=["juego", "base"], default="juego",
+                        help="juego: ubicaciones de los eventos aleatorios; base: todas las zonas de la base de conocimiento por igual")
+    parser.add_argument("--threat-weights", default="1,1,1,1", help="pesos de bajo,medio,alto,critico")
+    parser.add_argument("--batch-size", type=int, default=50000, help="partidas por lote (limita la memoria)")
+    parser.add_argument("--seed", type=int, default=None, help="semilla para repetir exactamente el análisis")
+    parser.add_argument("--json", default=None, help="guardar los resultados (con histogramas) en este fichero JSON")
+    args = parser.parse_args()
+    politicas = [p.strip() for p in args.policies.split(",") if p.strip()]
+    if any(p not in simulacion.POLITICAS for p in politicas):
+        parser.error(f"Estrategias válidas: {', '.join(simulacion.POLITICAS)}")
+    pesos_nivel = np.array([float(p) for p in args.threat_weights.split(",")])
+    if len(pesos_nivel) != len(bots.THREAT_LEVELS) or pesos_nivel.sum() <= 0:
+        parser.error("--threat-weights necesita 4 pesos (bajo,medio,alto,critico) con suma positiva.")
+    if not 0 <= args.timeout_rate <= 1:
+        parser.error("--timeout-rate debe estar entre 0 y 1.")
+
+    bots.load_config()
+    bots.LOG_SETTINGS["enabled"] = False
+    rng = np.random.default_rng(args.seed)
+    zonas, probabilidades_zona = zip(*distribucion_zonas(args.zones))
+    print("Zonas: " + ", ".join(f"{zona} ({p:.0%})" for zona, p in zip(zonas, probabilidades_zona)))
+
+    resultados = []
+    for politica in politicas:
+        inicio = time.perf_counter()
+        resultado = analizar(politica, args, zonas, np.array(probabilidades_zona), bots.THREAT_LEVELS, pesos_nivel / pesos_nivel.sum(), rng)
+        resultado["duracion_s"] = round(time.perf_counter() - inicio, 2)
+        resultados.append(resultado)
+        eventos = resultado["eventos_por_partida"]
+        print(f"{politica:<10} victoria {resultado['tasa_victoria']:7.2%}  derrota {resultado['tasa_derrota']:7.2%}  "
+              f"sin terminar {resultado['tasa_sin_terminar']:7.2%}  eventos: media {eventos['media']} "
+              + " ".join(f"p{p}={eventos.get(f'p{p}')}" for p in PERCENTILES) + f"  ({resultado['duracion_s']}s)")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"game_state": bots.CONFIG.get("game_state", {}), "game_balance": bots.CONFIG.get("game_balance", {}),
+                       "zonas": dict(zip(zonas, probabilidades_zona)), "timeout_rate": args.timeout_rate,
+                       "resultados": resultados}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
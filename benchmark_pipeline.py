@@ -0,0 +1,275 @@
+# benchmark_pipeline.py (BANCO DE PRUEBAS DE RENDIMIENTO DEL PIPELINE)
+#
+# Genera eventos sintéticos (generar_evento_aleatorio) al ritmo indicado y los pasa por
+# BotAnalizador -> BotDeduplicador -> BotEnriquecedor -> admisión y decisión -> BotNotificador
+# con las mismas etapas, colas y backpressure que main_loop_pipeline. La decisión es
+# instantánea o la automática (sin dashboard) y los destinos son endpoints locales simulados con latencia y tasa de
+# fallos configurables. Al final muestra el throughput, p50/p95/p99 por etapa y la memoria.
+#
+# Uso:
+#   python benchmark_pipeline.py --rate 500 --events 5000
+#   python benchmark_pipeline.py --rate 0 --events 5000 --dedup  (con BotDeduplicador: casi todos se suprimen)
+#   python benchmark_pipeline.py --rate 0 --duration 30 --endpoint-latency-ms 20 --endpoint-failure-rate 0.05
+#   python benchmark_pipeline.py --events 5000 --json resultado.json --baseline base.json  (falla si empeora)
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import queue
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+try:
+    import resource # Solo Unix
+except ImportError:
+    resource = None
+
+import bots
+from metricas import resumen_texto
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "endpoints"))
+from receptor_app import ReceptorAlertas
+
+ETAPAS = ("BotAnalizador", "BotDeduplicador", "BotEnriquecedor", "BotDecisionTactica", "BotNotificador")
+
+
+class EndpointsSimulados(ReceptorAlertas):
+    """Receptor de alertas con latencia y fallos (HTTP 503) inyectados."""
+
+    def __init__(self, routes, latency_ms=0.0, failure_rate=0.0):
+        super().__init__(routes, log_mode="ninguno")
+        self.latency_ms = latency_ms
+        self.failure_rate = failure_rate
+
+    async def dispatch(self, method, target, body, paths):
+        if self.latency_ms > 0:
+            await asyncio.sleep(self.latency_ms / 1000.0)
+        if self.failure_rate > 0 and random.random() < self.failure_rate:
+            return 503, "Fallo simulado", "text/plain"
+        return await super().dispatch(method, target, body, paths)
+
+
+def _serve_endpoints(routes, latency_ms, failure_rate, ready):
+    receptor = EndpointsSimulados(routes, latency_ms, failure_rate)
+    (host, port), paths = next(iter(routes.items()))
+
+    async def serve():
+        server = await asyncio.start_server(lambda r, w: receptor.handle_connection(r, w, paths), host, port, backlog=1024)
+        ready.set()
+        await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+def start_endpoints(destinations, latency_ms, failure_rate):
+    """Arranca los endpoints simulados en otro proceso, para no competir por el GIL con el pipeline medido.
+
+    Usa un puerto libre con una ruta por destino. Devuelve ({destino: url}, proceso).
+    """
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    routes = {("127.0.0.1", port): {f"/alert/{dest.lower()}": dest for dest in destinations}}
+    ready = multiprocessing.Event()
+    process = multiprocessing.Process(target=_serve_endpoints, args=(routes, latency_ms, failure_rate, ready), daemon=True)
+    process.start()
+    if not ready.wait(10):
+        raise RuntimeError("Los endpoints simulados no arrancaron.")
+    return {dest: f"http://127.0.0.1:{port}/alert/{dest.lower()}" for dest in destinations}, process
+
+
+def decision_instantanea(enriched_data):
+    """Jugador perfecto e instantáneo: envía a los héroes cercanos con endpoint (o a Sonic) y siempre al LogDB."""
+    endpoints = bots.CONFIG["bot_notificador"]["endpoints"]
+    heroes = [hero for hero in enriched_data.get("location_details", {}).get("known_nearby_heroes", []) if hero in endpoints] or ["Sonic"]
+    return {"event_id": enriched_data["event_id"], "target_destinations": ["LogDB", *heroes],
+            "alert_payload_to_send": enriched_data, "decision_type": "Benchmark: instantánea"}
+
+
+def decision_automatica(enriched_data):
+    return bots.tomar_decision_automatica_por_timeout(enriched_data["event_id"], enriched_data, "Benchmark")
+
+
+def notificar_y_cerrar(routing_data):
+    resultado = bots.bot_notificador(routing_data)
+    bots.end_report(routing_data["event_id"])
+    return resultado
+
+
+def memoria_max_mb():
+    if resource is None:
+        return None
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1) # bytes en macOS, KB en Linux
+
+
+def run_benchmark(args):
+    bots.LOGS_DIR = args.log_dir or tempfile.mkdtemp(prefix="benchmark_logs_") # No mezclar con los logs del juego
+    bots.load_config()
+    bots.LOG_SETTINGS["console"] = False
+    cfg_notifier = bots.CONFIG["bot_notificador"]
+    cfg_notifier["endpoints"], endpoints_process = start_endpoints(["Sonic", "Tails", "Knuckles", "LogDB"], args.endpoint_latency_ms, args.endpoint_failure_rate)
+    cfg_notifier["pool_size"] = max(cfg_notifier.get("pool_size", 8), args.notifier_workers * 4)
+    bots.METRICS.reset()
+    if not args.dedup:
+        # Los eventos sintéticos solo tienen unas pocas huellas distintas: con el deduplicador casi ninguno
+        # pasaría de BotDeduplicador y el resto del pipeline apenas se mediría. La etapa sigue en el camino.
+        bots.DEDUPLICADOR = None
+    if args.tracemalloc:
+        tracemalloc.start()
+
+    decision = bots.METRICS.medir("etapa_latencia_ms", etapa="BotDecisionTactica")(
+        decision_instantanea if args.decision == "instant" else decision_automatica)
+    stages = [
+        ("BotAnalizador", bots.bot_analizador, 1),
+        ("BotDeduplicador", bots.bot_deduplicador, 1),
+        ("BotEnriquecedor", bots.bot_enriquecedor, 1),
+        ("BotDecisionTactica", lambda enriched_data: bots.decidir_con_admision(enriched_data, solicitar=decision), 1),
+        ("BotNotificador", notificar_y_cerrar, args.notifier_workers),
+    ]
+    stop_event = threading.Event()
+    limiter = bots.InFlightLimiter(args.max_in_flight)
+    queues = [queue.Queue(maxsize=args.queue_size) for _ in stages]
+    completed = [0]
+    completed_lock = threading.Lock()
+
+    def on_done(_):
+        with completed_lock:
+            completed[0] += 1
+
+    workers = []
+    for index, (bot_name, etapa, n_workers) in enumerate(stages):
+        output_queue = queues[index + 1] if index + 1 < len(stages) else None
+        for n in range(n_workers):
+            worker = threading.Thread(target=bots._pipeline_worker,
+                                      args=(bot_name, etapa, queues[index], output_queue, stop_event, limiter,
+                                            on_done if output_queue is None else None),
+                                      name=f"{bot_name}-{n}", daemon=True)
+            worker.start()
+            workers.append(worker)
+
+    print(f"Benchmark: ritmo={'máximo' if not args.rate else f'{args.rate}/s'}, "
+          f"{f'{args.events} eventos' if args.events else f'{args.duration}s'}, decisión={args.decision}, "
+          f"latencia endpoints={args.endpoint_latency_ms}ms, fallos={args.endpoint_failure_rate:.0%}")
+    start = time.perf_counter()
+    produced = 0
+    try:
+        while not (args.events and produced >= args.events) and not (args.duration and time.perf_counter() - start >= args.duration):
+            if args.rate:
+                ahead = start + produced / args.rate - time.perf_counter()
+                if ahead > 0:
+                    time.sleep(ahead)
+            if not limiter.acquire(stop_event):
+                break
+            produced += 1
+            evento = bots.generar_evento_aleatorio(produced)
+            bots.start_report(evento["event_id"])
+            bots._put_until_stopped(queues[0], evento, stop_event)
+        generation_seconds = time.perf_counter() - start
+        limiter.wait_idle(stop_event)
+    except KeyboardInterrupt:
+        print("Benchmark interrumpido. Resultados parciales:")
+        generation_seconds = time.perf_counter() - start
+    elapsed = time.perf_counter() - start
+    stop_event.set()
+    for worker in workers:
+        worker.join(timeout=1)
+    bots.close_notifier()
+    endpoints_process.terminate()
+
+    snapshot = bots.METRICS.snapshot()
+    histogramas = {(h["nombre"], tuple(sorted(h["etiquetas"].items()))): h for h in snapshot["histogramas"]}
+    def percentiles(nombre, **etiquetas):
+        h = histogramas.get((nombre, tuple(sorted(etiquetas.items()))))
+        return {k: h[k] for k in ("count", "p50", "p95", "p99", "max")} if h else None
+
+    results = {
+        "config": {k: v for k, v in vars(args).items() if k not in ("json", "baseline")},
+        "producidos": produced,
+        "completados": completed[0],
+        "duracion_s": round(elapsed, 3),
+        "ritmo_generacion_por_s": round(produced / generation_seconds, 1) if generation_seconds else None,
+        "throughput_por_s": round(completed[0] / elapsed, 1) if elapsed else None,
+        "etapas": {etapa: percentiles("etapa_latencia_ms", etapa=etapa) for etapa in ETAPAS},
+        "extremo_a_extremo": percentiles("evento_latencia_total_ms"),
+        "envios": {f"{c['etiquetas']['destino']}:{c['etiquetas']['estado']}": c["valor"] for c in snapshot["contadores"]
+                   if c["nombre"] == "notificador_envios_total"},
+        "duplicados": sum(c["valor"] for c in snapshot["contadores"]
+                          if c["nombre"] == "dedup_eventos_total" and c["etiquetas"].get("resultado") == "duplicado"),
+        "descartados_por_carga": sum(c["valor"] for c in snapshot["contadores"]
+                                     if c["nombre"] == "admision_eventos_total" and c["etiquetas"].get("resultado") == "descartado"),
+        "memoria_max_mb": memoria_max_mb(),
+    }
+    if args.tracemalloc:
+        results["tracemalloc_pico_mb"] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 1)
+        tracemalloc.stop()
+    return results, snapshot
+
+
+def compare_with_baseline(results, baseline, tolerance):
+    """Lista de regresiones respecto a un resultado anterior (throughput menor o p95 mayor que la tolerancia)."""
+    regresiones = []
+    if baseline.get("throughput_por_s") and results["throughput_por_s"] < baseline["throughput_por_s"] * (1 - tolerance):
+        regresiones.append(f"throughput {results['throughput_por_s']}/s < {baseline['throughput_por_s']}/s")
+    for etapa, base in baseline.get("etapas", {}).items():
+        actual = results["etapas"].get(etapa)
+        if base and actual and base.get("p95") and actual["p95"] > base["p95"] * (1 + tolerance):
+            regresiones.append(f"{etapa} p95 {actual['p95']}ms > {base['p95']}ms")
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del pipeline de alertas con carga sintética.")
+    parser.add_argument("--rate", type=float, default=500, help="eventos por segundo (0 = lo más rápido posible)")
+    parser.add_argument("--events", type=int, default=5000, help="número de eventos (0 = usar --duration)")
+    parser.add_argument("--duration", type=float, default=0, help="segundos de generación si --events es 0")
+    parser.add_argument("--decision", choices=["instant", "auto"], default="instant", help="decisión instantánea o la automática por timeout")
+    parser.add_argument("--endpoint-latency-ms", type=float, default=0, help="latencia de cada endpoint simulado")
+    parser.add_argument("--endpoint-failure-rate", type=float, default=0, help="probabilidad de HTTP 503 (0-1)")
+    parser.add_argument("--dedup", action="store_true", help="activar BotDeduplicador (los eventos repetidos no llegan al notificador)")
+    parser.add_argument("--notifier-workers", type=int, default=4, help="hilos de la etapa BotNotificador")
+    parser.add_argument("--max-in-flight", type=int, default=256, help="eventos en vuelo (backpressure)")
+    parser.add_argument("--queue-size", type=int, default=128, help="tamaño de las colas entre etapas")
+    parser.add_argument("--log-dir", default=None, help="carpeta de logs (por defecto una temporal)")
+    parser.add_argument("--tracemalloc", action="store_true", help="medir el pico de memoria de Python (más lento)")
+    parser.add_argument("--json", default=None, help="guardar los resultados en este fichero JSON")
+    parser.add_argument("--baseline", default=None, help="JSON de un benchmark anterior; sale con código 1 si hay regresión")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="margen para la comparación con --baseline")
+    args = parser.parse_args()
+    if not args.events and not args.duration:
+        parser.error("Indica --events o --duration.")
+
+    results, snapshot = run_benchmark(args)
+    print(f"\nProducidos: {results['producidos']}  Completados: {results['completados']}  Duplicados: {results['duplicados']}  "
+          f"Descartados por carga: {results['descartados_por_carga']}  Duración: {results['duracion_s']}s")
+    print(f"Throughput: {results['throughput_por_s']} eventos/s (generación: {results['ritmo_generacion_por_s']}/s)")
+    print(f"Memoria máx. (RSS): {results['memoria_max_mb']} MB" + (f", pico tracemalloc: {results['tracemalloc_pico_mb']} MB" if args.tracemalloc else ""))
+    for line in resumen_texto(snapshot):
+        print("  " + line)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regresiones = compare_with_baseline(results, json.load(f), args.tolerance)
+        for regresion in regresiones:
+            print(f"REGRESIÓN: {regresion}")
+        if regresiones:
+            sys.exit(1)
+        print("Sin regresiones respecto al baseline.")
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    main()
@@ -2,15 +2,38 @@
 
 import os
 import json
+import atexit
+from html.parser import HTMLParser
 import time
 import random
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta 
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 import requests
+from requests.adapters import HTTPAdapter
+
+from reportes_journal import ReportJournal
+from indice_ubicaciones import IndiceUbicaciones
+from registro_decisiones import RegistroDecisiones
+from deduplicador import Deduplicador
+from admision import ControlAdmision
+from eventos import RegistroEvento, EventoMonitor, EventoCanonico, EventoEnriquecido, Enrutamiento, a_dict, codificar, dumps_compacto
+from sesiones import SESION_PREDETERMINADA, clave_decision, ruta_sesion, sesion_id_valido
+from metricas import Metricas, resumen_texto
+from reloj import RELOJ_SISTEMA
+from vigilante_fuentes import VigilanteFuentes
 
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.edge.service import Service as EdgeService
 from selenium.webdriver.edge.options import Options as EdgeOptions
+from selenium.webdriver.chrome.options import Options as ChromeOptions
+from selenium.webdriver.firefox.options import Options as FirefoxOptions
+from selenium.webdriver.support.ui import WebDriverWait
 from webdriver_manager.microsoft import EdgeChromiumDriverManager
 from selenium.common.exceptions import WebDriverException, NoSuchElementException, TimeoutException, InvalidArgumentException
 
@@ -18,86 +41,319 @@ from selenium.common.exceptions import WebDriverException, NoSuchElementExceptio
 DATA_DIR = "data"
 LOGS_DIR = "logs"
 REPORTS_DIR = "reports"
-DASHBOARD_DATA_DIR = "data_dashboard" 
-EVENT_ID_COUNTER = 0
 CONFIG = {}
 KNOWLEDGE_BASE = {}
-CURRENT_EVENT_HTML_REPORT = ""
-WEBDRIVER_INSTANCE = None 
+LOCATION_INDEX = IndiceUbicaciones({})
+DECISION_REGISTRY = None # Registro compartido con el dashboard (solo si decision_registry.db_path está configurado)
+DEDUPLICADOR = None # Huellas de las alertas recientes (solo si deduplicacion.enabled)
+OPEN_REPORTS = {} # event_id -> pasos del reporte aún en memoria
+REPORTS_LOCK = threading.Lock()
+REPORT_JOURNAL = None
+REPORT_WRITER = None
+WEBDRIVER_POOL = None 
+WEBDRIVER_POOL_LOCK = threading.Lock()
+SNAPSHOT_WRITER = None
+LOG_WRITER = None
+LOG_WRITER_LOCK = threading.Lock()
+LOG_SETTINGS = {"enabled": True, "console": True, "debug": False, "batch_size": 200, "flush_interval_seconds": 0.5,
+                "max_bytes": 5 * 1024 * 1024, "backup_count": 3}
+NOTIFIER_SESSION = None
+NOTIFIER_EXECUTOR = None
+CIRCUIT_BREAKERS = {}
+NOTIFIER_LOCK = threading.Lock()
+SCRAPE_CACHE = {} # ruta absoluta -> (mtime_ns, tamaño, datos extraídos)
+SCRAPE_CACHE_LOCK = threading.Lock()
+MONITOR_DATA_IDS = ["descripcion", "nivel", "ubicacion", "device_id", "reading_type", "value"]
+
+# --- Tipos del pipeline ---
+# Cada etapa recibe el evento producido por la anterior y devuelve el suyo (o None si aborta).
+# Los bots producen registros de eventos.py; la simulación y el benchmark también pasan dicts.
+Evento = Union[RegistroEvento, Dict[str, Any]]
+Etapa = Callable[[Evento], Optional[Evento]]
+JSON_HEADERS = {"Content-Type": "application/json"}
 
-# --- Variables para el estado del juego ---
-EGGMAN_HP = 100
-GLOBAL_PANIC = 0
+# --- Estado del juego: una SesionJuego por partida (ver sesiones.py) ---
+SESSIONS = {} # session_id -> SesionJuego
+SESSIONS_LOCK = threading.Lock()
 # ---
 
+# --- Métricas (latencias por etapa, colas, decisiones y envíos) ---
+METRICS = Metricas()
+METRICS_REPORTER = None
+
 # --- FUNCIONES DE UTILIDAD ---
 def ensure_dirs():
     os.makedirs(DATA_DIR, exist_ok=True)
     os.makedirs(LOGS_DIR, exist_ok=True)
     os.makedirs(REPORTS_DIR, exist_ok=True)
-    os.makedirs(DASHBOARD_DATA_DIR, exist_ok=True) 
+
+class AsyncLogWriter:
+    """Escribe los logs por lotes desde un hilo propio.
+
+    Mantiene abiertos los ficheros de cada bot, vuelca cuando se acumulan `batch_size`
+    líneas o pasa `flush_interval_seconds`, y rota cada fichero al superar `max_bytes`.
+    """
+
+    def __init__(self, logs_dir, settings):
+        self.logs_dir = logs_dir
+        self.settings = settings
+        self._queue = queue.Queue()
+        self._files = {}
+        self._thread = threading.Thread(target=self._run, name="AsyncLogWriter", daemon=True)
+        self._thread.start()
+
+    def enqueue(self, bot_name, line):
+        self._queue.put((bot_name, line))
+
+    def _run(self):
+        running = True
+        while running:
+            batch = []
+            deadline = time.monotonic() + self.settings["flush_interval_seconds"]
+            while len(batch) < self.settings["batch_size"]:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    running = False
+                    break
+                batch.append(item)
+            if batch:
+                self._write_batch(batch)
+
+        for f in self._files.values():
+            f.close()
+        self._files.clear()
+
+    def _write_batch(self, batch):
+        lines_by_bot = {}
+        for bot_name, line in batch:
+            lines_by_bot.setdefault(bot_name, []).append(line)
+        for bot_name, lines in lines_by_bot.items():
+            try:
+                f = self._get_file(bot_name)
+                f.write("\n".join(lines) + "\n")
+                f.flush()
+                if f.tell() >= self.settings["max_bytes"]:
+                    self._rotate(bot_name)
+            except OSError as e:
+                print(f"[AsyncLogWriter] Error escribiendo log de {bot_name}: {e}")
+
+    def _get_file(self, bot_name):
+        f = self._files.get(bot_name)
+        if f is None:
+            os.makedirs(self.logs_dir, exist_ok=True)
+            f = open(os.path.join(self.logs_dir, f"{bot_name}.log"), "a", encoding="utf-8")
+            self._files[bot_name] = f
+        return f
+
+    def _rotate(self, bot_name):
+        self._files.pop(bot_name).close()
+        base_path = os.path.join(self.logs_dir, f"{bot_name}.log")
+        backup_count = self.settings["backup_count"]
+        if backup_count <= 0:
+            os.remove(base_path)
+            return
+        for index in range(backup_count - 1, 0, -1):
+            if os.path.exists(f"{base_path}.{index}"):
+                os.replace(f"{base_path}.{index}", f"{base_path}.{index + 1}")
+        os.replace(base_path, f"{base_path}.1")
+
+    def close(self, timeout=5):
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+def get_log_writer():
+    global LOG_WRITER
+    if LOG_WRITER is None:
+        with LOG_WRITER_LOCK:
+            if LOG_WRITER is None:
+                LOG_WRITER = AsyncLogWriter(LOGS_DIR, LOG_SETTINGS)
+    return LOG_WRITER
+
+def stop_log_writer():
+    global LOG_WRITER
+    with LOG_WRITER_LOCK:
+        if LOG_WRITER is not None:
+            LOG_WRITER.close()
+            LOG_WRITER = None
+
+atexit.register(stop_log_writer) # Vaciar los lotes pendientes al salir
+
+def configure_logging():
+    LOG_SETTINGS.update(CONFIG.get("logging", {}))
 
 def logger(bot_name, message, level="INFO"):
+    if not LOG_SETTINGS.get("enabled", True) or (level == "DEBUG" and not LOG_SETTINGS["debug"]):
+        return
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
     log_message_console = f"[{timestamp}] [{bot_name:<28}] [{level:<5}] {message}" 
-    print(log_message_console)
-    log_file_path = os.path.join(LOGS_DIR, f"{bot_name}.log")
-    os.makedirs(os.path.dirname(log_file_path), exist_ok=True)
-    with open(log_file_path, "a", encoding="utf-8") as f:
-        f.write(log_message_console + "\n")
-
-def write_json_data(filename, data, directory=DATA_DIR):
-    if not os.path.exists(directory):
-        os.makedirs(directory, exist_ok=True)
-    path = os.path.join(directory, filename)
+    if LOG_SETTINGS["console"]:
+        print(log_message_console)
+    get_log_writer().enqueue(bot_name, log_message_console)
+
+class BackgroundWriter:
+    """Ejecuta escrituras a disco en un hilo aparte para sacarlas del ciclo principal."""
+
+    def __init__(self, name="BackgroundWriter", max_pending=256):
+        self.name = name
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, func, *args, **kwargs):
+        try:
+            self._queue.put_nowait((func, args, kwargs))
+            return True
+        except queue.Full:
+            logger("System", f"{self.name}: cola llena, escritura descartada.", "WARN")
+            return False
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                func, args, kwargs = item
+                func(*args, **kwargs)
+            except Exception as e:
+                logger("System", f"{self.name}: error en escritura en segundo plano: {e}", "ERROR")
+            finally:
+                self._queue.task_done()
+
+    def close(self, timeout=5):
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+def _write_text_file(path, text):
     with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=4)
-    logger("System", f"Archivo JSON '{filename}' escrito en '{directory}'.", "DEBUG")
+        f.write(text)
 
-def read_json_data(filename, directory=DATA_DIR): 
-    path = os.path.join(directory, filename)
-    if not os.path.exists(path):
-        logger("System", f"Archivo JSON '{filename}' no encontrado en '{directory}'.", "WARN")
-        return None
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        return data
-    except json.JSONDecodeError:
-        logger("System", f"Error decodificando JSON '{filename}' de '{directory}'.", "ERROR")
-        return None
+def snapshot_stage(filename, data):
+    """Guarda una instantánea de la salida de una etapa en data/ si los snapshots de depuración están activos."""
+    if SNAPSHOT_WRITER is None or not data:
+        return
+    # Se serializa aquí para capturar el estado del evento en este punto del pipeline.
+    text = json.dumps(a_dict(data), ensure_ascii=False, indent=4)
+    SNAPSHOT_WRITER.submit(_write_text_file, os.path.join(DATA_DIR, filename), text)
+
+def start_snapshot_writer():
+    global SNAPSHOT_WRITER
+    if CONFIG.get("bot_maestro", {}).get("debug_snapshots", False) and SNAPSHOT_WRITER is None:
+        os.makedirs(DATA_DIR, exist_ok=True)
+        SNAPSHOT_WRITER = BackgroundWriter("SnapshotWriter")
+        logger("BotMaestro", f"Snapshots de depuración activos en '{DATA_DIR}'.")
+
+def stop_snapshot_writer():
+    global SNAPSHOT_WRITER
+    if SNAPSHOT_WRITER is not None:
+        SNAPSHOT_WRITER.close()
+        SNAPSHOT_WRITER = None
+
+class MetricsReporter:
+    """Cada summary_interval_seconds escribe un resumen de las métricas en el log y las publica en el dashboard."""
+
+    def __init__(self, interval_seconds, push_url=None):
+        self.interval_seconds = interval_seconds
+        self.push_url = push_url
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="MetricsReporter", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            self.report()
+        self.report() # Resumen final al detener
+
+    def report(self):
+        snapshot = METRICS.snapshot()
+        for line in resumen_texto(snapshot):
+            logger("Metricas", line)
+        if self.push_url:
+            try:
+                requests.post(self.push_url, json=snapshot, timeout=2)
+            except requests.exceptions.RequestException as e:
+                logger("Metricas", f"No se pudieron publicar las métricas en el dashboard: {e}", "DEBUG")
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+
+def start_metrics_reporter():
+    global METRICS_REPORTER
+    cfg_metrics = CONFIG.get("metrics", {})
+    if cfg_metrics.get("enabled", True) and METRICS_REPORTER is None:
+        cfg_dashboard = CONFIG.get("dashboard_tactico", {})
+        push_url = f"{cfg_dashboard.get('url', '').rstrip('/')}{cfg_dashboard.get('metrics_endpoint', '/metrics')}" if cfg_metrics.get("push_to_dashboard", True) else None
+        METRICS_REPORTER = MetricsReporter(cfg_metrics.get("summary_interval_seconds", 30), push_url)
+
+def stop_metrics_reporter():
+    global METRICS_REPORTER
+    if METRICS_REPORTER is not None:
+        METRICS_REPORTER.close()
+        METRICS_REPORTER = None
 
 def load_config():
-    global CONFIG, KNOWLEDGE_BASE
+    global CONFIG, KNOWLEDGE_BASE, LOCATION_INDEX, DECISION_REGISTRY, DEDUPLICADOR
     default_config = {
-        "bot_maestro": {"process_interval_seconds_min": 5, "process_interval_seconds_max": 10, "max_cycles_to_run": 0},
+        "bot_maestro": {"process_interval_seconds_min": 5, "process_interval_seconds_max": 10, "max_cycles_to_run": 0, "debug_snapshots": False,
+                        "pipeline_mode": False, "max_in_flight_events": 4, "stage_queue_size": 4, "decision_workers": 4,
+                        "sessions": [SESION_PREDETERMINADA]},
         "bot_monitor": {
             "use_selenium_source": True, 
             "selenium_html_sources": ["fuente_de_datos_simulada.html"], 
             "edge_binary_path_override": "",
-            "selenium_view_time_seconds": 3
+            "browser": "edge",
+            "headless": True,
+            "webdriver_pool_size": 2,
+            "selenium_wait_timeout_seconds": 10,
+            "scrape_all_sources": False,
+            "scraper_mode": "auto",
+            "js_required_sources": [],
+            "ingestion_mode": "aleatorio",
+            "watch_poll_interval_seconds": 1.0,
+            "watch_hash_check": True,
+            "watch_emit_on_start": True
             },
         "dashboard_tactico": { 
             "url": "http://127.0.0.1:5005",
             "submit_alert_endpoint": "/submit_alert_data",
             "check_alert_endpoint": "/check_new_alert",
             "decision_timeout_seconds": 40,
-            "decision_poll_interval_seconds": 1,
-            "dashboard_refresh_poll_seconds": 3
+            "await_decision_endpoint": "/await_decision",
+            "dashboard_refresh_poll_seconds": 3,
+            "metrics_endpoint": "/metrics"
         },
-        "bot_notificador": {"request_timeout_seconds": 5, "endpoints": {
+        "bot_notificador": {"request_timeout_seconds": 5, "destination_deadline_seconds": 8, "max_retries": 2,
+                            "retry_backoff_base_seconds": 0.2, "circuit_breaker_failure_threshold": 3,
+                            "circuit_breaker_reset_seconds": 30, "pool_size": 8, "endpoints": {
             "Sonic": "http://127.0.0.1:5001/alert", "Knuckles": "http://127.0.0.1:5002/alert",
             "Tails": "http://127.0.0.1:5003/alert", "LogDB": "http://127.0.0.1:5004/alert"
         }},
         "bot_enriquecedor": {"knowledge_base_simulated": {
             "Green Hill Zone": {"zone_name": "Green Hill Zone", "description": "Colinas verdes.", "nearby_heroes": ["Sonic", "Tails"], "common_threats": ["Moto Bug"], "css_class": "zone-green-hill"}
             # ... (Añadir aquí el resto de tu KNOWLEDGE_BASE de config.json si es necesario)
-        }},
+        }, "location_aliases": {}, "fuzzy_match_cutoff": 0.8, "fuzzy_cache_size": 1024},
         "game_state": { # Valores por defecto si no están en config.json
             "initial_eggman_hp": 100,
             "initial_global_panic": 0,
             "max_global_panic": 100
-        }
+        },
+        "game_balance": { # Efecto de cada decisión sobre el HP de Eggman y el pánico (ver efecto_de_decision)
+            "timeout_panic": {"critico": 15, "alto": 8, "medio": 4, "bajo": 2},
+            "load_shed_panic": {"critico": 4, "alto": 2, "medio": 1, "bajo": 0},
+            "register_only": {"damage": -2, "panic": 2},
+            "optimal": {"panic": -2, "damage": {"critico": 20, "alto": 12, "medio": 8, "bajo": 5}},
+            "suboptimal": {"panic": 3, "damage": {"critico": 5, "alto": 3, "medio": 1, "bajo": 0}}
+        },
+        "decision_registry": {"db_path": "", "ttl_seconds": 3600},
+        "deduplicacion": {"enabled": True, "window_seconds": 120, "max_entries": 1024},
+        "control_admision": {"enabled": True, "max_backlog": 3, "max_wait_seconds": 120, "shed_max_priority_score": 5},
+        "metrics": {"enabled": True, "summary_interval_seconds": 30, "push_to_dashboard": True},
+        "logging": dict(LOG_SETTINGS),
+        "reports": {"enabled": True, "journal_dir": os.path.join(REPORTS_DIR, "journal"), "segment_max_bytes": 4 * 1024 * 1024}
     }
     try:
         with open("config.json", "r", encoding="utf-8") as f:
@@ -120,11 +376,28 @@ def load_config():
         logger("BotMaestro", f"Error inesperado cargando config.json: {e}. Usando config por defecto.", "ERROR")
         CONFIG = default_config
 
+    configure_logging()
     KNOWLEDGE_BASE = CONFIG.get("bot_enriquecedor", {}).get("knowledge_base_simulated", {})
     if not KNOWLEDGE_BASE:
          KNOWLEDGE_BASE = default_config["bot_enriquecedor"]["knowledge_base_simulated"]
+    cfg_enriquecedor = CONFIG.get("bot_enriquecedor", {})
+    LOCATION_INDEX = IndiceUbicaciones(KNOWLEDGE_BASE, aliases=cfg_enriquecedor.get("location_aliases", {}),
+                                       fuzzy_cutoff=cfg_enriquecedor.get("fuzzy_match_cutoff", 0.8),
+                                       fuzzy_cache_size=cfg_enriquecedor.get("fuzzy_cache_size", 1024))
     logger("BotMaestro", "Base de conocimiento (re)inicializada.")
 
+    cfg_registro = CONFIG.get("decision_registry", {})
+    if DECISION_REGISTRY is not None:
+        DECISION_REGISTRY.close()
+    DECISION_REGISTRY = RegistroDecisiones(cfg_registro["db_path"], cfg_registro.get("ttl_seconds", 3600)) if cfg_registro.get("db_path") else None
+
+    cfg_dedup = CONFIG.get("deduplicacion", {})
+    DEDUPLICADOR = Deduplicador(cfg_dedup.get("window_seconds", 120), cfg_dedup.get("max_entries", 1024)) if cfg_dedup.get("enabled", True) else None
+    if DEDUPLICADOR is not None:
+        METRICS.registrar_gauge("dedup_huellas", DEDUPLICADOR.__len__)
+    else:
+        METRICS.quitar_gauge("dedup_huellas")
+
 def find_edge_binary():
     paths_to_check = [
         "C:\\Program Files (x86)\\Microsoft\\Edge\\Application\\msedge.exe",
@@ -135,213 +408,434 @@ def find_edge_binary():
             return path
     return None
 
-def init_webdriver():
-    global WEBDRIVER_INSTANCE
-    if WEBDRIVER_INSTANCE is not None:
-        try:
-            WEBDRIVER_INSTANCE.current_url 
-            logger("WebDriver", "Reutilizando instancia de WebDriver existente.")
-            return WEBDRIVER_INSTANCE
-        except WebDriverException:
-            logger("WebDriver", "La instancia anterior de WebDriver ya no es válida. Creando una nueva.")
-            WEBDRIVER_INSTANCE = None 
-            
-    logger("WebDriver", "Inicializando nueva instancia de WebDriver (Edge)...")
+def create_webdriver():
+    """Crea una sesión de navegador según bot_monitor.browser (edge, chrome o firefox), headless por defecto."""
     cfg_monitor = CONFIG.get("bot_monitor", {})
+    browser = cfg_monitor.get("browser", "edge").lower()
+    headless = cfg_monitor.get("headless", True)
+    logger("WebDriver", f"Inicializando nueva sesión de WebDriver ({browser}, headless={headless})...")
+
+    if browser == "firefox":
+        options = FirefoxOptions()
+        if headless: options.add_argument("-headless")
+        return webdriver.Firefox(options=options)
+
+    if browser == "chrome":
+        options = ChromeOptions()
+        if headless: options.add_argument("--headless=new")
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+        return webdriver.Chrome(options=options)
+
     edge_binary_override = cfg_monitor.get("edge_binary_path_override", "").strip()
-    
     options = EdgeOptions()
     options.add_experimental_option('excludeSwitches', ['enable-logging'])
     options.add_argument('log-level=3') 
+    if headless: options.add_argument("--headless=new")
     
     edge_binary_path_to_use = edge_binary_override if edge_binary_override and os.path.exists(edge_binary_override) else find_edge_binary()
-
     if edge_binary_path_to_use:
         options.binary_location = edge_binary_path_to_use
         logger("WebDriver", f"Usando binario de Edge: {edge_binary_path_to_use}")
     else:
         logger("WebDriver", "Binario de Edge no encontrado/especificado. Dejando que WebDriverManager intente.", "WARN")
 
-    try:
-        service = EdgeService(executable_path=EdgeChromiumDriverManager().install())
-        driver = webdriver.Edge(service=service, options=options)
-        logger("WebDriver", "Nueva instancia de WebDriver creada exitosamente.")
-        WEBDRIVER_INSTANCE = driver
-        return driver
-    except Exception as e:
-        logger("WebDriver", f"FALLO AL INICIALIZAR WEBDRIVER: {e}", "CRITICAL")
-        return None
+    service = EdgeService(executable_path=EdgeChromiumDriverManager().install())
+    return webdriver.Edge(service=service, options=options)
+
+class WebDriverPool:
+    """Pool de sesiones de navegador reutilizables; las sesiones que fallan se descartan y se recrean."""
+
+    def __init__(self, size, factory):
+        self.size = max(1, int(size))
+        self.factory = factory
+        self.created = 0
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
 
-def close_webdriver():
-    global WEBDRIVER_INSTANCE
-    if WEBDRIVER_INSTANCE is not None:
-        logger("WebDriver", "Cerrando instancia de WebDriver...")
+    def _is_healthy(self, driver):
         try:
-            WEBDRIVER_INSTANCE.quit()
+            driver.current_url
+            return True
+        except WebDriverException:
+            return False
+
+    def _discard(self, driver):
+        with self._lock:
+            self.created -= 1
+        try:
+            driver.quit()
         except Exception as e:
-            logger("WebDriver", f"Error al cerrar WebDriver: {e}", "ERROR")
+            logger("WebDriver", f"Error al cerrar sesión de WebDriver: {e}", "ERROR")
+
+    def acquire(self, timeout=None):
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    can_create = self.created < self.size
+                    if can_create:
+                        self.created += 1
+                if can_create:
+                    try:
+                        return self.factory()
+                    except Exception:
+                        with self._lock:
+                            self.created -= 1
+                        raise
+                driver = self._idle.get(timeout=timeout) # Pool lleno: esperar a que se libere una sesión
+            if self._is_healthy(driver):
+                return driver
+            logger("WebDriver", "Sesión de WebDriver no válida. Reciclándola.", "WARN")
+            self._discard(driver)
+
+    def release(self, driver, healthy=True):
+        if healthy:
+            self._idle.put(driver)
+        else:
+            self._discard(driver)
+
+    @contextmanager
+    def session(self, timeout=None):
+        driver = self.acquire(timeout)
+        healthy = True
+        try:
+            yield driver
+        except WebDriverException:
+            healthy = self._is_healthy(driver)
+            raise
         finally:
-            WEBDRIVER_INSTANCE = None
-
-# --- Funciones para el Reporte HTML del Flujo ---
-def start_html_report(event_id):
-    global CURRENT_EVENT_HTML_REPORT
-    CURRENT_EVENT_HTML_REPORT = os.path.join(REPORTS_DIR, f"evento_{event_id.replace(':', '-')}.html")
-    html_content = f"""
-    <!DOCTYPE html><html lang="es"><head><meta charset="UTF-8"><title>Reporte de Flujo - Evento {event_id}</title>
-    <style>body{{font-family:Arial,sans-serif;margin:20px;background-color:#f4f4f4;color:#333}}.container{{background-color:#fff;padding:20px;border-radius:8px;box-shadow:0 0 10px rgba(0,0,0,.1)}}.bot-step{{margin-bottom:20px;padding:15px;border-left:5px solid;border-radius:5px}}.bot-monitor{{border-color:#3498db;background-color:#eaf5ff}}.bot-analizador{{border-color:#f1c40f;background-color:#fff9e6}}.bot-enriquecedor{{border-color:#2ecc71;background-color:#e9f7ef}}.bot-decision-tactica{{border-color:#e67e22;background-color:#fdf3e6}}.bot-notificador{{border-color:#9b59b6;background-color:#f5eff7}}h1{{color:#2c3e50;text-align:center}}h2{{color:#34495e;border-bottom:2px solid #eee;padding-bottom:5px}}pre{{background-color:#ecf0f1;padding:10px;border-radius:4px;white-space:pre-wrap;word-wrap:break-word;font-size:.9em}}.timestamp{{font-size:.8em;color:#7f8c8d;float:right}}.character{{font-weight:700;font-size:1.2em;margin-right:10px}}.sonic{{color:#007bff}}.tails{{color:#ffaa00}}.knuckles{{color:#d90000}}.eggman{{color:#c0c0c0}}</style></head>
-    <body><div class="container"><h1><span class="eggman">🤖</span> Reporte de Flujo del Evento: {event_id} <span class="eggman">🚨</span></h1>"""
-    with open(CURRENT_EVENT_HTML_REPORT, "w", encoding="utf-8") as f:
-        f.write(html_content)
-
-def add_to_html_report(bot_name, data_processed, details=""):
-    if not CURRENT_EVENT_HTML_REPORT: return
-    bot_class_map = {"BotMonitor": "bot-monitor", "BotAnalizador": "bot-analizador", "BotEnriquecedor": "bot-enriquecedor", "BotDecisionTactica": "bot-decision-tactica", "BotNotificador": "bot-notificador"}
-    bot_icon_map = {"BotMonitor": "🛰️", "BotAnalizador": "🧠", "BotEnriquecedor": "🗺️", "BotDecisionTactica": "🎯", "BotNotificador": "📡"}
-    bot_class = bot_class_map.get(bot_name, "")
-    bot_icon = bot_icon_map.get(bot_name, "⚙️")
-    timestamp_now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    character_html = "" # Lógica para el character_html...
-    html_content = f"""<div class="bot-step {bot_class}"><span class="timestamp">{timestamp_now}</span><h2>{bot_icon} {bot_name}</h2>{character_html}<p>{details}</p><pre>{json.dumps(data_processed, indent=2, ensure_ascii=False)}</pre></div>"""
-    with open(CURRENT_EVENT_HTML_REPORT, "a", encoding="utf-8") as f:
-        f.write(html_content)
-
-def end_html_report():
-    if not CURRENT_EVENT_HTML_REPORT: return
-    html_content = "</div></body></html>"
-    with open(CURRENT_EVENT_HTML_REPORT, "a", encoding="utf-8") as f:
-        f.write(html_content)
-    logger("System", f"Reporte HTML generado: {CURRENT_EVENT_HTML_REPORT}")
+            self.release(driver, healthy)
+
+    def close(self):
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+def get_webdriver_pool():
+    global WEBDRIVER_POOL
+    with WEBDRIVER_POOL_LOCK:
+        if WEBDRIVER_POOL is None:
+            WEBDRIVER_POOL = WebDriverPool(CONFIG.get("bot_monitor", {}).get("webdriver_pool_size", 2), create_webdriver)
+        return WEBDRIVER_POOL
+
+def close_webdriver_pool():
+    global WEBDRIVER_POOL
+    with WEBDRIVER_POOL_LOCK:
+        if WEBDRIVER_POOL is not None:
+            logger("WebDriver", "Cerrando sesiones de WebDriver...")
+            WEBDRIVER_POOL.close()
+            WEBDRIVER_POOL = None
+
+# --- Reporte del Flujo (diario JSONL, el HTML lo renderiza el dashboard bajo demanda) ---
+def start_report_writer():
+    global REPORT_JOURNAL, REPORT_WRITER
+    cfg_reports = CONFIG.get("reports", {})
+    if cfg_reports.get("enabled", True) and REPORT_WRITER is None:
+        REPORT_JOURNAL = ReportJournal(cfg_reports.get("journal_dir", os.path.join(REPORTS_DIR, "journal")),
+                                       cfg_reports.get("segment_max_bytes", 4 * 1024 * 1024))
+        REPORT_WRITER = BackgroundWriter("ReportWriter", max_pending=1024)
+
+def stop_report_writer():
+    global REPORT_WRITER
+    if REPORT_WRITER is not None:
+        REPORT_WRITER.close()
+        REPORT_WRITER = None
+
+def start_report(event_id):
+    METRICS.iniciar_evento(event_id) # Inicio de la latencia de extremo a extremo
+    if REPORT_WRITER is None: return
+    with REPORTS_LOCK:
+        OPEN_REPORTS[event_id] = []
+
+def add_to_report(bot_name, data_processed, details=""):
+    steps = OPEN_REPORTS.get((data_processed or {}).get("event_id"))
+    if steps is None: return
+    # Se guarda el JSON del evento en este paso: las etapas siguientes lo modifican, y si no cambia
+    # es la misma codificación que luego se envía al dashboard y a los héroes.
+    steps.append((bot_name, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), details, codificar(data_processed)))
+
+def _escribir_reporte(event_id, steps):
+    """Compone la línea del diario con el JSON ya codificado de cada paso, sin volver a serializar los eventos."""
+    pasos = [dumps_compacto({"bot": bot_name, "timestamp": timestamp, "details": details})[:-1] + b',"data":' + data + b"}"
+             for bot_name, timestamp, details, data in steps]
+    REPORT_JOURNAL.append_json(event_id, dumps_compacto({"event_id": event_id})[:-1] + b',"steps":[' + b",".join(pasos) + b"]}")
+
+def end_report(event_id):
+    METRICS.finalizar_evento(event_id)
+    with REPORTS_LOCK:
+        steps = OPEN_REPORTS.pop(event_id, None)
+    if steps is None or REPORT_WRITER is None: return
+    REPORT_WRITER.submit(_escribir_reporte, event_id, steps)
+    logger("System", f"Reporte del evento {event_id} enviado al diario.", "DEBUG")
+
+def flush_open_reports():
+    for event_id in list(OPEN_REPORTS):
+        end_report(event_id)
 
 # --- 🛰️ BotMonitor ---
-def bot_monitor():
-    global EVENT_ID_COUNTER, WEBDRIVER_INSTANCE
-    EVENT_ID_COUNTER += 1
+class ElementTextParser(HTMLParser):
+    """Extrae el texto de los elementos con los ids indicados, sin navegador."""
+    VOID_ELEMENTS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+    def __init__(self, data_ids):
+        super().__init__(convert_charrefs=True)
+        self.data_ids = set(data_ids)
+        self.texts = {}
+        self._open_ids = [] # Pila de elementos abiertos: su id si es uno buscado, si no None
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.VOID_ELEMENTS: return
+        element_id = dict(attrs).get("id")
+        if element_id in self.data_ids:
+            self.texts.setdefault(element_id, [])
+            self._open_ids.append(element_id)
+        else:
+            self._open_ids.append(None)
+
+    def handle_endtag(self, tag):
+        if tag in self.VOID_ELEMENTS: return
+        if self._open_ids:
+            self._open_ids.pop()
+
+    def handle_data(self, data):
+        for element_id in self._open_ids:
+            if element_id:
+                self.texts[element_id].append(data)
+
+def scrape_with_parser(local_html_path, data_ids=MONITOR_DATA_IDS):
+    """Lee un HTML local con html.parser. El resultado se cachea por ruta y mtime: un archivo sin cambios no se re-parsea."""
+    stat = os.stat(local_html_path)
+    with SCRAPE_CACHE_LOCK:
+        cached = SCRAPE_CACHE.get(local_html_path)
+    if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return dict(cached[2])
+
+    parser = ElementTextParser(data_ids)
+    with open(local_html_path, "r", encoding="utf-8") as f:
+        parser.feed(f.read())
+    parser.close()
+    missing_ids = [id_name for id_name in data_ids if id_name not in parser.texts]
+    if missing_ids:
+        raise ValueError(f"Elementos {missing_ids} no encontrados en '{local_html_path}'.")
+    # Igual que WebElement.text: espacios colapsados y sin bordes
+    scraped_data = {id_name: " ".join("".join(parser.texts[id_name]).split()) for id_name in data_ids}
+
+    with SCRAPE_CACHE_LOCK:
+        SCRAPE_CACHE[local_html_path] = (stat.st_mtime_ns, stat.st_size, scraped_data)
+    return dict(scraped_data)
+
+def scrape_with_selenium(local_html_path, data_ids=MONITOR_DATA_IDS):
+    """Carga la fuente en una sesión del pool y espera a que existan los elementos, sin pausas fijas."""
+    cfg_monitor = CONFIG.get("bot_monitor", {})
+    wait_timeout = cfg_monitor.get("selenium_wait_timeout_seconds", 10)
+    with get_webdriver_pool().session(timeout=wait_timeout) as driver:
+        driver.get(f"file:///{local_html_path.replace(os.sep, '/')}")
+        WebDriverWait(driver, wait_timeout).until(
+            lambda d: all(d.find_elements(By.ID, id_name) for id_name in data_ids))
+        return {id_name: driver.find_element(By.ID, id_name).text for id_name in data_ids}
+
+def source_needs_browser(html_file):
+    """'parser' nunca usa navegador, 'selenium' siempre; 'auto' solo para las fuentes que requieren JS."""
+    cfg_monitor = CONFIG.get("bot_monitor", {})
+    scraper_mode = cfg_monitor.get("scraper_mode", "auto")
+    if scraper_mode == "selenium": return True
+    if scraper_mode == "parser": return False
+    return html_file in cfg_monitor.get("js_required_sources", [])
+
+def nuevo_event_id(tipo, event_number, session_id=SESION_PREDETERMINADA):
+    """EVT-<tipo>-<fecha>-<n>; en las sesiones no predeterminadas incluye el id de sesión."""
+    sesion = "" if session_id == SESION_PREDETERMINADA else f"{session_id}-"
+    return f"EVT-{tipo}-{sesion}{datetime.now().strftime('%Y%m%d%H%M%S')}-{event_number:04d}"
+
+def scrape_source_event(html_file, event_number, session_id=SESION_PREDETERMINADA) -> Optional[Evento]:
+    """Extrae una fuente HTML local y la convierte en la salida del monitor (None si falla)."""
+    bot_name = "BotMonitor"
+    use_browser = source_needs_browser(html_file)
+    scraper_label = f"Selenium ({CONFIG.get('bot_monitor', {}).get('browser', 'edge').capitalize()})" if use_browser else "Parser HTML"
+    logger(bot_name, f"{scraper_label}: Fuente HTML para scraping: '{html_file}'")
+    try:
+        local_html_path = os.path.abspath(html_file)
+        if not os.path.exists(local_html_path):
+            raise FileNotFoundError(f"Archivo HTML '{local_html_path}' no encontrado.")
+        scraped_data = scrape_with_selenium(local_html_path) if use_browser else scrape_with_parser(local_html_path)
+    except Exception as e:
+        logger(bot_name, f"Error con {scraper_label} en '{html_file}': {type(e).__name__} - {e}", "ERROR")
+        return None
+
+    try: 
+        scraped_data["value"] = float(scraped_data["value"]) if '.' in scraped_data["value"] else int(scraped_data["value"])
+    except ValueError: pass # Dejar como string si no se puede convertir
+
+    logger(bot_name, f"Datos {scraper_label} de '{html_file}': {scraped_data['descripcion']}")
+    tag_prefix = "WEB_SELENIUM" if use_browser else "WEB_HTML"
+    source_type_tag = f"{tag_prefix}_{CONFIG.get('bot_monitor', {}).get('browser', 'edge').upper()}_GENERIC" if use_browser else f"{tag_prefix}_GENERIC"
+    if "angel_island" in html_file.lower(): source_type_tag = f"{tag_prefix}_ANGEL_ISLAND"
+    elif "tails" in html_file.lower(): source_type_tag = f"{tag_prefix}_TAILS_REPORT"
+
+    return EventoMonitor(
+        event_id=nuevo_event_id("SEL", event_number, session_id), session_id=session_id,
+        timestamp_raw=datetime.now().isoformat(),
+        source_system=f"Fuente Web: {html_file} (Scraped)",
+        source_type_tag=source_type_tag,
+        detected_location_raw=scraped_data["ubicacion"],
+        threat_level_raw=scraped_data["nivel"].lower(),
+        description_raw=scraped_data["descripcion"],
+        raw_payload={**{k: v for k, v in scraped_data.items() if k not in ["descripcion", "nivel", "ubicacion"]}, "html_source_file": html_file})
+
+RANDOM_EVENT_SOURCES = [
+    {"name": "Sensor Tails", "type": "SENSOR_TAILS", "locations": ["Tails' Workshop", "Mystic Ruins"]},
+    {"name": "Radar G.U.N.", "type": "RADAR_GUN", "locations": ["Station Square", "G.U.N. HQ"]},
+]
+THREAT_LEVELS = ("bajo", "medio", "alto", "critico")
+
+def generar_evento_aleatorio(event_number, session_id=SESION_PREDETERMINADA) -> Evento:
+    selected_source = random.choice(RANDOM_EVENT_SOURCES)
+    location = random.choice(selected_source.get("locations", list(KNOWLEDGE_BASE.keys())))
+    
+    return EventoMonitor(
+        event_id=nuevo_event_id("RND", event_number, session_id), session_id=session_id,
+        timestamp_raw=datetime.now().isoformat(), source_system=selected_source["name"],
+        source_type_tag=selected_source["type"], detected_location_raw=location,
+        threat_level_raw=random.choice(THREAT_LEVELS),
+        description_raw=f"Actividad detectada en {location}", raw_payload={})
+
+@METRICS.medir("etapa_latencia_ms", etapa="BotMonitor")
+def bot_monitor_lote(sesion=None, html_sources=None) -> List[Evento]:
+    """Extrae en paralelo las fuentes indicadas (por defecto todas las configuradas), un evento por fuente que se lea bien."""
+    sesion = sesion or obtener_sesion()
+    bot_name = "BotMonitor"
+    cfg_monitor = CONFIG.get("bot_monitor", {})
+    html_sources = html_sources or cfg_monitor.get("selenium_html_sources", []) or ["fuente_de_datos_simulada.html"]
+    logger(bot_name, f"Iniciando monitoreo de {len(html_sources)} fuentes en paralelo...")
+
+    event_numbers = [sesion.siguiente_evento() for _ in html_sources]
+    with ThreadPoolExecutor(max_workers=max(1, cfg_monitor.get("webdriver_pool_size", 2)), thread_name_prefix="Scraper") as executor:
+        results = list(executor.map(scrape_source_event, html_sources, event_numbers, [sesion.session_id] * len(html_sources)))
+
+    monitor_outputs = [monitor_output for monitor_output in results if monitor_output]
+    for monitor_output in monitor_outputs:
+        start_report(monitor_output['event_id'])
+        add_to_report(bot_name, monitor_output, "Datos iniciales capturados.")
+    logger(bot_name, f"Monitoreo completado. {len(monitor_outputs)}/{len(html_sources)} fuentes leídas.")
+    return monitor_outputs
+
+def modo_cambios():
+    """¿BotMonitor genera eventos solo cuando cambian las fuentes (ingestion_mode "cambios")?"""
+    cfg_monitor = CONFIG.get("bot_monitor", {})
+    return bool(cfg_monitor.get("use_selenium_source", False)) and cfg_monitor.get("ingestion_mode", "aleatorio") == "cambios"
+
+def vigilante_de(sesion):
+    """Vigilante de las fuentes de la sesión: cada partida tiene el suyo y ve cada cambio una vez."""
+    with sesion.lock:
+        if sesion.vigilante is None:
+            cfg_monitor = CONFIG.get("bot_monitor", {})
+            sesion.vigilante = VigilanteFuentes(
+                cfg_monitor.get("selenium_html_sources", []) or ["fuente_de_datos_simulada.html"],
+                poll_interval_seconds=cfg_monitor.get("watch_poll_interval_seconds", 1.0),
+                hash_check=cfg_monitor.get("watch_hash_check", True),
+                emitir_al_iniciar=cfg_monitor.get("watch_emit_on_start", True))
+        return sesion.vigilante
+
+def bot_monitor_cambios(sesion, cambios) -> List[Evento]:
+    """Extrae en paralelo solo las fuentes que cambiaron ([(fuente, mtime_ns)] de VigilanteFuentes)."""
+    ahora = time.time()
+    for _, mtime_ns in cambios: # Frescura: desde que se escribió la fuente hasta que se lee
+        if mtime_ns is not None:
+            METRICS.observar("monitor_frescura_ms", max(0.0, ahora - mtime_ns / 1e9) * 1000)
+    METRICS.incrementar("monitor_fuentes_cambiadas_total", len(cambios))
+    logger("BotMonitor", f"{sesion.etiqueta()}Fuentes con cambios: {', '.join(fuente for fuente, _ in cambios)}")
+    return bot_monitor_lote(sesion, [fuente for fuente, _ in cambios])
+
+@METRICS.medir("etapa_latencia_ms", etapa="BotMonitor")
+def bot_monitor(sesion=None) -> Evento:
+    sesion = sesion or obtener_sesion()
+    event_number = sesion.siguiente_evento()
     bot_name = "BotMonitor"
     logger(bot_name, "Iniciando monitoreo...")
-    monitor_output = {}
+    monitor_output = None
     cfg_monitor = CONFIG.get("bot_monitor", {})
-    use_selenium = cfg_monitor.get("use_selenium_source", False)
-    selenium_data_extracted = False
-
-    if use_selenium:
-        driver = init_webdriver() 
-        if driver is None:
-            logger(bot_name, "Fallo al obtener instancia de WebDriver. Saltando Selenium.", "ERROR")
-            use_selenium = False 
-        else:
-            selenium_html_sources = cfg_monitor.get("selenium_html_sources", ["fuente_de_datos_simulada.html"])
-            if not selenium_html_sources: 
-                selenium_html_sources = ["fuente_de_datos_simulada.html"]
-            
-            selected_html_file = random.choice(selenium_html_sources)
-            logger(bot_name, f"Selenium: Fuente HTML para scraping: '{selected_html_file}'")
-            
-            try:
-                local_html_path = os.path.abspath(selected_html_file)
-                if not os.path.exists(local_html_path):
-                    raise FileNotFoundError(f"Archivo HTML '{local_html_path}' no encontrado.")
-
-                driver.get(f"file:///{local_html_path.replace(os.sep, '/')}")
-                time.sleep(cfg_monitor.get("selenium_view_time_seconds", 3))
-
-                data_ids = ["descripcion", "nivel", "ubicacion", "device_id", "reading_type", "value"]
-                scraped_data = {id_name: driver.find_element(By.ID, id_name).text for id_name in data_ids}
-                
-                try: 
-                    scraped_data["value"] = float(scraped_data["value"]) if '.' in scraped_data["value"] else int(scraped_data["value"])
-                except ValueError: pass # Dejar como string si no se puede convertir
-
-                logger(bot_name, f"Datos Selenium (Edge) de '{selected_html_file}': {scraped_data['descripcion']}")
-                source_type_tag_sel = "WEB_SELENIUM_EDGE_GENERIC"
-                if "angel_island" in selected_html_file.lower(): source_type_tag_sel = "WEB_SELENIUM_ANGEL_ISLAND"
-                elif "tails" in selected_html_file.lower(): source_type_tag_sel = "WEB_SELENIUM_TAILS_REPORT"
-                
-                monitor_output = {
-                    "event_id": f"EVT-SEL-{datetime.now().strftime('%Y%m%d%H%M%S')}-{EVENT_ID_COUNTER:04d}",
-                    "timestamp_raw": datetime.now().isoformat(), 
-                    "source_system": f"Fuente Web: {selected_html_file} (Scraped)", 
-                    "source_type_tag": source_type_tag_sel, 
-                    "detected_location_raw": scraped_data["ubicacion"],
-                    "threat_level_raw": scraped_data["nivel"].lower(), 
-                    "description_raw": scraped_data["descripcion"],
-                    "raw_payload": {k: v for k, v in scraped_data.items() if k not in ["descripcion", "nivel", "ubicacion"]}
-                }
-                monitor_output["raw_payload"]["html_source_file"] = selected_html_file
-                selenium_data_extracted = True
-                
-                cfg_dashboard = CONFIG.get("dashboard_tactico", {})
-                dashboard_main_url = cfg_dashboard.get("url", "http://127.0.0.1:5005").rstrip('/') + "/"
-                driver.get(dashboard_main_url)
-
-            except Exception as e: 
-                logger(bot_name, f"Error con Selenium (Edge) en '{selected_html_file}': {type(e).__name__} - {e}", "ERROR")
-                if isinstance(e, WebDriverException) and ("target window already closed" in str(e).lower() or "no such window" in str(e).lower()):
-                    close_webdriver()
-
-    if not use_selenium or not selenium_data_extracted: 
-        if use_selenium and not selenium_data_extracted: logger(bot_name, "Fallo en Selenium, usando generación aleatoria.")
-        else: logger(bot_name, "Usando generación aleatoria (Selenium no activo).")
-        
-        sources_config = [
-            {"name": "Sensor Tails", "type": "SENSOR_TAILS", "locations": ["Tails' Workshop", "Mystic Ruins"]},
-            {"name": "Radar G.U.N.", "type": "RADAR_GUN", "locations": ["Station Square", "G.U.N. HQ"]},
-        ]
-        selected_source = random.choice(sources_config)
-        location = random.choice(selected_source.get("locations", list(KNOWLEDGE_BASE.keys())))
-        
-        monitor_output = {
-            "event_id": f"EVT-RND-{datetime.now().strftime('%Y%m%d%H%M%S')}-{EVENT_ID_COUNTER:04d}",
-            "timestamp_raw": datetime.now().isoformat(), "source_system": selected_source["name"],
-            "source_type_tag": selected_source["type"], "detected_location_raw": location,
-            "threat_level_raw": random.choice(["bajo", "medio", "alto", "critico"]), 
-            "description_raw": f"Actividad detectada en {location}", "raw_payload": {}
-        }
-
-    if not monitor_output: # Fallback
-        monitor_output = {"event_id": f"EVT-FAIL-{datetime.now().strftime('%Y%m%d%H%M%S')}-{EVENT_ID_COUNTER:04d}"} # ... (otros campos por defecto)
-
-    start_html_report(monitor_output['event_id'])
-    add_to_html_report(bot_name, monitor_output, "Datos iniciales capturados/generados.")
-    write_json_data("monitor_output.json", monitor_output)
+    use_web_sources = cfg_monitor.get("use_selenium_source", False)
+
+    if use_web_sources:
+        selenium_html_sources = cfg_monitor.get("selenium_html_sources", ["fuente_de_datos_simulada.html"])
+        if not selenium_html_sources: 
+            selenium_html_sources = ["fuente_de_datos_simulada.html"]
+        monitor_output = scrape_source_event(random.choice(selenium_html_sources), event_number, sesion.session_id)
+
+    if not monitor_output: 
+        if use_web_sources: logger(bot_name, "Fallo en el scraping, usando generación aleatoria.")
+        else: logger(bot_name, "Usando generación aleatoria (fuentes web no activas).")
+        monitor_output = generar_evento_aleatorio(event_number, sesion.session_id)
+
+    start_report(monitor_output['event_id'])
+    add_to_report(bot_name, monitor_output, "Datos iniciales capturados/generados.")
+    snapshot_stage("monitor_output.json", monitor_output)
     logger(bot_name, "Monitoreo completado.")
     return monitor_output
 
 # --- BotAnalizador ---
-def bot_analizador():
+@METRICS.medir("etapa_latencia_ms", etapa="BotAnalizador")
+def bot_analizador(monitor_data: Evento) -> Optional[Evento]:
     bot_name = "BotAnalizador"
     logger(bot_name, "Iniciando análisis...")
-    monitor_data = read_json_data("monitor_output.json")
     if not monitor_data:
         logger(bot_name, "No hay datos del monitor. Abortando.", "ERROR"); return None
     
-    canonical_data = {
-        "event_id": monitor_data["event_id"], "timestamp_event": monitor_data["timestamp_raw"],
-        "source_system_name": monitor_data["source_system"], "source_type": monitor_data["source_type_tag"],
-        "location_reported": monitor_data["detected_location_raw"],
-        "threat_assessment": {"initial_level": monitor_data["threat_level_raw"].lower(), "description": monitor_data["description_raw"]},
-        "original_raw_data": monitor_data.get("raw_payload", {})
-    }
     level_scores = {"critico": 10, "alto": 7, "medio": 5, "bajo": 2}
-    canonical_data["threat_assessment"]["priority_score"] = level_scores.get(canonical_data["threat_assessment"]["initial_level"], 0)
+    initial_level = monitor_data["threat_level_raw"].lower()
+    canonical_data = EventoCanonico(
+        event_id=monitor_data["event_id"], session_id=monitor_data.get("session_id", SESION_PREDETERMINADA),
+        timestamp_event=monitor_data["timestamp_raw"],
+        source_system_name=monitor_data["source_system"], source_type=monitor_data["source_type_tag"],
+        location_reported=monitor_data["detected_location_raw"],
+        threat_assessment={"initial_level": initial_level, "description": monitor_data["description_raw"],
+                           "priority_score": level_scores.get(initial_level, 0)},
+        original_raw_data=monitor_data.get("raw_payload", {}))
     
-    add_to_html_report(bot_name, canonical_data, "Datos normalizados y priorizados.")
-    write_json_data("analysis_output.json", canonical_data)
+    add_to_report(bot_name, canonical_data, "Datos normalizados y priorizados.")
+    snapshot_stage("analysis_output.json", canonical_data)
     logger(bot_name, "Análisis completado.")
     return canonical_data
 
+# --- BotDeduplicador ---
+@METRICS.medir("etapa_latencia_ms", etapa="BotDeduplicador")
+def bot_deduplicador(canonical_data: Evento) -> Optional[Evento]:
+    """Deja pasar la primera aparición de cada alerta; las repeticiones se suman a la original y no siguen."""
+    bot_name = "BotDeduplicador"
+    if not canonical_data or DEDUPLICADOR is None:
+        return canonical_data
+    es_nuevo, agregado = DEDUPLICADOR.registrar(canonical_data)
+    METRICS.incrementar("dedup_eventos_total", resultado="nuevo" if es_nuevo else "duplicado")
+    if es_nuevo:
+        canonical_data["agregado"] = agregado # Dict compartido: las repeticiones posteriores actualizan el contador
+        return canonical_data
+    logger(bot_name, f"'{canonical_data['event_id']}' repite la alerta '{agregado['event_id_original']}' "
+                     f"({agregado['ocurrencias']} ocurrencias). Suprimido.")
+    add_to_report(bot_name, {"event_id": canonical_data["event_id"], "huella": agregado["huella"], "event_id_original": agregado["event_id_original"],
+                             "ocurrencias": agregado["ocurrencias"]}, "Alerta repetida: agregada a la original.")
+    return None
+
 # --- BotEnriquecedor ---
-def bot_enriquecedor():
+@METRICS.medir("etapa_latencia_ms", etapa="BotEnriquecedor")
+def bot_enriquecedor(canonical_data: Evento) -> Optional[Evento]:
     bot_name = "BotEnriquecedor"
     logger(bot_name, "Iniciando enriquecimiento...")
-    canonical_data = read_json_data("analysis_output.json")
     if not canonical_data:
         logger(bot_name, "No hay datos canónicos. Abortando.", "ERROR"); return None
 
-    enriched_data = canonical_data.copy()
+    enriched_data = EventoEnriquecido.desde(canonical_data) # Comparte los campos del canónico, sin copiarlos
     location_key = enriched_data["location_reported"]
     default_loc_info = KNOWLEDGE_BASE.get("Unknown Location", {"zone_name": "Unknown Location", "css_class": "zone-unknown"})
-    location_info = KNOWLEDGE_BASE.get(location_key, default_loc_info)
+    resolved_key, match_type = LOCATION_INDEX.resolver(location_key)
+    location_info = KNOWLEDGE_BASE.get(resolved_key, default_loc_info)
+    if match_type and match_type != "exacta":
+        logger(bot_name, f"Ubicación '{location_key}' resuelta como '{resolved_key}' (coincidencia {match_type}).")
+    elif resolved_key is None:
+        logger(bot_name, f"Ubicación '{location_key}' no reconocida en la base de conocimiento.", "WARN")
     
     enriched_data["location_details"] = {
         "zone_name": location_info.get("zone_name", location_key),
@@ -355,98 +849,239 @@ def bot_enriquecedor():
     urgency_levels = {10: "MAXIMA_URGENCIA", 7: "ALTA_URGENCIA", 5: "URGENCIA_MEDIA"}
     enriched_data["urgency_level"] = urgency_levels.get(priority_score, "URGENCIA_BAJA")
 
-    add_to_html_report(bot_name, enriched_data, "Datos contextualizados y enriquecidos.")
-    write_json_data("enriched_output.json", enriched_data)
+    add_to_report(bot_name, enriched_data, "Datos contextualizados y enriquecidos.")
+    snapshot_stage("enriched_output.json", enriched_data)
     logger(bot_name, "Enriquecimiento completado.")
     return enriched_data
 
-# --- Función para actualizar el estado del juego ---
+# --- Estado del juego por sesión ---
+class SesionJuego:
+    """Estado de una partida: HP de Eggman, pánico global y contador de eventos de la sesión."""
+
+    def __init__(self, session_id=SESION_PREDETERMINADA):
+        self.session_id = session_id
+        self.lock = threading.RLock()
+        self.event_counter = 0
+        self.vigilante = None # VigilanteFuentes, solo en ingestion_mode "cambios"
+        self.admision = None # ControlAdmision de las alertas que esperan al jugador
+        self.reiniciar()
+
+    def reiniciar(self):
+        game_state_config = CONFIG.get("game_state", {})
+        with self.lock:
+            self.eggman_hp = game_state_config.get("initial_eggman_hp", 100)
+            self.global_panic = game_state_config.get("initial_global_panic", 0)
+
+    def siguiente_evento(self):
+        with self.lock:
+            self.event_counter += 1
+            return self.event_counter
+
+    def estado(self):
+        with self.lock:
+            return {"eggman_hp": self.eggman_hp, "global_panic": self.global_panic}
+
+    def etiqueta(self):
+        """Prefijo de los logs del BotMaestro ("" en la sesión predeterminada)."""
+        return "" if self.session_id == SESION_PREDETERMINADA else f"[{self.session_id}] "
+
+def obtener_sesion(session_id=SESION_PREDETERMINADA):
+    with SESSIONS_LOCK:
+        sesion = SESSIONS.get(session_id)
+        if sesion is None:
+            sesion = SESSIONS[session_id] = SesionJuego(session_id)
+        return sesion
+
+def sesion_de(evento):
+    return obtener_sesion((evento or {}).get("session_id", SESION_PREDETERMINADA))
+
+def dashboard_url(endpoint, session_id=SESION_PREDETERMINADA):
+    """URL de un endpoint del dashboard para la sesión ("" si falta la URL o el endpoint)."""
+    base_url = CONFIG.get("dashboard_tactico", {}).get("url", "").rstrip("/")
+    if not base_url or not endpoint:
+        return ""
+    return f"{base_url}{ruta_sesion(session_id)}{endpoint}"
+
+DECISION_POR_CARGA = "Descartada por carga"
+
+def tipo_de_decision(decision_type):
+    """Quién tomó la decisión: "jugador", "timeout", "error" (sin respuesta del dashboard) o "carga" (control de admisión)."""
+    if decision_type.startswith(DECISION_POR_CARGA):
+        return "carga"
+    if "Error de conexión" in decision_type:
+        return "error"
+    if decision_type.startswith("Automática"):
+        return "timeout"
+    return "jugador"
+
+def efecto_de_decision(threat_level, decision_type, target_destinations, nearby_heroes):
+    """(daño a Eggman, cambio de pánico) de una decisión según las tablas de CONFIG["game_balance"]."""
+    balance = CONFIG.get("game_balance", {})
+    por_nivel = lambda tabla: tabla.get(threat_level, tabla.get("bajo", 0)) # Nivel desconocido: como "bajo"
+
+    tipo = tipo_de_decision(decision_type)
+    if tipo == "carga": # Tabla propia si existe; sin ella, el mismo pánico que un timeout
+        return 0, por_nivel(balance.get("load_shed_panic", balance["timeout_panic"]))
+    if tipo in ("timeout", "error"):
+        return 0, por_nivel(balance["timeout_panic"])
+    heroes_sent = {h for h in target_destinations if h != "LogDB"}
+    if not heroes_sent: # Solo registrar
+        return balance["register_only"]["damage"], balance["register_only"]["panic"]
+    # Óptima si todos los héroes enviados están cerca de la zona; si no, sub-óptima
+    respuesta = balance["optimal"] if heroes_sent.issubset(nearby_heroes) else balance["suboptimal"]
+    return por_nivel(respuesta["damage"]), respuesta["panic"]
+
 def actualizar_estado_juego(enriched_data, routing_data):
-    global EGGMAN_HP, GLOBAL_PANIC
     bot_name = "GameStateManager"
-    damage_to_eggman = 0
-    panic_change = 0
+    sesion = sesion_de(enriched_data)
+    damage_to_eggman, panic_change = efecto_de_decision(
+        enriched_data.get("threat_assessment", {}).get("initial_level", "bajo"),
+        routing_data.get("decision_type", ""),
+        routing_data.get("target_destinations", []),
+        enriched_data.get("location_details", {}).get("known_nearby_heroes", []))
+    METRICS.incrementar("decisiones_total", tipo=tipo_de_decision(routing_data.get("decision_type", "")), sesion=sesion.session_id)
+    with sesion.lock:
+        sesion.eggman_hp = max(0, sesion.eggman_hp - damage_to_eggman)
+        sesion.global_panic = max(0, min(100, sesion.global_panic + panic_change))
+        eggman_hp, global_panic = sesion.eggman_hp, sesion.global_panic
 
-    threat_level = enriched_data.get("threat_assessment", {}).get("initial_level", "bajo")
-    decision_type = routing_data.get("decision_type", "")
-    
-    is_timeout = "Automática (Timeout)" in decision_type or "Error de conexión" in decision_type
-
-    if is_timeout:
-        damage_to_eggman = 0
-        panic_change = {"critico": 15, "alto": 8, "medio": 4, "bajo": 2}.get(threat_level, 2)
-    else: # Decisión del usuario
-        heroes_sent = {h for h in routing_data.get("target_destinations", []) if h != "LogDB"}
-        nearby_heroes = set(enriched_data.get("location_details", {}).get("known_nearby_heroes", []))
-        is_optimal_response = heroes_sent and heroes_sent.issubset(nearby_heroes)
-
-        if not heroes_sent: # Solo registrar
-             damage_to_eggman = -2 
-             panic_change = 2
-        elif is_optimal_response:
-            panic_change = -2 
-            damage_to_eggman = {"critico": 20, "alto": 12, "medio": 8, "bajo": 5}.get(threat_level, 5)
-        else: # Respuesta sub-óptima
-            panic_change = 3
-            damage_to_eggman = {"critico": 5, "alto": 3, "medio": 1, "bajo": 0}.get(threat_level, 0)
-            
-    EGGMAN_HP = max(0, EGGMAN_HP - damage_to_eggman)
-    GLOBAL_PANIC = max(0, min(100, GLOBAL_PANIC + panic_change))
+    logger(bot_name, f"{sesion.etiqueta()}Daño a Eggman: {damage_to_eggman}. HP restante: {eggman_hp}", "INFO")
+    logger(bot_name, f"{sesion.etiqueta()}Cambio de Pánico: {panic_change}. Pánico Global actual: {global_panic}", "INFO")
 
-    logger(bot_name, f"Daño a Eggman: {damage_to_eggman}. HP restante: {EGGMAN_HP}", "INFO")
-    logger(bot_name, f"Cambio de Pánico: {panic_change}. Pánico Global actual: {GLOBAL_PANIC}", "INFO")
+def comprobar_fin_de_juego(sesion=None):
+    """Devuelve los datos finales si la partida de la sesión terminó (victoria o derrota), o None si sigue."""
+    sesion = sesion or obtener_sesion()
+    max_panic = CONFIG.get("game_state", {}).get("max_global_panic", 100)
+    with sesion.lock:
+        eggman_hp, global_panic = sesion.eggman_hp, sesion.global_panic
+    if eggman_hp <= 0:
+        logger("BotMaestro", f"{sesion.etiqueta()}¡VICTORIA! HP Eggman a 0.", "INFO")
+        return {"game_status": "VICTORY", "final_hp": eggman_hp, "final_panic": global_panic}
+    if global_panic >= max_panic:
+        logger("BotMaestro", f"{sesion.etiqueta()}¡DERROTA! Pánico global al máximo.", "CRITICAL")
+        return {"game_status": "DEFEAT", "final_hp": eggman_hp, "final_panic": global_panic}
+    return None
 
 # --- 🎯 BotDecisionTactica ---
-def solicitar_decision_tactica_dashboard():
-    global EGGMAN_HP, GLOBAL_PANIC # Asegurarse de que accedemos a las globales correctas
+@METRICS.medir("etapa_latencia_ms", etapa="BotDecisionTactica")
+def solicitar_decision_tactica_dashboard(enriched_data: Evento) -> Optional[Evento]:
     bot_name = "BotDecisionTactica"
     logger(bot_name, "Iniciando proceso de decisión táctica con Dashboard...")
-    enriched_data = read_json_data("enriched_output.json") 
     if not enriched_data:
         logger(bot_name, "No hay datos enriquecidos para decisión.", "ERROR"); return None
     
-    enriched_data['game_state'] = {'eggman_hp': EGGMAN_HP, 'global_panic': GLOBAL_PANIC}
+    sesion = sesion_de(enriched_data)
+    enriched_data['game_state'] = sesion.estado()
     
     event_id = enriched_data.get("event_id")
     if not event_id: return None # Ya logueado si falta event_id
 
     cfg_dashboard = CONFIG.get("dashboard_tactico", {})
-    full_submit_url = f"{cfg_dashboard.get('url', '').rstrip('/')}{cfg_dashboard.get('submit_alert_endpoint', '')}"
+    full_submit_url = dashboard_url(cfg_dashboard.get('submit_alert_endpoint', ''), sesion.session_id)
     
     try:
-        response = requests.post(full_submit_url, json=enriched_data, timeout=5) 
+        response = requests.post(full_submit_url, data=codificar(enriched_data), headers=JSON_HEADERS, timeout=5) 
         response.raise_for_status()
         logger(bot_name, f"Alerta '{event_id}' enviada al dashboard. Esperando decisión...")
     except requests.exceptions.RequestException as e:
         logger(bot_name, f"Error enviando alerta al dashboard: {e}. Decisión automática.", "ERROR")
         return tomar_decision_automatica_por_timeout(event_id, enriched_data, "Error de conexión con Dashboard")
 
-    start_time = datetime.now()
-    decision_file_name = f"decision_{event_id}.json"
+    # Long-poll: el dashboard retiene la petición hasta que el jugador decide o su rueda de plazos vence el plazo.
+    # El plazo lo fija el dashboard (lo devuelve al publicar la alerta); aquí solo se acota la espera HTTP.
     timeout_seconds = cfg_dashboard.get("decision_timeout_seconds", 30)
-    poll_interval = cfg_dashboard.get("decision_poll_interval_seconds", 1)
-    
+    try:
+        deadline = response.json().get("deadline")
+    except ValueError:
+        deadline = None
+    if deadline:
+        timeout_seconds = max(0.0, deadline - time.time())
+    full_await_url = f"{dashboard_url(cfg_dashboard.get('await_decision_endpoint', '/await_decision'), sesion.session_id)}/{event_id}"
     user_decision_data = None
-    while (datetime.now() - start_time).total_seconds() < timeout_seconds:
-        user_decision_from_file = read_json_data(decision_file_name, directory=DASHBOARD_DATA_DIR)
-        if user_decision_from_file and user_decision_from_file.get("event_id") == event_id:
-            user_decision_data = user_decision_from_file
-            try: os.remove(os.path.join(DASHBOARD_DATA_DIR, decision_file_name))
-            except OSError as e_rem: logger(bot_name, f"Error eliminando archivo decisión: {e_rem}", "WARN")
-            break 
-        time.sleep(poll_interval)
+    timeout_reason = "Timeout"
+    wait_result = "timeout"
+    wait_start = time.perf_counter()
+    try:
+        response = requests.get(full_await_url, timeout=timeout_seconds + 5)
+        response.raise_for_status()
+        await_result = response.json()
+        if await_result.get("status") == "decided":
+            user_decision_data = await_result.get("decision")
+            wait_result = "usuario"
+    except (requests.exceptions.RequestException, ValueError) as e:
+        logger(bot_name, f"Error esperando decisión del dashboard: {e}. Decisión automática.", "ERROR")
+        timeout_reason = "Error de conexión con Dashboard"
+        wait_result = "error"
+    METRICS.observar("decision_espera_ms", (time.perf_counter() - wait_start) * 1000, resultado=wait_result)
+
+    if not user_decision_data and DECISION_REGISTRY is not None:
+        # Reclamar el timeout en el registro compartido: si el jugador se adelantó, su decisión no se pierde.
+        claimed, registered_decision = DECISION_REGISTRY.reclamar(clave_decision(sesion.session_id, event_id), {"event_id": event_id, "decision_type": "timeout_auto"})
+        if not claimed and registered_decision.get("decision_type") != "timeout_auto":
+            logger(bot_name, f"Decisión del jugador para '{event_id}' recuperada del registro de decisiones.")
+            user_decision_data = registered_decision
 
     if user_decision_data:
-        routing_data = {"event_id": event_id, **user_decision_data, "alert_payload_to_send": enriched_data, "decision_type": f"Usuario: {user_decision_data.get('user_decision', 'N/A')}"}
+        routing_data = Enrutamiento(event_id=event_id, target_destinations=user_decision_data.get("target_destinations"),
+                                    user_decision=user_decision_data.get("user_decision"), alert_payload_to_send=enriched_data,
+                                    decision_type=f"Usuario: {user_decision_data.get('user_decision', 'N/A')}")
     else:
         logger(bot_name, f"Timeout para '{event_id}'. Decisión automática.")
-        write_json_data(f"auto_decision_{event_id}.json", {"event_id": event_id, "decision_type": "timeout_auto"}, directory=DASHBOARD_DATA_DIR)
-        routing_data = tomar_decision_automatica_por_timeout(event_id, enriched_data, "Timeout")
+        routing_data = tomar_decision_automatica_por_timeout(event_id, enriched_data, timeout_reason)
     
-    add_to_html_report(bot_name, routing_data, f"Decisión táctica ({routing_data.get('decision_type', '')}).")
-    write_json_data("routing_output.json", routing_data)
+    add_to_report(bot_name, routing_data, f"Decisión táctica ({routing_data.get('decision_type', '')}).")
+    snapshot_stage("routing_output.json", routing_data)
     return routing_data
 
+def control_admision_de(sesion):
+    """Control de admisión de la sesión: cada partida tiene un jugador y su propia capacidad de decisión."""
+    with sesion.lock:
+        if sesion.admision is None:
+            cfg_admision = CONFIG.get("control_admision", {})
+            sesion.admision = ControlAdmision(
+                max_backlog=cfg_admision.get("max_backlog", 3),
+                max_wait_seconds=cfg_admision.get("max_wait_seconds", 120),
+                shed_max_priority_score=cfg_admision.get("shed_max_priority_score", 5),
+                segundos_por_decision=CONFIG.get("dashboard_tactico", {}).get("decision_timeout_seconds", 30))
+            METRICS.registrar_gauge("admision_alertas_esperando", lambda: sesion.admision.pendientes, sesion=sesion.session_id)
+            METRICS.registrar_gauge("admision_espera_prevista_s", sesion.admision.espera_prevista, sesion=sesion.session_id)
+        return sesion.admision
+
+def decidir_con_admision(enriched_data: Evento, solicitar=None) -> Optional[Evento]:
+    """Decisión táctica tras el control de admisión: con el jugador saturado, las alertas de baja prioridad se resuelven solas.
+
+    solicitar es quien decide las alertas admitidas (por defecto, el jugador a través del dashboard).
+    """
+    solicitar = solicitar or solicitar_decision_tactica_dashboard
+    if not enriched_data or not CONFIG.get("control_admision", {}).get("enabled", True):
+        return solicitar(enriched_data)
+    bot_name = "BotAdmision"
+    sesion = sesion_de(enriched_data)
+    control = control_admision_de(sesion)
+    amenaza = enriched_data.get("threat_assessment", {})
+    nivel = amenaza.get("initial_level", "bajo")
+    if not control.admitir(amenaza.get("priority_score", 0), nivel):
+        METRICS.incrementar("admision_eventos_total", resultado="descartado", nivel=nivel)
+        logger(bot_name, f"{sesion.etiqueta()}Jugador saturado ({control.pendientes} alertas esperando decisión). "
+                         f"'{enriched_data.get('event_id')}' ({nivel}) se resuelve automáticamente.", "WARN")
+        routing_data = tomar_decision_automatica_por_timeout(enriched_data.get("event_id"), enriched_data, "Carga")
+        routing_data["decision_type"] = f"{DECISION_POR_CARGA} (automática)" # Mismo enrutamiento que un timeout, distinto efecto
+        add_to_report(bot_name, routing_data, "Descartada por carga: decisión automática.")
+        return routing_data
+    METRICS.incrementar("admision_eventos_total", resultado="admitido", nivel=nivel)
+    inicio = time.monotonic()
+    try:
+        return solicitar(enriched_data)
+    finally:
+        control.decision_completada(time.monotonic() - inicio)
+
+def log_resumen_admision(sesion):
+    if sesion.admision is None:
+        return
+    resumen = sesion.admision.resumen()
+    logger("BotAdmision", f"{sesion.etiqueta()}Admisión: {resumen['admitidas']} alertas al jugador, {resumen['descartadas']} "
+                          f"resueltas automáticamente por carga ({resumen['tasa_descarte']:.0%}) {resumen['descartadas_por_nivel']}.")
+
 def tomar_decision_automatica_por_timeout(event_id, enriched_data, reason="Timeout"):
     bot_name = "BotDecisionTactica"
     logger(bot_name, f"Tomando decisión AUTOMÁTICA para '{event_id}' por: {reason}")
@@ -464,140 +1099,490 @@ def tomar_decision_automatica_por_timeout(event_id, enriched_data, reason="Timeo
         elif nearby_heroes: destinations.add(nearby_heroes[0])
         else: destinations.add(random.choice(["Sonic", "Tails"]))
         
-    return {
-        "event_id": event_id, "target_destinations": list(destinations),
-        "alert_payload_to_send": enriched_data, "decision_type": f"Automática ({reason})"
-    }
+    return Enrutamiento(event_id=event_id, target_destinations=list(destinations),
+                        alert_payload_to_send=enriched_data, decision_type=f"Automática ({reason})")
 
 # --- BotNotificador ---
-def bot_notificador():
+class CircuitBreaker:
+    """Corta los envíos a un destino tras varios fallos seguidos y lo vuelve a probar pasado un tiempo."""
+
+    def __init__(self, failure_threshold=3, reset_seconds=30):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            # Semiabierto: pasado el tiempo de reset se deja pasar un intento de prueba
+            if time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+    @property
+    def is_open(self):
+        return self.opened_at is not None
+
+def get_notifier_session():
+    """Sesión HTTP compartida (keep-alive) y pool de hilos para el envío concurrente a los destinos."""
+    global NOTIFIER_SESSION, NOTIFIER_EXECUTOR
+    with NOTIFIER_LOCK:
+        if NOTIFIER_SESSION is None:
+            pool_size = CONFIG.get("bot_notificador", {}).get("pool_size", 8)
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            NOTIFIER_SESSION = session
+            NOTIFIER_EXECUTOR = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="Notificador")
+        return NOTIFIER_SESSION, NOTIFIER_EXECUTOR
+
+def close_notifier():
+    global NOTIFIER_SESSION, NOTIFIER_EXECUTOR
+    with NOTIFIER_LOCK:
+        if NOTIFIER_EXECUTOR is not None:
+            NOTIFIER_EXECUTOR.shutdown(wait=False)
+            NOTIFIER_EXECUTOR = None
+        if NOTIFIER_SESSION is not None:
+            NOTIFIER_SESSION.close()
+            NOTIFIER_SESSION = None
+
+def get_circuit_breaker(dest_name):
+    cfg_notifier = CONFIG.get("bot_notificador", {})
+    with NOTIFIER_LOCK:
+        if dest_name not in CIRCUIT_BREAKERS:
+            CIRCUIT_BREAKERS[dest_name] = CircuitBreaker(
+                cfg_notifier.get("circuit_breaker_failure_threshold", 3),
+                cfg_notifier.get("circuit_breaker_reset_seconds", 30))
+        return CIRCUIT_BREAKERS[dest_name]
+
+def enviar_a_destino(session, dest_name, url, body):
+    """Envía la alerta (body: JSON ya codificado) a un destino con plazo propio, reintentos con backoff+jitter y circuit breaker."""
+    cfg_notifier = CONFIG.get("bot_notificador", {})
+    request_timeout = cfg_notifier.get("request_timeout_seconds", 5)
+    deadline = time.monotonic() + cfg_notifier.get("destination_deadline_seconds", request_timeout)
+    max_attempts = 1 + cfg_notifier.get("max_retries", 2)
+    backoff_base = cfg_notifier.get("retry_backoff_base_seconds", 0.2)
+    breaker = get_circuit_breaker(dest_name)
+    start = time.monotonic()
+    result = {"destination": dest_name, "url": url, "status": "failed", "attempts": 0, "error": None}
+
+    for attempt in range(max_attempts):
+        if not breaker.allow():
+            result["status"] = "circuit_open"
+            result["error"] = "Circuito abierto: destino marcado como caído."
+            break
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            result["error"] = result["error"] or "Plazo del destino agotado."
+            break
+        result["attempts"] = attempt + 1
+        try:
+            response = session.post(url, data=body, headers=JSON_HEADERS, timeout=min(request_timeout, remaining))
+            response.raise_for_status()
+            breaker.record_success()
+            result["status"] = "sent"
+            result["error"] = None
+            break
+        except requests.exceptions.RequestException as e:
+            breaker.record_failure()
+            result["error"] = str(e)
+        # Backoff exponencial con jitter completo, sin pasarse del plazo del destino
+        if attempt + 1 < max_attempts:
+            pause = random.uniform(0, backoff_base * (2 ** attempt))
+            if time.monotonic() + pause >= deadline:
+                break
+            time.sleep(pause)
+
+    result["elapsed_ms"] = round((time.monotonic() - start) * 1000, 1)
+    return result
+
+@METRICS.medir("etapa_latencia_ms", etapa="BotNotificador")
+def bot_notificador(routing_data: Evento) -> Optional[Evento]:
     bot_name = "BotNotificador"
-    routing_data = read_json_data("routing_output.json") 
     if not routing_data:
-        logger(bot_name, "No hay datos de ruteo. Abortando.", "ERROR"); return
+        logger(bot_name, "No hay datos de ruteo. Abortando.", "ERROR"); return None
 
     payload_to_send = routing_data.get("alert_payload_to_send", {})
-    if not payload_to_send: return # Ya logueado
+    if not payload_to_send: return None # Ya logueado
 
     cfg_notifier = CONFIG.get("bot_notificador", {})
     endpoint_map = cfg_notifier.get("endpoints", {})
-    sent_count = 0
-    
-    for dest_name in routing_data.get("target_destinations", []):
+    session, executor = get_notifier_session()
+    destinations = routing_data.get("target_destinations", [])
+
+    # Envío concurrente: un destino lento o caído no retrasa a los demás. El cuerpo se codifica una sola vez para todos.
+    body = codificar(payload_to_send)
+    futures = {}
+    delivery_results = {}
+    for dest_name in destinations:
         url = endpoint_map.get(dest_name)
         if url:
-            try:
-                response = requests.post(str(url).strip(), json=payload_to_send, timeout=cfg_notifier.get("request_timeout_seconds", 5))
-                response.raise_for_status() 
-                sent_count += 1
-            except requests.exceptions.RequestException as e:
-                logger(bot_name, f"Error enviando a {dest_name} ({url}): {e}", "ERROR")
-    
-    add_to_html_report(bot_name, routing_data, "Notificaciones enviadas.") # Simplificado
-    logger(bot_name, f"Notificaciones completadas. {sent_count}/{len(routing_data.get('target_destinations',[]))} enviadas.")
+            futures[dest_name] = executor.submit(enviar_a_destino, session, dest_name, str(url).strip(), body)
+        else:
+            delivery_results[dest_name] = {"destination": dest_name, "url": None, "status": "no_endpoint", "attempts": 0, "error": "Destino sin endpoint configurado."}
+
+    for dest_name, future in futures.items():
+        result = future.result()
+        delivery_results[dest_name] = result
+        METRICS.observar("notificador_envio_ms", result["elapsed_ms"], destino=dest_name)
+        if result["status"] != "sent":
+            logger(bot_name, f"Error enviando a {dest_name} ({result['url']}): {result['error']}", "ERROR")
+
+    for dest_name, result in delivery_results.items():
+        METRICS.incrementar("notificador_envios_total", destino=dest_name, estado=result["status"])
+    sent_count = sum(1 for result in delivery_results.values() if result["status"] == "sent")
+    routing_data["delivery_results"] = delivery_results
+    add_to_report(bot_name, routing_data, "Notificaciones enviadas.") # Simplificado
+    logger(bot_name, f"Notificaciones completadas. {sent_count}/{len(destinations)} enviadas.")
+    return routing_data
 
 # --- CICLO PRINCIPAL DE ORQUESTACIÓN ---
-def main_loop():
-    global EGGMAN_HP, GLOBAL_PANIC 
+class EntornoBucle:
+    """Dependencias del bucle principal.
+
+    Por defecto son las del juego real: reloj del sistema, BotMonitor, decisión en el dashboard
+    y notificación HTTP. La simulación (simulacion.py) las sustituye por un reloj virtual y
+    una política de decisión scriptada, sin Selenium ni HTTP.
+    """
+
+    def __init__(self, reloj=None, monitor=None, decidir: Optional[Etapa] = None, notificar: Optional[Etapa] = None,
+                 al_terminar=None, servicios=True, sesion=None):
+        self.sesion = sesion or obtener_sesion()
+        self.reloj = reloj or RELOJ_SISTEMA
+        por_cambios = monitor is None and modo_cambios()
+        self.monitor = monitor or (self._siguiente_cambio if por_cambios else lambda: bot_monitor(self.sesion))
+        self.pausa_entre_ciclos = not por_cambios # En modo "cambios" el ritmo lo marca la espera de cambios
+        self._eventos_pendientes = deque()
+        self.decidir = decidir or decidir_con_admision # En serie nunca espera más de una alerta: la admisión no descarta
+        self.notificar = notificar or bot_notificador
+        self.al_terminar = al_terminar or self._anunciar_fin_de_juego
+        self.servicios = servicios # Escritores en segundo plano, métricas, WebDriver y sesión HTTP
+
+    def _siguiente_cambio(self):
+        """Un evento por llamada; los cambios simultáneos se leen juntos y se procesan uno tras otro."""
+        if not self._eventos_pendientes:
+            cambios = vigilante_de(self.sesion).esperar_cambios()
+            self._eventos_pendientes.extend(bot_monitor_cambios(self.sesion, cambios))
+        return self._eventos_pendientes.popleft() if self._eventos_pendientes else None
+
+    def _anunciar_fin_de_juego(self, final_data):
+        send_game_over_to_dashboard(final_data, self.sesion.session_id)
+        self.reloj.sleep(20)  # Esperar 20 segundos antes de cerrar
+
+def main_loop(entorno=None):
+    """Bucle serie de la partida. Devuelve los datos finales si termina en victoria o derrota."""
+    entorno = entorno or EntornoBucle()
+    reloj = entorno.reloj
+    sesion = entorno.sesion
 
-    logger("BotMaestro", "Hedgehog Alert Processor INICIADO.")
+    logger("BotMaestro", f"{sesion.etiqueta()}Hedgehog Alert Processor INICIADO.")
     
-    game_state_config = CONFIG.get("game_state", {})
-    EGGMAN_HP = game_state_config.get("initial_eggman_hp", 100)
-    GLOBAL_PANIC = game_state_config.get("initial_global_panic", 0)
-    max_panic = game_state_config.get("max_global_panic", 100)
-    logger("BotMaestro", f"Estado inicial: HP Eggman: {EGGMAN_HP}, Pánico: {GLOBAL_PANIC}")
+    sesion.reiniciar()
+    estado = sesion.estado()
+    logger("BotMaestro", f"{sesion.etiqueta()}Estado inicial: HP Eggman: {estado['eggman_hp']}, Pánico: {estado['global_panic']}")
 
     cfg_maestro = CONFIG.get("bot_maestro", {})
     max_cycles = cfg_maestro.get("max_cycles_to_run", 0)
     current_cycle = 0
+    final_data = None
+    if entorno.servicios:
+        start_snapshot_writer()
+        start_report_writer()
+        start_metrics_reporter()
 
     try:
         while True:
             current_cycle += 1
-            global CURRENT_EVENT_HTML_REPORT 
-            CURRENT_EVENT_HTML_REPORT = "" 
-            logger("BotMaestro", f"--- Ciclo #{current_cycle} ---")
+            logger("BotMaestro", f"{sesion.etiqueta()}--- Ciclo #{current_cycle} ---")
             
-            monitor_result = bot_monitor() 
-            if not monitor_result: time.sleep(cfg_maestro.get("process_interval_seconds_max", 7)); continue 
+            monitor_result = entorno.monitor() 
+            if not monitor_result: reloj.sleep(cfg_maestro.get("process_interval_seconds_max", 7)); continue 
             
-            analysis_result = bot_analizador()
-            if not analysis_result: time.sleep(cfg_maestro.get("process_interval_seconds_max", 7)); continue
+            analysis_result = bot_analizador(monitor_result)
+            if not analysis_result: reloj.sleep(cfg_maestro.get("process_interval_seconds_max", 7)); continue
+
+            analysis_result = bot_deduplicador(analysis_result)
+            if not analysis_result: # Alerta repetida: no cuesta decisión ni notificaciones
+                end_report(monitor_result["event_id"])
+                reloj.sleep(cfg_maestro.get("process_interval_seconds_max", 7)); continue
             
-            enriched_result = bot_enriquecedor()
-            if not enriched_result: time.sleep(cfg_maestro.get("process_interval_seconds_max", 7)); continue
+            enriched_result = bot_enriquecedor(analysis_result)
+            if not enriched_result: reloj.sleep(cfg_maestro.get("process_interval_seconds_max", 7)); continue
             
-            decision_data = solicitar_decision_tactica_dashboard() 
+            decision_data = entorno.decidir(enriched_result) 
             if not decision_data: 
-                end_html_report() # Asegurar que el reporte se cierre
-                time.sleep(cfg_maestro.get("process_interval_seconds_max", 7)); continue
+                end_report(enriched_result["event_id"]) # Asegurar que el reporte se cierre
+                reloj.sleep(cfg_maestro.get("process_interval_seconds_max", 7)); continue
             
             if enriched_result and decision_data:
                 actualizar_estado_juego(enriched_result, decision_data)
             
-            bot_notificador() 
-            end_html_report() 
-
-            game_over = False
-            final_data = {}
-
-            if EGGMAN_HP <= 0:
-                logger("BotMaestro", "¡VICTORIA! HP Eggman a 0.", "INFO")
-                final_data = {"game_status": "VICTORY", "final_hp": EGGMAN_HP, "final_panic": GLOBAL_PANIC}
-                #game_over = True
-                send_game_over_to_dashboard(final_data)
-                time.sleep(20)  # Esperar 20 segundos antes de cerrar
-                game_over = True
-            if GLOBAL_PANIC >= max_panic:
-                logger("BotMaestro", "¡DERROTA! Pánico global al máximo.", "CRITICAL")
-                final_data = {"game_status": "DEFEAT", "final_hp": EGGMAN_HP, "final_panic": GLOBAL_PANIC}
-                
-                send_game_over_to_dashboard(final_data)
-                time.sleep(20)  # Esperar 20 segundos antes de cerrar
-                game_over = True
-
-            if game_over:
-                try:
-                    cfg_dashboard = CONFIG.get("dashboard_tactico", {})
-                    full_submit_url = f"{cfg_dashboard.get('url', '').rstrip('/')}{cfg_dashboard.get('submit_alert_endpoint', '')}"
-                    if full_submit_url: # Evitar enviar si la URL es inválida
-                        logger("BotMaestro", f"Enviando estado final del juego a {full_submit_url}...")
-                        requests.post(full_submit_url, json=final_data, timeout=5)
-                except Exception as e:
-                    logger("BotMaestro", f"No se pudo enviar estado final al dashboard: {e}", "ERROR")
+            entorno.notificar(decision_data) 
+            end_report(decision_data["event_id"]) 
+
+            final_data = comprobar_fin_de_juego(sesion)
+            if final_data:
+                entorno.al_terminar(final_data)
                 break 
             
-            logger("BotMaestro", f"--- Ciclo #{current_cycle} COMPLETADO ---")
+            logger("BotMaestro", f"{sesion.etiqueta()}--- Ciclo #{current_cycle} COMPLETADO ---")
             if max_cycles > 0 and current_cycle >= max_cycles:
                 logger("BotMaestro", f"Máximo de ciclos ({max_cycles}) alcanzado. Terminando.")
                 break
             
-            process_interval_seconds = random.randint(
-                cfg_maestro.get("process_interval_seconds_min", 3), 
-                cfg_maestro.get("process_interval_seconds_max", 7)
-            )
-            time.sleep(process_interval_seconds)
+            if entorno.pausa_entre_ciclos:
+                process_interval_seconds = random.randint(
+                    cfg_maestro.get("process_interval_seconds_min", 3), 
+                    cfg_maestro.get("process_interval_seconds_max", 7)
+                )
+                reloj.sleep(process_interval_seconds)
             
     except KeyboardInterrupt:
         logger("BotMaestro", "Interrupción por teclado. Deteniendo...")
     finally:
-        close_webdriver() 
-        if CURRENT_EVENT_HTML_REPORT and os.path.exists(CURRENT_EVENT_HTML_REPORT) and not game_over: # Solo cerrar si no es fin de juego
-            try:
-                with open(CURRENT_EVENT_HTML_REPORT, "r+", encoding="utf-8") as f: 
-                    content = f.read()
-                    if not content.strip().endswith("</html>"):
-                        f.seek(0, os.SEEK_END) 
-                        f.write("\n        </div>\n    </body>\n    </html>\n")
-            except Exception as e_file:
-                logger("BotMaestro", f"Error al intentar cerrar HTML en finally: {e_file}", "ERROR")
-        logger("BotMaestro", "Hedgehog Alert Processor TERMINADO.")
-
-def send_game_over_to_dashboard(final_data):
+        if entorno.servicios: # En main_multisesion los reportes de las demás sesiones siguen abiertos: los vacía main_multisesion
+            close_webdriver_pool() 
+            close_notifier()
+            stop_snapshot_writer()
+            flush_open_reports()
+            stop_report_writer()
+            stop_metrics_reporter()
+        log_resumen_admision(sesion)
+        logger("BotMaestro", f"{sesion.etiqueta()}Hedgehog Alert Processor TERMINADO.")
+    return final_data
+
+# --- ORQUESTACIÓN EN PIPELINE (varios eventos en vuelo) ---
+class InFlightLimiter:
+    """Limita cuántos eventos hay dentro del pipeline a la vez y permite esperar a que se vacíe."""
+
+    def __init__(self, max_in_flight):
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.count = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, stop_event):
+        with self._cond:
+            while self.count >= self.max_in_flight:
+                if stop_event.is_set():
+                    return False
+                self._cond.wait(0.5)
+            self.count += 1
+            return True
+
+    def release(self):
+        with self._cond:
+            self.count -= 1
+            self._cond.notify_all()
+
+    def wait_idle(self, stop_event):
+        with self._cond:
+            while self.count > 0 and not stop_event.is_set():
+                self._cond.wait(0.5)
+
+def _put_until_stopped(target_queue, item, stop_event):
+    """Encola con bloqueo (backpressure) pero sin quedarse colgado si el pipeline se detiene."""
+    while not stop_event.is_set():
+        try:
+            target_queue.put(item, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+def aplicar_decision_y_notificar(routing_data: Evento) -> Optional[Evento]:
+    """Última etapa del pipeline: actualiza el estado del juego y notifica a los destinos."""
+    actualizar_estado_juego(routing_data.get("alert_payload_to_send", {}), routing_data)
+    bot_notificador(routing_data)
+    end_report(routing_data["event_id"])
+    return routing_data
+
+def _pipeline_worker(bot_name, etapa: Etapa, input_queue, output_queue, stop_event, limiter, on_done=None):
+    while not stop_event.is_set():
+        try:
+            evento = input_queue.get(timeout=0.5)
+        except queue.Empty:
+            continue
+        event_id = evento.get("event_id", "N/A")
+        try:
+            resultado = etapa(evento)
+        except Exception as e:
+            logger(bot_name, f"Error no controlado procesando '{event_id}': {type(e).__name__} - {e}", "ERROR")
+            resultado = None
+
+        if resultado is None:
+            end_report(event_id)
+            limiter.release()
+        elif output_queue is not None:
+            if not _put_until_stopped(output_queue, resultado, stop_event):
+                limiter.release()
+        else:
+            limiter.release()
+            if on_done:
+                on_done(resultado)
+
+def main_loop_pipeline(sesion=None, servicios=True):
+    """Orquestador concurrente: cada bot es una etapa con sus propios hilos, unidas por colas acotadas."""
+    sesion = sesion or obtener_sesion()
+    logger("BotMaestro", f"{sesion.etiqueta()}Hedgehog Alert Processor INICIADO (modo pipeline).")
+    sesion.reiniciar()
+    estado = sesion.estado()
+    logger("BotMaestro", f"{sesion.etiqueta()}Estado inicial: HP Eggman: {estado['eggman_hp']}, Pánico: {estado['global_panic']}")
+
+    cfg_maestro = CONFIG.get("bot_maestro", {})
+    max_cycles = cfg_maestro.get("max_cycles_to_run", 0)
+    max_in_flight = cfg_maestro.get("max_in_flight_events", 4)
+    queue_size = cfg_maestro.get("stage_queue_size", max_in_flight)
+    decision_workers = cfg_maestro.get("decision_workers", max_in_flight)
+
+    stop_event = threading.Event()
+    limiter = InFlightLimiter(max_in_flight)
+    final_state = {}
+
+    def on_event_done(routing_data):
+        final_data = comprobar_fin_de_juego(sesion)
+        if final_data and not stop_event.is_set():
+            final_state.update(final_data)
+            stop_event.set()
+
+    stages: List[Tuple[str, Etapa, int]] = [
+        ("BotAnalizador", bot_analizador, 1),
+        ("BotDeduplicador", bot_deduplicador, 1),
+        ("BotEnriquecedor", bot_enriquecedor, 1),
+        ("BotDecisionTactica", decidir_con_admision, decision_workers),
+        ("BotNotificador", aplicar_decision_y_notificar, 1),
+    ]
+    queues = [queue.Queue(maxsize=queue_size) for _ in stages]
+    for (bot_name, _, _), stage_queue in zip(stages, queues):
+        METRICS.registrar_gauge("cola_profundidad", stage_queue.qsize, etapa=bot_name, sesion=sesion.session_id)
+    METRICS.registrar_gauge("eventos_en_vuelo", lambda: limiter.count, sesion=sesion.session_id)
+    workers = []
+    for index, (bot_name, etapa, n_workers) in enumerate(stages):
+        output_queue = queues[index + 1] if index + 1 < len(stages) else None
+        for n in range(max(1, int(n_workers))):
+            worker = threading.Thread(
+                target=_pipeline_worker,
+                args=(bot_name, etapa, queues[index], output_queue, stop_event, limiter,
+                      on_event_done if output_queue is None else None),
+                name=f"{bot_name}-{sesion.session_id}-{n}", daemon=True)
+            worker.start()
+            workers.append(worker)
+    logger("BotMaestro", f"{sesion.etiqueta()}Pipeline iniciado: máx. {limiter.max_in_flight} eventos en vuelo, {decision_workers} decisiones simultáneas.")
+
+    if servicios:
+        start_snapshot_writer()
+        start_report_writer()
+        start_metrics_reporter()
+    por_cambios = modo_cambios()
+    if por_cambios:
+        logger("BotMaestro", f"{sesion.etiqueta()}Ingesta por cambios: vigilando {len(vigilante_de(sesion).fuentes)} fuentes.")
+    produced = 0
+    try:
+        while not stop_event.is_set():
+            if max_cycles > 0 and produced >= max_cycles:
+                logger("BotMaestro", f"{sesion.etiqueta()}Máximo de ciclos ({max_cycles}) alcanzado. Esperando eventos en vuelo...")
+                limiter.wait_idle(stop_event)
+                break
+
+            cambios = vigilante_de(sesion).esperar_cambios(stop_event) if por_cambios else None
+            if por_cambios and not cambios: # Solo pasa al parar
+                continue
+            if not limiter.acquire(stop_event): # Backpressure: no ingerir más allá del límite
+                break
+            produced += 1
+            logger("BotMaestro", f"{sesion.etiqueta()}--- Ciclo de monitoreo #{produced} (en vuelo: {limiter.count}) ---")
+            if por_cambios:
+                monitor_results = bot_monitor_cambios(sesion, cambios)
+            elif CONFIG.get("bot_monitor", {}).get("scrape_all_sources", False):
+                monitor_results = bot_monitor_lote(sesion)
+            else:
+                monitor_results = [bot_monitor(sesion)]
+            if not monitor_results:
+                limiter.release()
+            for index, monitor_result in enumerate(monitor_results):
+                if index > 0 and not limiter.acquire(stop_event): # El primer hueco ya se reservó arriba
+                    break
+                if not _put_until_stopped(queues[0], monitor_result, stop_event):
+                    limiter.release()
+
+            if not por_cambios:
+                process_interval_seconds = random.randint(
+                    cfg_maestro.get("process_interval_seconds_min", 3),
+                    cfg_maestro.get("process_interval_seconds_max", 7)
+                )
+                stop_event.wait(process_interval_seconds)
+
+        if final_state:
+            send_game_over_to_dashboard(dict(final_state), sesion.session_id)
+            time.sleep(20)  # Esperar 20 segundos antes de cerrar
+    except KeyboardInterrupt:
+        logger("BotMaestro", "Interrupción por teclado. Deteniendo...")
+    finally:
+        stop_event.set()
+        for worker in workers:
+            worker.join(timeout=1)
+        for bot_name, _, _ in stages:
+            METRICS.quitar_gauge("cola_profundidad", etapa=bot_name, sesion=sesion.session_id)
+        METRICS.quitar_gauge("eventos_en_vuelo", sesion=sesion.session_id)
+        if servicios:
+            close_webdriver_pool()
+            close_notifier()
+            stop_snapshot_writer()
+            flush_open_reports()
+            stop_report_writer()
+            stop_metrics_reporter()
+        log_resumen_admision(sesion)
+        logger("BotMaestro", f"{sesion.etiqueta()}Hedgehog Alert Processor TERMINADO.")
+    return dict(final_state) or None
+
+def main_multisesion(session_ids):
+    """Varias partidas simultáneas en este proceso, una por sesión, con los servicios en segundo plano compartidos."""
+    pipeline_mode = CONFIG.get("bot_maestro", {}).get("pipeline_mode", False)
+    logger("BotMaestro", f"Iniciando {len(session_ids)} sesiones: {', '.join(session_ids)}")
+    start_snapshot_writer()
+    start_report_writer()
+    start_metrics_reporter()
+    threads = []
+    for session_id in session_ids:
+        sesion = obtener_sesion(session_id)
+        target, args = (main_loop_pipeline, (sesion, False)) if pipeline_mode else (main_loop, (EntornoBucle(sesion=sesion, servicios=False),))
+        thread = threading.Thread(target=target, args=args, name=f"Sesion-{session_id}", daemon=True)
+        thread.start()
+        threads.append(thread)
+    try:
+        while any(thread.is_alive() for thread in threads):
+            for thread in threads:
+                thread.join(timeout=0.5) # join con timeout: el hilo principal sigue recibiendo Ctrl+C
+    except KeyboardInterrupt:
+        logger("BotMaestro", "Interrupción por teclado. Deteniendo todas las sesiones...")
+    finally:
+        close_webdriver_pool()
+        close_notifier()
+        stop_snapshot_writer()
+        flush_open_reports()
+        stop_report_writer()
+        stop_metrics_reporter()
+        logger("BotMaestro", "Todas las sesiones TERMINADAS.")
+
+def send_game_over_to_dashboard(final_data, session_id=SESION_PREDETERMINADA):
     try:
         cfg_dashboard = CONFIG.get("dashboard_tactico", {})
-        full_submit_url = f"{cfg_dashboard.get('url', '').rstrip('/')}{cfg_dashboard.get('submit_alert_endpoint', '')}"
+        full_submit_url = dashboard_url(cfg_dashboard.get('submit_alert_endpoint', ''), session_id)
         if full_submit_url:
             logger("BotMaestro", f"Enviando estado final del juego a {full_submit_url}...")
             requests.post(full_submit_url, json=final_data, timeout=5)
@@ -607,4 +1592,13 @@ def send_game_over_to_dashboard(final_data):
 if __name__ == "__main__":
     ensure_dirs()
     load_config() 
-    main_loop()
\ No newline at end of file
+    session_ids = CONFIG.get("bot_maestro", {}).get("sessions") or [SESION_PREDETERMINADA]
+    for session_id in [s for s in session_ids if not sesion_id_valido(s)]:
+        logger("BotMaestro", f"Id de sesión no válido '{session_id}' (letras, números, '-' y '_', máx. 64). Se ignora.", "ERROR")
+    session_ids = [s for s in session_ids if sesion_id_valido(s)] or [SESION_PREDETERMINADA]
+    if len(session_ids) > 1:
+        main_multisesion(session_ids)
+    elif CONFIG.get("bot_maestro", {}).get("pipeline_mode", False):
+        main_loop_pipeline(obtener_sesion(session_ids[0]))
+    else:
+        main_loop(EntornoBucle(sesion=obtener_sesion(session_ids[0])))
\ No newline at end of file
@@ -1,20 +1,211 @@
 # dashboard_tactico_app.py (VERSIÓN FINAL CON PANTALLA DE GAME OVER)
 
-from flask import Flask, request, render_template, redirect, url_for, jsonify
+from flask import Flask, Response, abort, g, request, render_template, redirect, stream_with_context, url_for, jsonify
+import heapq
+import itertools
 import json
 import os
+import queue
+import threading
+import time
 from datetime import datetime
 
+from metricas import Metricas, formato_prometheus
+from plazos import PlanificadorPlazos
+from registro_decisiones import RegistroDecisiones
+from reportes_journal import ReportJournal
+from sesiones import SESION_PREDETERMINADA, clave_decision, prefijo_decisiones, sesion_id_valido
+
 app = Flask(__name__)
 
-DATA_DIR = "data_dashboard"
-if not os.path.exists(DATA_DIR):
-    os.makedirs(DATA_DIR)
+class PendingAlertQueue:
+    """Alertas pendientes de decisión, ordenadas por priority_score (mayor primero) y luego por antigüedad.
+
+    Heap con borrado perezoso más un índice por event_id: inserción y extracción O(log n),
+    búsqueda por event_id O(1).
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._entries = {} # event_id -> (entrada_heap, datos_alerta, hora_recepcion)
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def push(self, event_id, alert_data, received_time):
+        priority = alert_data.get("threat_assessment", {}).get("priority_score", 0)
+        with self._lock:
+            previous = self._entries.get(event_id)
+            if previous:
+                # Un reenvío no reinicia la antigüedad de la alerta: conserva su hora y su orden de llegada
+                received_time, sequence = previous[2], previous[0][1]
+            else:
+                sequence = next(self._counter)
+            heap_entry = (-priority, sequence, event_id)
+            self._entries[event_id] = (heap_entry, alert_data, received_time)
+            heapq.heappush(self._heap, heap_entry)
+            return previous is not None
+
+    def _discard_stale(self):
+        while self._heap:
+            heap_entry = self._heap[0]
+            current = self._entries.get(heap_entry[2])
+            if current and current[0] is heap_entry:
+                return heap_entry
+            heapq.heappop(self._heap)
+        return None
+
+    def peek(self):
+        with self._lock:
+            heap_entry = self._discard_stale()
+            if heap_entry is None:
+                return None
+            _, alert_data, received_time = self._entries[heap_entry[2]]
+            return heap_entry[2], alert_data, received_time
+
+    def pop(self):
+        with self._lock:
+            heap_entry = self._discard_stale()
+            if heap_entry is None:
+                return None
+            heapq.heappop(self._heap)
+            _, alert_data, received_time = self._entries.pop(heap_entry[2])
+            return heap_entry[2], alert_data, received_time
+
+    def get(self, event_id):
+        with self._lock:
+            entry = self._entries.get(event_id)
+            return (entry[1], entry[2]) if entry else None
+
+    def remove(self, event_id):
+        with self._lock:
+            return self._entries.pop(event_id, None) is not None # La entrada del heap se descarta al llegar a la cima
+
+    def clear(self):
+        with self._lock:
+            self._heap.clear()
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+class AlertBroadcaster:
+    """Reparte eventos Server-Sent Events a los navegadores conectados a /stream."""
+
+    def __init__(self, max_buffered_events=100):
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._max_buffered_events = max_buffered_events
+
+    def subscribe(self):
+        subscriber = queue.Queue(maxsize=self._max_buffered_events)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, event, data):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait((event, data))
+            except queue.Full:
+                pass # Navegador demasiado lento: recibirá el siguiente estado completo
+
+    def __len__(self):
+        return len(self._subscribers)
+
+ARRANQUE_ID = os.urandom(4).hex() # Las versiones se reinician con el proceso: los ETag incluyen este id
+TIME_LEFT_MARCADOR = "__TIME_LEFT__"
+
+class SesionDashboard:
+    """Estado de una partida en el dashboard: alertas pendientes, navegadores conectados y fin de juego.
 
-current_alert_data = None
-current_event_id = None
-alert_received_time = None
-new_alert_posted_flag = False
+    Cada cambio (alerta nueva, decisión, timeout, fin de juego, reset) incrementa version; lo que
+    se deriva del estado (JSON de /api/state, HTML del panel) se cachea por versión.
+    """
+
+    def __init__(self, sesion_id):
+        self.sesion_id = sesion_id
+        self.pending_alerts = PendingAlertQueue()
+        self.broadcaster = AlertBroadcaster()
+        self.game_over_data = None
+        self.ultimo_acceso = time.monotonic()
+        self.version = 0
+        self._version_lock = threading.Lock()
+        self._cache = {} # clave -> (versión, valor)
+
+    def cambio(self):
+        """Llamar después de modificar el estado: invalida todo lo cacheado."""
+        with self._version_lock:
+            self.version += 1
+
+    def cache(self, clave, construir, version=None):
+        """(versión, valor) de clave para la versión indicada o la actual; construir() solo si cambió."""
+        if version is None:
+            version = self.version # Se lee antes de construir: el valor nunca es más antiguo que su versión
+        entrada = self._cache.get(clave)
+        if entrada is None or entrada[0] != version:
+            entrada = self._cache[clave] = (version, construir())
+        return entrada
+
+    def inactiva_desde(self, ahora):
+        """Segundos sin peticiones (0 si hay navegadores conectados al stream)."""
+        return 0 if len(self.broadcaster) else ahora - self.ultimo_acceso
+
+sesiones = {} # sesion_id -> SesionDashboard
+sesiones_lock = threading.Lock()
+
+def obtener_sesion(sesion_id):
+    """Devuelve la sesión, creándola si no existe. Si se llega a max_sessions se descartan las inactivas."""
+    cfg_dashboard = CONFIG.get("dashboard_tactico", {})
+    with sesiones_lock:
+        sesion = sesiones.get(sesion_id)
+        if sesion is None:
+            if len(sesiones) >= cfg_dashboard.get("max_sessions", 100):
+                ahora = time.monotonic()
+                idle_seconds = cfg_dashboard.get("session_idle_seconds", 3600)
+                for inactiva in [s for s in sesiones.values() if s.inactiva_desde(ahora) >= idle_seconds and s.sesion_id != SESION_PREDETERMINADA]:
+                    del sesiones[inactiva.sesion_id]
+                    plazos_decision.cancelar_prefijo(prefijo_decisiones(inactiva.sesion_id))
+                    decisiones.limpiar(prefijo_decisiones(inactiva.sesion_id))
+                    app.logger.info(f"Sesión inactiva '{inactiva.sesion_id}' descartada.")
+                if len(sesiones) >= cfg_dashboard.get("max_sessions", 100):
+                    abort(503, description="Demasiadas sesiones activas.")
+            sesion = sesiones[sesion_id] = SesionDashboard(sesion_id)
+            app.logger.info(f"Nueva sesión '{sesion_id}' ({len(sesiones)} activas).")
+        sesion.ultimo_acceso = time.monotonic()
+        return sesion
+
+def sesion_actual():
+    return obtener_sesion(g.sesion_id)
+
+@app.url_value_preprocessor
+def extraer_sesion_id(endpoint, values):
+    """Todas las rutas de juego existen en /... (sesión predeterminada) y en /sesion/<sesion_id>/..."""
+    g.sesion_id = (values or {}).pop("sesion_id", SESION_PREDETERMINADA)
+    if not sesion_id_valido(g.sesion_id):
+        abort(404)
+
+@app.url_defaults
+def propagar_sesion_id(endpoint, values):
+    """url_for() dentro de una petición de sesión genera las URLs de esa misma sesión."""
+    if "sesion_id" not in values and app.url_map.is_endpoint_expecting(endpoint, "sesion_id"):
+        values["sesion_id"] = g.get("sesion_id", SESION_PREDETERMINADA)
+
+def ruta(rule, **options):
+    """Registra la vista para la sesión predeterminada (rule) y para cualquier sesión (/sesion/<sesion_id>rule)."""
+    def decorador(vista):
+        app.add_url_rule(rule, view_func=vista, defaults={"sesion_id": SESION_PREDETERMINADA}, **options)
+        app.add_url_rule(f"/sesion/<sesion_id>{rule}", view_func=vista, **options)
+        return vista
+    return decorador
+
+def format_sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
 
 CONFIG = {}
 try:
@@ -23,113 +214,316 @@ try:
 except Exception:
     app.logger.warn("dashboard_tactico_app.py no pudo cargar config.json principal.")
 
-@app.route('/', methods=['GET'])
-def index():
-    global current_alert_data, current_event_id, alert_received_time
+# Decisiones ya resueltas (por el jugador o por timeout); compartidas con bots.py si hay db_path.
+_cfg_registro = CONFIG.get("decision_registry", {})
+decisiones = RegistroDecisiones(_cfg_registro.get("db_path"), _cfg_registro.get("ttl_seconds", 3600))
 
-    # --- MODIFICADO: Comprobar si el juego ha terminado y qué pantalla mostrar ---
-    if current_alert_data and current_alert_data.get('game_status'):
-        status = current_alert_data.get('game_status')
-        if status == 'VICTORY':
-            return render_template('victory.html', result=current_alert_data)
-        elif status == 'DEFEAT':
-            return render_template('game_over.html', result=current_alert_data)
-        # Podrías añadir un else aquí para un estado desconocido, pero no debería ocurrir.
-    # ----------------------------------------------------------------------
+# Plazos de decisión de todas las alertas pendientes de todas las sesiones, en una sola rueda de temporizadores
+plazos_decision = PlanificadorPlazos()
+plazos_decision.iniciar()
 
+# Métricas propias del dashboard y última instantánea publicada por bots.py (POST /metrics)
+dashboard_metrics = Metricas()
+dashboard_metrics.registrar_gauge("dashboard_sesiones", lambda: len(sesiones))
+dashboard_metrics.registrar_gauge("dashboard_alertas_pendientes", lambda: sum(len(s.pending_alerts) for s in list(sesiones.values())))
+dashboard_metrics.registrar_gauge("dashboard_clientes_stream", lambda: sum(len(s.broadcaster) for s in list(sesiones.values())))
+dashboard_metrics.registrar_gauge("dashboard_decisiones_registradas", lambda: len(decisiones))
+dashboard_metrics.registrar_gauge("dashboard_plazos_pendientes", lambda: len(plazos_decision))
+bots_metrics = {}
+
+def build_dashboard_context(sesion):
+    """Variables de plantilla para la alerta más urgente de la sesión (compartidas por index() y /stream)."""
     alert_to_display = None
+    event_id_to_display = None
     time_left_for_decision = 0
+    deadline = None
     zone_css_class = "zone-default"
     available_heroes_flags = {"Sonic": False, "Tails": False, "Knuckles": False}
 
-    timeout_seconds_from_config = CONFIG.get("dashboard_tactico", {}).get("decision_timeout_seconds", 40)
-
-    if current_event_id: # Solo procesar si no es game_over (ya que current_event_id sería 'GAME_OVER')
-        decision_file_path = os.path.join(DATA_DIR, f"decision_{current_event_id}.json")
-        auto_decision_file_path = os.path.join(DATA_DIR, f"auto_decision_{current_event_id}.json")
-
-        if os.path.exists(decision_file_path) or os.path.exists(auto_decision_file_path):
-            app.logger.info(f"Decisión para {current_event_id} ya procesada. Limpiando dashboard.")
-            current_alert_data = None # Limpiar para que no re-muestre game_over si se recarga sin /reset
-            current_event_id = None
-            alert_received_time = None
-        elif current_alert_data: # Asegurarse de que current_alert_data no sea un estado de fin de juego aquí
-            alert_to_display = current_alert_data
-            if alert_received_time:
-                elapsed_time = (datetime.now() - alert_received_time).total_seconds()
-                time_left_for_decision = max(0, timeout_seconds_from_config - elapsed_time)
-            
-            if alert_to_display.get("location_details"): # Solo si es una alerta normal
-                zone_css_class = alert_to_display["location_details"].get("css_class", "zone-unknown")
-                known_heroes = alert_to_display["location_details"].get("known_nearby_heroes", [])
-                for hero in known_heroes:
-                    if hero in available_heroes_flags:
-                        available_heroes_flags[hero] = True
+    # Mostrar la alerta más urgente, descartando las que ya tienen decisión registrada.
+    while True:
+        top = sesion.pending_alerts.peek()
+        if top is None:
+            break
+        event_id, alert_data, received_time = top
+        if clave_decision(sesion.sesion_id, event_id) in decisiones:
+            app.logger.info(f"Decisión para {event_id} ya procesada. Retirando de la cola.")
+            sesion.pending_alerts.remove(event_id)
+            sesion.cambio()
+            continue
+
+        alert_to_display = alert_data
+        event_id_to_display = event_id
+        deadline = plazo_de(sesion, event_id, received_time)
+        time_left_for_decision = segundos_restantes(deadline)
+
+        if alert_to_display.get("location_details"): # Solo si es una alerta normal
+            zone_css_class = alert_to_display["location_details"].get("css_class", "zone-unknown")
+            known_heroes = alert_to_display["location_details"].get("known_nearby_heroes", [])
+            for hero in known_heroes:
+                if hero in available_heroes_flags:
+                    available_heroes_flags[hero] = True
+        break
     
-    return render_template('dashboard_v2.html', 
-                           alert=alert_to_display, 
-                           event_id=current_event_id, 
-                           time_left=int(time_left_for_decision),
-                           zone_class=zone_css_class,
-                           heroes_flags=available_heroes_flags,
-                           poll_interval=CONFIG.get("dashboard_tactico", {}).get("dashboard_refresh_poll_seconds", 3) * 1000
-                           )
-
-# La función submit_alert_data no necesita cambios, ya que simplemente guarda lo que recibe.
-@app.route('/submit_alert_data', methods=['POST'])
+    return {
+        "alert": alert_to_display,
+        "event_id": event_id_to_display,
+        "pending_count": max(0, len(sesion.pending_alerts) - 1) if alert_to_display else 0,
+        "time_left": time_left_for_decision,
+        "deadline": deadline,
+        "zone_class": zone_css_class,
+        "heroes_flags": available_heroes_flags,
+        "poll_interval": CONFIG.get("dashboard_tactico", {}).get("dashboard_refresh_poll_seconds", 3) * 1000,
+    }
+
+def plazo_de(sesion, event_id, received_time):
+    """Hora límite de la decisión: la programada en la rueda de plazos, o la calculada si ya no está en ella."""
+    deadline = plazos_decision.deadline(clave_decision(sesion.sesion_id, event_id))
+    if deadline is None:
+        deadline = received_time.timestamp() + CONFIG.get("dashboard_tactico", {}).get("decision_timeout_seconds", 40)
+    return deadline
+
+def vencer_plazo(sesion, event_id):
+    """Decisión automática al vencer el plazo de una alerta. La reclamación atómica garantiza que se toma una sola vez."""
+    timed_out, decision = decisiones.reclamar(clave_decision(sesion.sesion_id, event_id), {"event_id": event_id, "decision_type": "timeout_auto"})
+    if timed_out:
+        dashboard_metrics.observar("dashboard_tiempo_decision_ms", CONFIG.get("dashboard_tactico", {}).get("decision_timeout_seconds", 40) * 1000, origen="timeout")
+        sesion.pending_alerts.remove(event_id)
+        app.logger.info(f"Plazo vencido para {event_id}. Decisión automática.")
+        publish_dashboard_state(sesion) # Se llama desde el hilo de la rueda de plazos: no renderiza nada
+    return decision
+
+def segundos_restantes(deadline):
+    return int(max(0, deadline - time.time())) if deadline else 0
+
+def render_cacheado(sesion, clave, renderizar):
+    """HTML de renderizar(context), renderizado una sola vez por versión del estado de la sesión.
+
+    La plantilla se renderiza con un marcador en lugar de los segundos restantes y el marcador
+    se sustituye en cada petición: la cuenta atrás está al día sin volver a pasar por Jinja.
+    """
+    def construir():
+        context = build_dashboard_context(sesion)
+        return renderizar(dict(context, time_left=TIME_LEFT_MARCADOR)), context["deadline"]
+    _, (html, deadline) = sesion.cache(clave, construir)
+    return html.replace(TIME_LEFT_MARCADOR, str(segundos_restantes(deadline)))
+
+def estado_compacto(sesion):
+    """Instantánea JSON de la sesión para /api/state. No depende de la hora: sirve como contenido del ETag."""
+    def construir():
+        context = build_dashboard_context(sesion)
+        alert = context["alert"]
+        return {
+            "sesion_id": sesion.sesion_id,
+            "game_status": (sesion.game_over_data or {}).get("game_status"),
+            "resultado": sesion.game_over_data,
+            "alertas_pendientes": len(sesion.pending_alerts),
+            "alerta": None if not alert else {
+                "event_id": context["event_id"],
+                "nivel": alert.get("threat_assessment", {}).get("initial_level"),
+                "prioridad": alert.get("threat_assessment", {}).get("priority_score"),
+                "descripcion": alert.get("threat_assessment", {}).get("description"),
+                "ubicacion": alert.get("location_reported"),
+                "zona": alert.get("location_details", {}).get("zone_name"),
+                "zone_class": context["zone_class"],
+                "heroes_cercanos": alert.get("location_details", {}).get("known_nearby_heroes", []),
+                "deadline": context["deadline"],
+            },
+            "game_state": (alert or {}).get("game_state"),
+        }
+    return sesion.cache("estado", construir)
+
+CAMBIO_DE_ESTADO = "estado" # Aviso interno del broadcaster; nunca llega al navegador con este nombre
+
+def build_stream_state(sesion):
+    """Evento SSE que describe el estado actual de la sesión: fin de juego o el panel de la alerta ya renderizado."""
+    if sesion.game_over_data:
+        return "game_over", {"game_status": sesion.game_over_data.get("game_status"), "url": url_for('index', sesion_id=sesion.sesion_id)}
+    _, estado = estado_compacto(sesion)
+    alerta = estado["alerta"] or {}
+    return "alert", {
+        "event_id": alerta.get("event_id"),
+        "time_left": segundos_restantes(alerta.get("deadline")),
+        "pending_count": max(0, estado["alertas_pendientes"] - 1) if alerta else 0,
+        "zone_class": alerta.get("zone_class", "zone-default"),
+        "html": render_cacheado(sesion, "panel", lambda context: render_template('_alert_panel.html', **context)),
+    }
+
+def publish_dashboard_state(sesion):
+    """Registra un cambio de estado de la sesión y avisa a los navegadores conectados.
+
+    Solo se publica el aviso: cada /stream construye el estado dentro de su propia petición
+    (render_template y url_for la necesitan), así que se puede llamar desde cualquier hilo.
+    El HTML se renderiza una sola vez por versión aunque haya muchos navegadores.
+    """
+    sesion.cambio()
+    if len(sesion.broadcaster):
+        sesion.broadcaster.publish(CAMBIO_DE_ESTADO, None)
+
+def current_countdown_tick(sesion):
+    _, estado = estado_compacto(sesion)
+    if estado["alerta"] is None:
+        return None
+    return {"event_id": estado["alerta"]["event_id"], "time_left": segundos_restantes(estado["alerta"]["deadline"])}
+
+@ruta('/', methods=['GET'])
+def index():
+    sesion = sesion_actual()
+    # --- MODIFICADO: Comprobar si el juego ha terminado y qué pantalla mostrar ---
+    if sesion.game_over_data:
+        status = sesion.game_over_data.get('game_status')
+        if status == 'VICTORY':
+            return render_template('victory.html', result=sesion.game_over_data)
+        elif status == 'DEFEAT':
+            return render_template('game_over.html', result=sesion.game_over_data)
+        # Podrías añadir un else aquí para un estado desconocido, pero no debería ocurrir.
+    # ----------------------------------------------------------------------
+    return render_cacheado(sesion, "index", lambda context: render_template('dashboard_v2.html', **context))
+
+@ruta('/stream', methods=['GET'])
+def stream():
+    """Server-Sent Events: nuevas alertas, segundos restantes y fin de juego, sin recargar la página."""
+    sesion = sesion_actual()
+    subscriber = sesion.broadcaster.subscribe()
+    initial_state = build_stream_state(sesion)
+    keepalive_seconds = CONFIG.get("dashboard_tactico", {}).get("stream_keepalive_seconds", 15)
+
+    def generate():
+        try:
+            yield format_sse(*initial_state)
+            idle_seconds = 0
+            while True:
+                try:
+                    event, data = subscriber.get(timeout=1)
+                except queue.Empty:
+                    pass
+                else:
+                    if event == CAMBIO_DE_ESTADO:
+                        event, data = build_stream_state(sesion)
+                    yield format_sse(event, data)
+                    idle_seconds = 0
+                    continue
+                tick = None if sesion.game_over_data else current_countdown_tick(sesion)
+                if tick:
+                    yield format_sse("tick", tick)
+                    idle_seconds = 0
+                else:
+                    idle_seconds += 1
+                    if idle_seconds >= keepalive_seconds: # Sin alerta: solo un comentario de keepalive
+                        yield ": keepalive\n\n"
+                        idle_seconds = 0
+        finally:
+            sesion.broadcaster.unsubscribe(subscriber)
+            sesion.ultimo_acceso = time.monotonic()
+
+    return Response(stream_with_context(generate()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@ruta('/submit_alert_data', methods=['POST'])
 def submit_alert_data():
-    global current_alert_data, current_event_id, alert_received_time, new_alert_posted_flag
+    sesion = sesion_actual()
     try:
         data = request.get_json()
         if not data:
             return jsonify({"status": "error", "message": "No hay datos"}), 400
 
-        # Si es un estado de fin de juego, el event_id será 'GAME_OVER'
+        # Un estado de fin de juego reemplaza a la cola de alertas
         if data.get('game_status'):
-             current_event_id = 'GAME_OVER'
-        elif 'event_id' in data:
-            if current_event_id and current_event_id != data["event_id"]:
-                app.logger.warn(f"Recibida nueva alerta {data['event_id']} mientras {current_event_id} estaba activo. Sobrescribiendo.")
-            current_event_id = data["event_id"]
-        else:
-             return jsonify({"status": "error", "message": "Datos inválidos"}), 400
-        
-        current_alert_data = data
-        alert_received_time = datetime.now()
-        new_alert_posted_flag = True
-        
-        app.logger.info(f"Nuevos datos recibidos en dashboard: {current_event_id}")
-        return jsonify({"status": "success", "message": "Datos recibidos"}), 200
+            sesion.game_over_data = data
+            sesion.pending_alerts.clear()
+            plazos_decision.cancelar_prefijo(prefijo_decisiones(sesion.sesion_id))
+            app.logger.info(f"Fin de juego recibido en dashboard (sesión '{sesion.sesion_id}'): {data['game_status']}")
+            publish_dashboard_state(sesion)
+            return jsonify({"status": "success", "message": "Datos recibidos"}), 200
+        if 'event_id' not in data:
+            return jsonify({"status": "error", "message": "Datos inválidos"}), 400
+
+        event_id = data["event_id"]
+        sesion.pending_alerts.push(event_id, data, datetime.now())
+        clave = clave_decision(sesion.sesion_id, event_id)
+        deadline = plazos_decision.deadline(clave) # Un reenvío conserva el plazo
+        if deadline is None and clave not in decisiones:
+            deadline = plazo_de(sesion, event_id, sesion.pending_alerts.get(event_id)[1])
+            plazos_decision.programar(clave, deadline, lambda: vencer_plazo(sesion, event_id))
+        app.logger.info(f"Nueva alerta en cola (sesión '{sesion.sesion_id}'): {event_id} ({len(sesion.pending_alerts)} pendientes)")
+        publish_dashboard_state(sesion)
+        return jsonify({"status": "success", "message": "Datos recibidos", "pending_count": len(sesion.pending_alerts), "deadline": deadline}), 200
     except Exception as e:
         app.logger.error(f"Error en submit_alert_data: {e}")
         return jsonify({"status": "error", "message": str(e)}), 500
 
-@app.route('/decision_made') # Esta es la ruta que define el endpoint
+REPORT_BOT_CLASSES = {"BotMonitor": "bot-monitor", "BotAnalizador": "bot-analizador", "BotEnriquecedor": "bot-enriquecedor", "BotDecisionTactica": "bot-decision-tactica", "BotNotificador": "bot-notificador"}
+REPORT_BOT_ICONS = {"BotMonitor": "🛰️", "BotAnalizador": "🧠", "BotEnriquecedor": "🗺️", "BotDecisionTactica": "🎯", "BotNotificador": "📡"}
+report_journal = None
+
+@ruta('/report/<event_id>')
+def report(event_id):
+    """Renderiza bajo demanda el reporte de flujo de un evento a partir del diario que escribe bots.py."""
+    global report_journal
+    if report_journal is None:
+        cfg_reports = CONFIG.get("reports", {})
+        report_journal = ReportJournal(cfg_reports.get("journal_dir", os.path.join("reports", "journal")),
+                                       cfg_reports.get("segment_max_bytes", 4 * 1024 * 1024))
+    record = report_journal.get(event_id)
+    return render_template('report.html', event_id=event_id, steps=record["steps"] if record else None,
+                           bot_classes=REPORT_BOT_CLASSES, bot_icons=REPORT_BOT_ICONS), (200 if record else 404)
+
+@ruta('/decision_made') # Esta es la ruta que define el endpoint
 def decision_made():      # Este es el nombre del endpoint que url_for() busca
     event_id = request.args.get('event_id', 'N/A')
     message = request.args.get('message', 'Decisión procesada.')
     image_name = request.args.get('image_name', None)
     return render_template('decision_made_v2.html', event_id=event_id, message=message, image_name=image_name)
 
-# La función make_decision y check_new_alert no necesitan cambios.
-@app.route('/check_new_alert', methods=['GET'])
+@ruta('/check_new_alert', methods=['GET'])
 def check_new_alert():
-    """Endpoint para que el cliente (JavaScript) pregunte si hay una nueva alerta."""
-    global new_alert_posted_flag, current_event_id
-    if new_alert_posted_flag and current_event_id:
-        # Si es un estado de fin de juego, no lo indicamos como 'new_alert' para recarga, 
-        # ya que la página de game_over se manejará directamente.
-        if current_alert_data and current_alert_data.get('game_status'):
-             return jsonify({"new_alert": False}) # No recargar si es game over
-
-        new_alert_posted_flag = False # Resetear el flag una vez que el cliente lo sabe
-        app.logger.debug(f"Cliente consultó /check_new_alert. Nueva alerta {current_event_id} indicada.")
-        return jsonify({"new_alert": True, "event_id": current_event_id})
-    return jsonify({"new_alert": False})
-
-@app.route('/make_decision', methods=['POST'])
+    """Endpoint para que el cliente (JavaScript) pregunte cuál es la alerta más urgente en cola."""
+    sesion = sesion_actual()
+    # Si es un estado de fin de juego, no lo indicamos como 'new_alert' para recarga, 
+    # ya que la página de game_over se manejará directamente.
+    if sesion.game_over_data:
+        return jsonify({"new_alert": False}) # No recargar si es game over
+    _, estado = estado_compacto(sesion)
+    if estado["alerta"]:
+        return jsonify({"new_alert": True, "event_id": estado["alerta"]["event_id"], "pending_count": estado["alertas_pendientes"]})
+    return jsonify({"new_alert": False, "pending_count": 0})
+
+@ruta('/api/state', methods=['GET'])
+def api_state():
+    """Estado compacto y versionado de la sesión. Con If-None-Match de la versión actual responde 304 sin cuerpo."""
+    sesion = sesion_actual()
+    etag = f"{ARRANQUE_ID}-{sesion.sesion_id}-{sesion.version}"
+    if request.if_none_match.contains(etag): # Sin cambios: ni se construye ni se serializa nada
+        dashboard_metrics.incrementar("dashboard_api_state_total", resultado="304")
+        return Response(status=304, headers={"ETag": f'"{etag}"', "Cache-Control": "no-cache"})
+    version, estado = estado_compacto(sesion)
+    _, cuerpo = sesion.cache("estado_json", lambda: json.dumps(dict(estado, version=version), ensure_ascii=False, separators=(",", ":")), version)
+    dashboard_metrics.incrementar("dashboard_api_state_total", resultado="200")
+    return Response(cuerpo, mimetype="application/json",
+                    headers={"ETag": f'"{ARRANQUE_ID}-{sesion.sesion_id}-{version}"', "Cache-Control": "no-cache"})
+
+@ruta('/await_decision/<event_id>', methods=['GET'])
+def await_decision(event_id):
+    """Long-poll para bots.py: responde en cuanto el jugador decide o cuando vence el plazo de la alerta."""
+    sesion = sesion_actual()
+    clave = clave_decision(sesion.sesion_id, event_id)
+    pending = sesion.pending_alerts.get(event_id)
+
+    if pending is None and clave not in decisiones:
+        return jsonify({"status": "unknown", "event_id": event_id}), 404
+    deadline = plazo_de(sesion, event_id, pending[1] if pending else datetime.now())
+    # El plazo lo vence la rueda de plazos; aquí solo se espera (con un margen de un par de ticks).
+    decision = decisiones.esperar(clave, deadline - time.time() + 2 * plazos_decision.resolucion_seconds)
+    if decision is None:
+        decision = vencer_plazo(sesion, event_id) # Por si la rueda va con retraso: sigue siendo una sola decisión
+
+    if decision.get("decision_type") == "timeout_auto":
+        return jsonify({"status": "timeout", "event_id": event_id})
+    return jsonify({"status": "decided", "event_id": event_id, "decision": decision})
+
+@ruta('/make_decision', methods=['POST'])
 def make_decision():
-    global current_alert_data, current_event_id, alert_received_time
+    sesion = sesion_actual()
     try:
         event_id_form = request.form.get('event_id')
         action = request.form.get('action')
@@ -137,8 +531,9 @@ def make_decision():
         if not event_id_form or not action:
             return "Error: Faltan datos en la decisión.", 400
 
-        auto_decision_path = os.path.join(DATA_DIR, f"auto_decision_{event_id_form}.json")
-        if os.path.exists(auto_decision_path):
+        clave = clave_decision(sesion.sesion_id, event_id_form)
+        previous_decision = decisiones.obtener(clave)
+        if previous_decision and previous_decision.get("decision_type") == "timeout_auto":
             return redirect(url_for('decision_made', 
                                  event_id=event_id_form,
                                  message="Error: Tiempo agotado. Decisión tomada automáticamente",
@@ -172,42 +567,61 @@ def make_decision():
             "target_destinations": list(set(target_destinations))
         }
 
-        decision_file_path = os.path.join(DATA_DIR, f"decision_{event_id_form}.json")
-        auto_decision_file_path = os.path.join(DATA_DIR, f"auto_decision_{event_id_form}.json")
-
-        message_to_user = ""
-        if os.path.exists(auto_decision_file_path):
+        # Reclamación atómica: si el timeout ya ganó, el clic no se procesa (y viceversa).
+        registered, previous_decision = decisiones.reclamar(clave, decision_data)
+        if registered:
+            plazos_decision.cancelar(clave)
+            pending = sesion.pending_alerts.get(event_id_form)
+            if pending:
+                dashboard_metrics.observar("dashboard_tiempo_decision_ms", (datetime.now() - pending[1]).total_seconds() * 1000, origen="jugador")
+            message_to_user = f"Decisión '{action}' registrada para el evento {event_id_form}." # Despierta al bot que espera en /await_decision
+        elif previous_decision.get("decision_type") == "timeout_auto":
             message_to_user = f"La decisión para el evento {event_id_form} fue tomada automáticamente (timeout). Tu selección de '{action}' no fue procesada."
             image_name = "timeout.png" 
-        elif os.path.exists(decision_file_path):
-            message_to_user = f"Una decisión previa ya fue registrada para el evento {event_id_form}."
-            # Podrías intentar leer la decisión previa para obtener la imagen correcta si es necesario
-            # o simplemente mantener la imagen de la acción actual.
         else:
-            with open(decision_file_path, 'w') as f:
-                json.dump(decision_data, f, indent=4)
-            message_to_user = f"Decisión '{action}' registrada para el evento {event_id_form}."
+            message_to_user = f"Una decisión previa ya fue registrada para el evento {event_id_form}."
 
-        if event_id_form == current_event_id: # Solo limpiar si es la alerta actual
-            current_alert_data = None
-            current_event_id = None
-            alert_received_time = None
+        if sesion.pending_alerts.remove(event_id_form):
+            publish_dashboard_state(sesion)
 
         return redirect(url_for('decision_made', event_id=event_id_form, message=message_to_user, image_name=image_name))
     except Exception as e:
         app.logger.error(f"Error en make_decision: {e}")
         return "Error procesando la decisión.", 500
 
+@app.route('/metrics', methods=['GET', 'POST'])
+def metrics():
+    """GET: métricas de bots.py y del dashboard (texto Prometheus, o JSON con ?format=json). POST: bots.py publica su instantánea."""
+    global bots_metrics
+    if request.method == 'POST':
+        bots_metrics = request.get_json(silent=True) or {}
+        return "", 204
+    dashboard_snapshot = dashboard_metrics.snapshot()
+    if request.args.get("format") == "json":
+        return jsonify({"bots": bots_metrics, "dashboard": dashboard_snapshot})
+    return Response(formato_prometheus(bots_metrics) + formato_prometheus(dashboard_snapshot),
+                    mimetype="text/plain; version=0.0.4")
+
+@app.route('/sesiones', methods=['GET'])
+def listar_sesiones():
+    """Sesiones activas con sus alertas pendientes, navegadores conectados y resultado si ya terminaron."""
+    with sesiones_lock:
+        activas = list(sesiones.values())
+    return jsonify([{"sesion_id": s.sesion_id, "url": url_for('index', sesion_id=s.sesion_id),
+                     "alertas_pendientes": len(s.pending_alerts), "clientes_stream": len(s.broadcaster),
+                     "game_status": (s.game_over_data or {}).get("game_status")} for s in activas])
+
 # --- NUEVO: Ruta para reiniciar el juego ---
-@app.route('/reset')
+@ruta('/reset')
 def reset():
-    """Resetea el estado del dashboard para empezar de nuevo."""
-    global current_alert_data, current_event_id, alert_received_time, new_alert_posted_flag
-    current_alert_data = None
-    current_event_id = None
-    alert_received_time = None
-    new_alert_posted_flag = False
-    app.logger.info("Dashboard reseteado. Listo para una nueva partida.")
+    """Resetea el estado de la sesión del dashboard para empezar de nuevo."""
+    sesion = sesion_actual()
+    sesion.pending_alerts.clear()
+    plazos_decision.cancelar_prefijo(prefijo_decisiones(sesion.sesion_id))
+    decisiones.limpiar(prefijo_decisiones(sesion.sesion_id))
+    sesion.game_over_data = None
+    publish_dashboard_state(sesion)
+    app.logger.info(f"Sesión '{sesion.sesion_id}' reseteada. Lista para una nueva partida.")
     return redirect(url_for('index'))
 # ---------------------------------------------
 
@@ -0,0 +1,76 @@
+# deduplicador.py (DEDUPLICACIÓN DE ALERTAS REPETIDAS)
+#
+# BotMonitor vuelve a leer los mismos ficheros HTML y genera un evento nuevo (con otro
+# event_id) aunque la descripción, la ubicación y el nivel sean los de siempre. Cada repetición
+# abría otra ventana de decisión y volvía a notificar a los héroes. El deduplicador calcula una
+# huella del contenido canónico del evento (sin event_id ni hora) y recuerda las huellas vistas
+# durante window_seconds desde su primera aparición, en un OrderedDict acotado a max_entries
+# (si se llena, se descartan primero las más antiguas, que son las que antes iban a caducar).
+# Las repeticiones dentro de la ventana no siguen por el pipeline: se suman al contador de
+# ocurrencias de la alerta original, que viaja con ella hasta los héroes.
+# La ventana es fija, no deslizante: una repetición no la alarga. Así, una alerta que se repite
+# sin parar vuelve a llegar al jugador como nueva cada window_seconds en lugar de quedar
+# suprimida para siempre. La hora sale de un reloj inyectable (reloj.py).
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from reloj import RELOJ_SISTEMA
+
+
+def huella_evento(canonical_data):
+    """Huella del contenido del evento: sesión, fuente, ubicación, nivel y descripción normalizados."""
+    amenaza = canonical_data.get("threat_assessment", {})
+    normalizar = lambda texto: " ".join(str(texto or "").lower().split())
+    contenido = [normalizar(canonical_data.get("session_id")), normalizar(canonical_data.get("source_system_name")),
+                 normalizar(canonical_data.get("location_reported")), normalizar(amenaza.get("initial_level")),
+                 normalizar(amenaza.get("description"))]
+    return hashlib.blake2b(json.dumps(contenido, ensure_ascii=False).encode("utf-8"), digest_size=16).hexdigest()
+
+
+class Deduplicador:
+    """Huellas vistas en su ventana (fija desde la primera aparición), con su alerta agregada (ocurrencias, primera y última vez)."""
+
+    def __init__(self, window_seconds=120, max_entries=1024, reloj=RELOJ_SISTEMA):
+        self.window_seconds = window_seconds
+        self.max_entries = max_entries
+        self.reloj = reloj
+        self._vistas = OrderedDict() # huella -> (hora de la primera aparición, datos agregados), en orden de aparición
+        self._lock = threading.Lock()
+
+    def _purgar_expiradas(self, ahora):
+        limite = ahora - self.window_seconds
+        while self._vistas:
+            primera, _ = next(iter(self._vistas.values()))
+            if primera >= limite:
+                break
+            self._vistas.popitem(last=False)
+
+    def registrar(self, canonical_data):
+        """Devuelve (es_nuevo, agregado). agregado es el dict compartido con la alerta original."""
+        huella = huella_evento(canonical_data)
+        ahora = self.reloj.monotonic()
+        with self._lock:
+            self._purgar_expiradas(ahora)
+            if huella in self._vistas:
+                agregado = self._vistas[huella][1]
+                agregado["ocurrencias"] += 1
+                agregado["ultima_vez"] = canonical_data.get("timestamp_event")
+                agregado["event_ids_duplicados"] = (agregado["event_ids_duplicados"] + [canonical_data.get("event_id")])[-10:]
+                return False, agregado
+            agregado = {"huella": huella, "event_id_original": canonical_data.get("event_id"), "ocurrencias": 1, "primera_vez": canonical_data.get("timestamp_event"),
+                        "ultima_vez": canonical_data.get("timestamp_event"), "event_ids_duplicados": []}
+            self._vistas[huella] = (ahora, agregado)
+            if len(self._vistas) > self.max_entries:
+                self._vistas.popitem(last=False)
+            return True, agregado
+
+    def __len__(self):
+        with self._lock:
+            return len(self._vistas)
+
+    def limpiar(self):
+        with self._lock:
+            self._vistas.clear()
@@ -0,0 +1,167 @@
+# endpoints/logdb_store.py (BASE DE DATOS DE LOGS DEL ENDPOINT LogDB)
+#
+# Guarda cada alerta recibida por LogDB en SQLite (modo WAL) con índices por event_id,
+# zona, nivel de amenaza y hora de recepción. Las inserciones se agrupan en transacciones
+# desde un hilo propio, así que el bucle asyncio del receptor nunca espera al disco.
+# Las consultas usan otra conexión y paginan por id (keyset), sin OFFSET: cuesta lo mismo
+# leer la primera página que una de hace horas.
+
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+MAX_PAGE_SIZE = 500
+WRITE_ATTEMPTS = 3 # Intentos por lote (p. ej. "database is locked" con varios workers sobre el mismo fichero)
+
+log = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS alertas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    event_id TEXT,
+    recibida REAL NOT NULL,
+    timestamp_event TEXT,
+    zona TEXT,
+    nivel TEXT,
+    prioridad INTEGER,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_alertas_event_id ON alertas (event_id);
+CREATE INDEX IF NOT EXISTS idx_alertas_zona ON alertas (zona, id);
+CREATE INDEX IF NOT EXISTS idx_alertas_nivel ON alertas (nivel, id);
+CREATE INDEX IF NOT EXISTS idx_alertas_recibida ON alertas (recibida);
+"""
+
+FILTROS = {"event_id": "event_id = ?", "zona": "zona = ?", "nivel": "nivel = ?", "desde": "recibida >= ?", "hasta": "recibida < ?"}
+
+
+def _to_epoch(valor):
+    """Acepta segundos epoch o una fecha ISO ("2025-06-01T10:00:00")."""
+    try:
+        return float(valor)
+    except ValueError:
+        return datetime.fromisoformat(valor).timestamp()
+
+
+def _seccion(alerta, clave):
+    """Sub-objeto de la alerta (null cuenta como vacío). ValueError si no es un objeto JSON."""
+    valor = alerta.get(clave)
+    if valor is None:
+        return {}
+    if not isinstance(valor, dict):
+        raise ValueError(f"'{clave}' debe ser un objeto")
+    return valor
+
+
+def alert_row(alerta, recibida):
+    """Fila de la tabla alertas. ValueError si la alerta está mal formada."""
+    alerta = alerta if isinstance(alerta, dict) else {"valor": alerta}
+    location_details, threat_assessment = _seccion(alerta, "location_details"), _seccion(alerta, "threat_assessment")
+    return (alerta.get("event_id"), recibida, alerta.get("timestamp_event"),
+            location_details.get("zone_name") or alerta.get("location_reported"),
+            threat_assessment.get("initial_level"),
+            threat_assessment.get("priority_score"),
+            json.dumps(alerta, ensure_ascii=False, separators=(",", ":")))
+
+
+class LogDBStore:
+    """Almacén persistente de alertas de LogDB: escritura por lotes en segundo plano y consulta paginada."""
+
+    def __init__(self, db_path, batch_size=500, flush_interval_seconds=0.2):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self._queue = queue.Queue()
+        self.descartadas = 0 # Alertas de lotes que no se pudieron escribir
+        self._write_conn = self._connect()
+        self._write_conn.executescript(SCHEMA)
+        self._read_conn = self._connect()
+        self._read_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="LogDBWriter", daemon=True)
+        self._thread.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def submit(self, alertas):
+        """Encola una o varias alertas para guardarlas (no bloquea). Si alguna está mal formada (ValueError), no se encola ninguna."""
+        recibida = time.time()
+        filas = [alert_row(alerta, recibida) for alerta in alertas]
+        for fila in filas:
+            self._queue.put(fila)
+
+    def _run(self):
+        stop = False
+        while not stop:
+            item = self._queue.get()
+            batch = []
+            deadline = time.monotonic() + self.flush_interval_seconds
+            while True:
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            if batch:
+                self._write_batch(batch)
+        self._write_conn.close()
+
+    def _write_batch(self, batch):
+        """Escribe un lote en una transacción. Un error no detiene el hilo: se reintenta y, si sigue fallando, se descarta el lote."""
+        for intento in range(1, WRITE_ATTEMPTS + 1):
+            try:
+                with self._write_conn: # Una transacción por lote
+                    self._write_conn.executemany(
+                        "INSERT INTO alertas (event_id, recibida, timestamp_event, zona, nivel, prioridad, payload) VALUES (?, ?, ?, ?, ?, ?, ?)", batch)
+                return
+            except sqlite3.OperationalError as e: # Bloqueo o disco: puede ser transitorio
+                if intento == WRITE_ATTEMPTS:
+                    log.error("No se pudo guardar un lote de %d alertas en LogDB tras %d intentos: %s", len(batch), intento, e)
+                else:
+                    time.sleep(0.5 * intento)
+            except sqlite3.Error as e:
+                log.error("No se pudo guardar un lote de %d alertas en LogDB: %s", len(batch), e)
+                break
+        self.descartadas += len(batch)
+
+    def consultar(self, filtros=None, limite=50, antes_de_id=None):
+        """Alertas más recientes primero. Para la página siguiente, pasar antes_de_id = siguiente_antes_de_id."""
+        condiciones, parametros = [], []
+        for nombre, valor in (filtros or {}).items():
+            if nombre in FILTROS and valor not in (None, ""):
+                condiciones.append(FILTROS[nombre])
+                parametros.append(_to_epoch(valor) if nombre in ("desde", "hasta") else valor)
+        if antes_de_id is not None:
+            condiciones.append("id < ?")
+            parametros.append(int(antes_de_id))
+        limite = max(1, min(int(limite), MAX_PAGE_SIZE))
+        sql = "SELECT id, recibida, payload FROM alertas"
+        if condiciones:
+            sql += " WHERE " + " AND ".join(condiciones)
+        sql += " ORDER BY id DESC LIMIT ?"
+        with self._read_lock:
+            filas = self._read_conn.execute(sql, parametros + [limite]).fetchall()
+        return {
+            "alertas": [{"id": fila[0], "recibida": datetime.fromtimestamp(fila[1]).isoformat(), "alerta": json.loads(fila[2])} for fila in filas],
+            "siguiente_antes_de_id": filas[-1][0] if len(filas) == limite else None,
+        }
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+        with self._read_lock:
+            self._read_conn.close()
@@ -0,0 +1,260 @@
+# endpoints/receptor_app.py (RECEPTOR ÚNICO DE ALERTAS PARA TODOS LOS DESTINOS)
+#
+# Sustituye a las cuatro apps Flask (sonic/tails/knuckles/logdb): un solo bucle asyncio
+# sirve todos los destinos de bot_notificador.endpoints, ya sea cada héroe en su puerto
+# (http://127.0.0.1:5001/alert, ...) o todos en un puerto con rutas distintas
+# (http://127.0.0.1:5001/alert/sonic, ...). HTTP/1.1 mínimo con keep-alive.
+# En Linux se pueden lanzar varios procesos (workers) sobre los mismos puertos con SO_REUSEPORT.
+# Las alertas de LogDB se guardan en logdb_store.py y se consultan por HTTP en el mismo puerto:
+#   POST /alerts/bulk  (lista JSON de alertas)
+#   GET  /alerts?zona=...&nivel=...&event_id=...&desde=...&hasta=...&limite=50&antes_de_id=...
+
+import asyncio
+import json
+import multiprocessing
+import signal
+import socket
+import sys
+from datetime import datetime
+from urllib.parse import parse_qs, urlsplit
+
+from logdb_store import LogDBStore
+
+MAX_BODY_BYTES = 10 * 1024 * 1024
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 411: "Length Required", 413: "Payload Too Large", 503: "Service Unavailable"}
+
+
+def log_to_console(message, worker_id=0):
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    sys.stdout.write(f"[{timestamp}] [Receptor #{worker_id}] {message}\n")
+
+
+def load_receptor_config(config_path="config.json"):
+    try:
+        with open(config_path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+    except (OSError, ValueError) as e:
+        log_to_console(f"No se pudo cargar {config_path}: {e}. Usando endpoints por defecto.")
+        config = {}
+    endpoints = config.get("bot_notificador", {}).get("endpoints") or {
+        "Sonic": "http://127.0.0.1:5001/alert", "Knuckles": "http://127.0.0.1:5002/alert",
+        "Tails": "http://127.0.0.1:5003/alert", "LogDB": "http://127.0.0.1:5004/alert"
+    }
+    cfg_receptor = {"workers": 1, "log_mode": "alerta", "summary_interval_seconds": 5,
+                    "logdb": {"destination": "LogDB", "db_path": "", "bulk_path": "/alerts/bulk", "query_path": "/alerts"}}
+    for key, value in config.get("endpoints_receptor", {}).items():
+        if isinstance(value, dict) and isinstance(cfg_receptor.get(key), dict):
+            cfg_receptor[key].update(value)
+        else:
+            cfg_receptor[key] = value
+    return endpoints, cfg_receptor
+
+
+def build_routes(endpoints):
+    """Agrupa los destinos por (host, puerto): {(host, puerto): {ruta: destino}}."""
+    routes = {}
+    for dest, url in endpoints.items():
+        parts = urlsplit(url)
+        routes.setdefault((parts.hostname or "127.0.0.1", parts.port or 80), {})[parts.path or "/"] = dest
+    return routes
+
+
+class ReceptorAlertas:
+    """Atiende las peticiones POST de las rutas configuradas y registra cada alerta en una línea."""
+
+    def __init__(self, routes, log_mode="alerta", summary_interval_seconds=5, worker_id=0, logdb_store=None, cfg_logdb=None):
+        self.routes = routes
+        self.logdb_store = logdb_store # None: LogDB solo registra en consola, como los demás destinos
+        self.cfg_logdb = cfg_logdb or {}
+        self.log_mode = log_mode # "alerta": una línea por alerta, "resumen": solo contadores periódicos, "ninguno"
+        self.summary_interval_seconds = summary_interval_seconds
+        self.worker_id = worker_id
+        self.received = {dest: 0 for paths in routes.values() for dest in paths.values()}
+
+    def log_alert(self, dest, data):
+        if self.log_mode != "alerta":
+            return
+        if not isinstance(data, dict):
+            data = {}
+        event_id = data.get("event_id", "?")
+        threat = data.get("threat_assessment") or {}
+        threat = threat.get("initial_level", "?") if isinstance(threat, dict) else "?"
+        location = data.get("location_reported", "?")
+        log_to_console(f"[{dest}] Alerta {event_id} (nivel: {threat}, ubicación: {location})", self.worker_id)
+
+    async def handle_connection(self, reader, writer, paths):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                request_line, *header_lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = request_line.split(" ", 2)
+                except ValueError:
+                    await self.respond(writer, 400, "Bad Request", keep_alive=False)
+                    break
+                headers = {}
+                for line in header_lines:
+                    if ":" in line:
+                        name, value = line.split(":", 1)
+                        headers[name.strip().lower()] = value.strip()
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+
+                if "chunked" in headers.get("transfer-encoding", "").lower():
+                    await self.respond(writer, 411, "Length Required", keep_alive=False)
+                    break
+                try:
+                    length = int(headers.get("content-length", 0) or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await self.respond(writer, 400, "Bad Request", keep_alive=False)
+                    break
+                if length > MAX_BODY_BYTES:
+                    await self.respond(writer, 413, "Payload Too Large", keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                status, text, content_type = await self.dispatch(method, target, body, paths)
+                await self.respond(writer, status, text, keep_alive, content_type)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, method, target, body, paths):
+        """Devuelve (status, cuerpo, content-type) para una petición ya leída."""
+        parts = urlsplit(target)
+        dest = paths.get(parts.path)
+        logdb_dest = self.cfg_logdb.get("destination", "LogDB")
+        if dest is None and self.logdb_store is not None and logdb_dest in paths.values():
+            if parts.path == self.cfg_logdb.get("query_path") and method == "GET":
+                return await self.query_logdb(parts.query)
+            if parts.path == self.cfg_logdb.get("bulk_path") and method == "POST":
+                return self.ingest_bulk(logdb_dest, body)
+        if dest is None:
+            return 404, "Not Found", "text/plain"
+        if method != "POST":
+            return 405, "Method Not Allowed", "text/plain"
+        try:
+            data = json.loads(body) if body else {}
+        except ValueError:
+            return 400, "JSON no válido", "text/plain"
+        if dest == logdb_dest and self.logdb_store is not None:
+            try:
+                self.logdb_store.submit([data])
+            except ValueError as e:
+                return 400, f"Alerta no válida: {e}", "text/plain"
+        self.received[dest] += 1
+        self.log_alert(dest, data)
+        return 200, f"OK_{dest.upper()}", "text/plain"
+
+    def ingest_bulk(self, dest, body):
+        try:
+            data = json.loads(body) if body else []
+        except ValueError:
+            return 400, "JSON no válido", "text/plain"
+        alertas = data.get("alertas", []) if isinstance(data, dict) else data
+        if not isinstance(alertas, list):
+            return 400, "Se esperaba una lista de alertas", "text/plain"
+        try:
+            self.logdb_store.submit(alertas)
+        except ValueError as e:
+            return 400, f"Alerta no válida: {e}", "text/plain"
+        self.received[dest] += len(alertas)
+        if self.log_mode == "alerta":
+            log_to_console(f"[{dest}] Lote de {len(alertas)} alertas", self.worker_id)
+        return 200, json.dumps({"status": f"OK_{dest.upper()}", "recibidas": len(alertas)}), "application/json"
+
+    async def query_logdb(self, query_string):
+        params = {name: values[-1] for name, values in parse_qs(query_string).items()}
+        try:
+            limite = int(params.pop("limite", 50))
+            antes_de_id = params.pop("antes_de_id", None)
+            # SQLite bloquea: la consulta corre en el pool de hilos del bucle
+            resultado = await asyncio.get_running_loop().run_in_executor(None, self.logdb_store.consultar, params, limite, antes_de_id)
+        except ValueError as e:
+            return 400, f"Parámetros de consulta no válidos: {e}", "text/plain"
+        return 200, json.dumps(resultado, ensure_ascii=False), "application/json"
+
+    async def respond(self, writer, status, text, keep_alive=True, content_type="text/plain"):
+        body = text.encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+            f"Content-Type: {content_type}; charset=utf-8\r\nContent-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + body)
+        await writer.drain()
+
+    async def log_summary(self):
+        last = dict(self.received)
+        while True:
+            await asyncio.sleep(self.summary_interval_seconds)
+            current = dict(self.received)
+            delta = {dest: current[dest] - last[dest] for dest in current if current[dest] != last[dest]}
+            last = current
+            if delta:
+                total = sum(delta.values())
+                log_to_console(f"{total} alertas en {self.summary_interval_seconds}s ({total / self.summary_interval_seconds:.0f}/s): "
+                               + ", ".join(f"{dest}={n}" for dest, n in delta.items()), self.worker_id)
+            sys.stdout.flush()
+
+    async def serve(self, reuse_port=False):
+        servers = []
+        for (host, port), paths in self.routes.items():
+            server = await asyncio.start_server(lambda r, w, paths=paths: self.handle_connection(r, w, paths),
+                                                host, port, reuse_port=reuse_port or None, backlog=1024)
+            servers.append(server)
+            log_to_console(f"Escuchando en http://{host}:{port} -> " + ", ".join(f"{path}: {dest}" for path, dest in paths.items()), self.worker_id)
+        sys.stdout.flush()
+        if self.log_mode != "ninguno":
+            asyncio.get_running_loop().create_task(self.log_summary())
+        await asyncio.gather(*(server.serve_forever() for server in servers))
+
+
+def run_worker(routes, cfg_receptor, worker_id=0, reuse_port=False):
+    cfg_logdb = cfg_receptor["logdb"]
+    logdb_store = LogDBStore(cfg_logdb["db_path"]) if cfg_logdb.get("db_path") else None
+    receptor = ReceptorAlertas(routes, cfg_receptor["log_mode"], cfg_receptor["summary_interval_seconds"], worker_id,
+                               logdb_store, cfg_logdb)
+    try:
+        asyncio.run(receptor.serve(reuse_port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if logdb_store is not None:
+            logdb_store.close() # Guarda el último lote pendiente
+
+
+def main(workers=None):
+    endpoints, cfg_receptor = load_receptor_config()
+    routes = build_routes(endpoints)
+    workers = max(1, int(workers or cfg_receptor["workers"]))
+    if workers > 1 and not hasattr(socket, "SO_REUSEPORT"):
+        log_to_console("SO_REUSEPORT no disponible en este sistema. Usando un solo worker.")
+        workers = 1
+    if workers == 1:
+        run_worker(routes, cfg_receptor)
+        return
+
+    processes = [multiprocessing.Process(target=run_worker, args=(routes, cfg_receptor, worker_id, True), daemon=True)
+                 for worker_id in range(workers)]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        log_to_console("Deteniendo workers del receptor...")
+        signal.signal(signal.SIGINT, signal.SIG_IGN) # Un segundo Ctrl+C no interrumpe la espera
+        for process in processes:
+            process.join(timeout=5) # Cada worker recibe también el Ctrl+C y guarda sus alertas pendientes
+            if process.is_alive():
+                process.terminate()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -0,0 +1,154 @@
+# eventos.py (MODELO DE EVENTOS DEL PIPELINE)
+#
+# Los eventos que pasan entre los bots son registros con __slots__ y un esquema explícito
+# por etapa: EventoMonitor (BotMonitor), EventoCanonico (BotAnalizador), EventoEnriquecido
+# (BotEnriquecedor) y Enrutamiento (BotDecisionTactica / BotNotificador). Admiten el acceso
+# de un dict (evento["event_id"], evento.get(...), "campo" in evento), así que el código que
+# también recibe dicts (simulación, benchmark) sigue igual; un campo sin valor (None) se
+# comporta como una clave que no existe.
+#
+# Cada registro guarda su codificación JSON compacta (bytes) y la reutiliza en todos los
+# destinos: reporte, POST al dashboard y un envío por héroe. Asignar un campo la invalida.
+# Los campos VOLATILES (dicts compartidos que otras etapas actualizan en su sitio, como el
+# contador de ocurrencias del deduplicador) y los ANIDADOS (otro evento) no se guardan: se
+# añaden al serializar. Con orjson instalado se usa para serializar; si no, json.
+
+import json
+
+try:
+    import orjson
+except ImportError: # Opcional: solo acelera la serialización
+    orjson = None
+
+
+def _por_defecto(obj):
+    if isinstance(obj, RegistroEvento):
+        return obj.a_dict()
+    raise TypeError(f"{type(obj).__name__} no es serializable a JSON")
+
+
+def dumps_compacto(obj):
+    """JSON compacto en UTF-8 (bytes), con orjson si está disponible."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_por_defecto)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_por_defecto).encode("utf-8")
+
+
+def codificar(evento):
+    """Cuerpo JSON de un evento: la codificación cacheada si es un registro, o se serializa si es un dict."""
+    return evento.a_json() if isinstance(evento, RegistroEvento) else dumps_compacto(evento)
+
+
+def a_dict(evento):
+    """Copia como dict (con los eventos anidados también como dict), para lo que necesita un dict de verdad."""
+    if isinstance(evento, RegistroEvento):
+        return evento.a_dict()
+    return {clave: (valor.a_dict() if isinstance(valor, RegistroEvento) else valor) for clave, valor in (evento or {}).items()}
+
+
+class RegistroEvento:
+    """Base de los eventos: campos en __slots__, acceso tipo dict y codificación JSON cacheada."""
+
+    __slots__ = ("_json",)
+    CAMPOS = () # Todos los campos, incluidos los de las clases base (se calcula en cada subclase)
+    VOLATILES = ()
+    ANIDADOS = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.CAMPOS = tuple(campo for clase in reversed(cls.__mro__) for campo in clase.__dict__.get("__slots__", ()) if campo != "_json")
+        cls._CACHEABLES = tuple(campo for campo in cls.CAMPOS if campo not in cls.VOLATILES and campo not in cls.ANIDADOS)
+        cls._DINAMICOS = tuple(campo for campo in cls.CAMPOS if campo in cls.VOLATILES or campo in cls.ANIDADOS)
+
+    def __init__(self, **campos):
+        for campo in self.CAMPOS:
+            object.__setattr__(self, campo, campos.pop(campo, None))
+        if campos:
+            raise TypeError(f"{type(self).__name__}: campos desconocidos {sorted(campos)}")
+        object.__setattr__(self, "_json", None)
+
+    @classmethod
+    def desde(cls, evento, **campos):
+        """Nuevo registro con los campos de evento (registro o dict) que existan en esta clase, sin copiar su contenido."""
+        datos = {campo: evento.get(campo) for campo in cls.CAMPOS if evento.get(campo) is not None}
+        datos.update(campos)
+        return cls(**datos)
+
+    def __setattr__(self, campo, valor):
+        object.__setattr__(self, campo, valor)
+        if campo not in self.VOLATILES:
+            object.__setattr__(self, "_json", None)
+
+    def __getitem__(self, campo):
+        valor = getattr(self, campo, None) if campo in self.CAMPOS else None
+        if valor is None:
+            raise KeyError(campo)
+        return valor
+
+    def __setitem__(self, campo, valor):
+        if campo not in self.CAMPOS:
+            raise KeyError(f"{type(self).__name__} no tiene el campo '{campo}'")
+        setattr(self, campo, valor)
+
+    def __contains__(self, campo):
+        return campo in self.CAMPOS and getattr(self, campo) is not None
+
+    def get(self, campo, default=None):
+        valor = getattr(self, campo, None) if campo in self.CAMPOS else None
+        return default if valor is None else valor
+
+    def keys(self):
+        return [campo for campo in self.CAMPOS if getattr(self, campo) is not None]
+
+    def a_dict(self):
+        datos = {}
+        for campo in self.CAMPOS:
+            valor = getattr(self, campo)
+            if valor is not None:
+                datos[campo] = valor.a_dict() if isinstance(valor, RegistroEvento) else valor
+        return datos
+
+    def a_json(self):
+        """Codificación JSON compacta (bytes). Se calcula una vez; solo los campos volátiles y anidados se añaden en cada llamada."""
+        cuerpo = self._json
+        if cuerpo is None:
+            valores = ((campo, getattr(self, campo)) for campo in self._CACHEABLES)
+            cuerpo = dumps_compacto({campo: valor for campo, valor in valores if valor is not None})
+            object.__setattr__(self, "_json", cuerpo)
+        extras = [(campo, codificar(getattr(self, campo))) for campo in self._DINAMICOS if getattr(self, campo) is not None]
+        if not extras:
+            return cuerpo
+        partes = [cuerpo[:-1]] # Sin la llave de cierre
+        separador = b"," if len(cuerpo) > 2 else b""
+        for campo, valor in extras:
+            partes += [separador, b'"', campo.encode("ascii"), b'":', valor]
+            separador = b","
+        partes.append(b"}")
+        return b"".join(partes)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.a_dict()!r})"
+
+
+class EventoMonitor(RegistroEvento):
+    """Salida de BotMonitor: lo leído de la fuente, sin normalizar."""
+    __slots__ = ("event_id", "session_id", "timestamp_raw", "source_system", "source_type_tag",
+                 "detected_location_raw", "threat_level_raw", "description_raw", "raw_payload")
+
+
+class EventoCanonico(RegistroEvento):
+    """Salida de BotAnalizador (y BotDeduplicador): modelo canónico con la evaluación de la amenaza."""
+    __slots__ = ("event_id", "session_id", "timestamp_event", "source_system_name", "source_type",
+                 "location_reported", "threat_assessment", "original_raw_data", "agregado")
+    VOLATILES = ("agregado",) # El deduplicador suma ocurrencias en el mismo dict mientras la alerta sigue en curso
+
+
+class EventoEnriquecido(EventoCanonico):
+    """Salida de BotEnriquecedor: el evento canónico más el contexto de la zona (y el estado del juego al decidir)."""
+    __slots__ = ("location_details", "urgency_level", "game_state")
+
+
+class Enrutamiento(RegistroEvento):
+    """Salida de BotDecisionTactica: destinos de la alerta, y tras BotNotificador el resultado de cada envío."""
+    __slots__ = ("event_id", "target_destinations", "user_decision", "decision_type", "alert_payload_to_send", "delivery_results")
+    ANIDADOS = ("alert_payload_to_send",)
@@ -0,0 +1,120 @@
+# indice_ubicaciones.py (ÍNDICE DE UBICACIONES PARA BotEnriquecedor)
+#
+# Se construye una vez al cargar la configuración a partir de la base de conocimiento.
+# Resuelve la ubicación reportada por las fuentes aunque venga con otras mayúsculas,
+# espacios de más, acentos o un alias ("Central City" -> "G.U.N. HQ"):
+#   1. clave normalizada exacta o alias (dict, O(1))
+#   2. prefijo que identifica una única zona en un trie de nombres normalizados (O(longitud):
+#      cada nodo guarda la única zona que hay debajo, o None si hay varias)
+#   3. todas las palabras presentes en el índice invertido de tokens
+#   4. coincidencia aproximada (difflib) con caché LRU acotada
+# También responde "qué zonas tienen al héroe X cerca".
+
+import difflib
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+
+MIN_PREFIX_LENGTH = 3 # Prefijos más cortos son demasiado ambiguos ("a" -> "Angel Island")
+ZONA = "#" # Clave del nodo del trie con su zona (los nombres normalizados solo tienen [a-z0-9 ])
+
+
+def normalizar(texto):
+    """Minúsculas, sin acentos, sin puntos ni apóstrofes y con los espacios colapsados."""
+    texto = unicodedata.normalize("NFKD", str(texto or ""))
+    texto = "".join(c for c in texto if not unicodedata.combining(c)).lower()
+    texto = re.sub(r"[.'’`]", "", texto) # "G.U.N. HQ" -> "gun hq", "Tails' Workshop" -> "tails workshop"
+    texto = re.sub(r"[^a-z0-9]+", " ", texto)
+    return " ".join(texto.split())
+
+
+class IndiceUbicaciones:
+    """Índice precomputado sobre la base de conocimiento: nombre/alias -> clave de la zona."""
+
+    def __init__(self, knowledge_base, aliases=None, fuzzy_cutoff=0.8, fuzzy_cache_size=1024):
+        self.knowledge_base = knowledge_base
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self.fuzzy_cache_size = fuzzy_cache_size
+        self._por_nombre = {} # nombre normalizado -> clave en knowledge_base
+        self._trie = {} # carácter -> nodo; en cada nodo, ZONA -> única zona bajo ese prefijo (None si hay varias)
+        self._tokens = {} # token -> {nombres normalizados que lo contienen}
+        self._por_heroe = {} # héroe normalizado -> [claves de zona]
+        self._fuzzy_cache = OrderedDict()
+        self._lock = threading.Lock()
+
+        for key, info in knowledge_base.items():
+            self._registrar(key, key)
+            zone_name = info.get("zone_name", "")
+            self._registrar(zone_name, key)
+            for parte in zone_name.split(" - "): # "Central City - G.U.N. HQ" -> "Central City", "G.U.N. HQ"
+                self._registrar(parte, key)
+            for alias in info.get("aliases", []):
+                self._registrar(alias, key)
+            for hero in info.get("nearby_heroes", []):
+                self._por_heroe.setdefault(normalizar(hero), []).append(key)
+        for alias, key in (aliases or {}).items():
+            if key in knowledge_base:
+                self._registrar(alias, key)
+
+    def _registrar(self, nombre, key):
+        nombre_norm = normalizar(nombre)
+        if not nombre_norm or nombre_norm in self._por_nombre:
+            return
+        self._por_nombre[nombre_norm] = key
+        nodo = self._trie
+        for c in nombre_norm:
+            nodo = nodo.setdefault(c, {})
+            nodo[ZONA] = key if nodo.get(ZONA, key) == key else None
+        for token in nombre_norm.split():
+            self._tokens.setdefault(token, set()).add(nombre_norm)
+
+    def _por_prefijo(self, consulta):
+        if len(consulta) < MIN_PREFIX_LENGTH:
+            return None
+        nodo = self._trie
+        for c in consulta:
+            nodo = nodo.get(c)
+            if nodo is None:
+                return None
+        return nodo[ZONA] # Solo si el prefijo identifica una única zona
+
+    def _por_tokens(self, consulta):
+        conjuntos = [self._tokens.get(token) for token in consulta.split()]
+        if not conjuntos or any(c is None for c in conjuntos):
+            return None
+        nombres = set.intersection(*conjuntos)
+        if not nombres:
+            return None
+        return self._por_nombre[min(nombres, key=lambda n: (len(n), n))] # El nombre más corto que contiene todas las palabras
+
+    def _aproximada(self, consulta):
+        with self._lock:
+            if consulta in self._fuzzy_cache:
+                self._fuzzy_cache.move_to_end(consulta)
+                return self._fuzzy_cache[consulta]
+        coincidencias = difflib.get_close_matches(consulta, self._por_nombre.keys(), n=1, cutoff=self.fuzzy_cutoff)
+        key = self._por_nombre[coincidencias[0]] if coincidencias else None
+        with self._lock:
+            self._fuzzy_cache[consulta] = key
+            if len(self._fuzzy_cache) > self.fuzzy_cache_size:
+                self._fuzzy_cache.popitem(last=False)
+        return key
+
+    def resolver(self, ubicacion):
+        """Devuelve (clave de la zona, tipo de coincidencia) o (None, None) si no se reconoce."""
+        consulta = normalizar(ubicacion)
+        if not consulta:
+            return None, None
+        key = self._por_nombre.get(consulta)
+        if key is not None:
+            return key, "exacta"
+        for tipo, buscar in (("prefijo", self._por_prefijo), ("tokens", self._por_tokens), ("aproximada", self._aproximada)):
+            key = buscar(consulta)
+            if key is not None:
+                return key, tipo
+        return None, None
+
+    def zonas_con_heroe(self, hero):
+        """Claves de las zonas que tienen al héroe entre sus nearby_heroes."""
+        return list(self._por_heroe.get(normalizar(hero), []))
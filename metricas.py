@@ -0,0 +1,195 @@
+# metricas.py (INSTRUMENTACIÓN DEL PIPELINE)
+#
+# Histogramas de latencia, contadores y gauges en memoria, seguros entre hilos.
+# bots.py mide cada etapa, la latencia de extremo a extremo de cada evento, la espera
+# de la decisión (jugador o timeout) y los envíos del notificador por destino; publica
+# una instantánea periódica en el dashboard, que la expone en /metrics.
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+# Límites superiores de los buckets en milisegundos (aprox. x2.5 entre buckets, de 0.1 ms a 5 minutos)
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000, 60000, 120000, 300000)
+
+
+class Histograma:
+    """Histograma de buckets fijos: registrar es O(log buckets) y la memoria no crece con las muestras."""
+
+    def __init__(self, limites=BUCKETS_MS):
+        self.limites = limites
+        self.buckets = [0] * (len(limites) + 1) # El último es +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observar(self, valor):
+        self.buckets[bisect.bisect_left(self.limites, valor)] += 1
+        self.count += 1
+        self.sum += valor
+        self.min = valor if self.min is None else min(self.min, valor)
+        self.max = valor if self.max is None else max(self.max, valor)
+
+    def percentil(self, p):
+        """Estimación por interpolación lineal dentro del bucket que contiene el percentil p (0-100)."""
+        if not self.count:
+            return None
+        objetivo = self.count * p / 100.0
+        acumulado = 0
+        for index, n in enumerate(self.buckets):
+            if n and acumulado + n >= objetivo:
+                inferior = self.limites[index - 1] if index > 0 else 0
+                superior = self.limites[index] if index < len(self.limites) else self.max
+                estimado = inferior + (superior - inferior) * (objetivo - acumulado) / n
+                return round(min(max(estimado, self.min), self.max), 2)
+            acumulado += n
+        return self.max
+
+    def snapshot(self):
+        acumulado, buckets = 0, []
+        for limite, n in zip(list(self.limites) + ["+Inf"], self.buckets):
+            acumulado += n
+            buckets.append([limite, acumulado])
+        return {"count": self.count, "sum": round(self.sum, 3), "min": self.min, "max": self.max,
+                "p50": self.percentil(50), "p95": self.percentil(95), "p99": self.percentil(99), "buckets": buckets}
+
+
+def _clave(nombre, etiquetas):
+    return nombre, tuple(sorted(etiquetas.items()))
+
+
+class Metricas:
+    """Registro de métricas con etiquetas: metricas.observar("etapa_latencia_ms", 12.3, etapa="BotAnalizador")."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histogramas = {}
+        self._contadores = {}
+        self._gauges = {} # clave -> función que devuelve el valor actual (se lee al tomar la instantánea)
+        self._inicio_eventos = {}
+
+    def observar(self, nombre, valor_ms, **etiquetas):
+        clave = _clave(nombre, etiquetas)
+        with self._lock:
+            histograma = self._histogramas.get(clave)
+            if histograma is None:
+                histograma = self._histogramas[clave] = Histograma()
+            histograma.observar(valor_ms)
+
+    def incrementar(self, nombre, n=1, **etiquetas):
+        clave = _clave(nombre, etiquetas)
+        with self._lock:
+            self._contadores[clave] = self._contadores.get(clave, 0) + n
+
+    def registrar_gauge(self, nombre, funcion, **etiquetas):
+        with self._lock:
+            self._gauges[_clave(nombre, etiquetas)] = funcion
+
+    def quitar_gauge(self, nombre, **etiquetas):
+        with self._lock:
+            self._gauges.pop(_clave(nombre, etiquetas), None)
+
+    @contextmanager
+    def cronometro(self, nombre, **etiquetas):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(nombre, (time.perf_counter() - inicio) * 1000, **etiquetas)
+
+    def medir(self, nombre, **etiquetas):
+        """Decorador: registra la duración de cada llamada en el histograma nombre."""
+        def decorador(funcion):
+            @wraps(funcion)
+            def envoltorio(*args, **kwargs):
+                with self.cronometro(nombre, **etiquetas):
+                    return funcion(*args, **kwargs)
+            return envoltorio
+        return decorador
+
+    def iniciar_evento(self, event_id):
+        with self._lock:
+            self._inicio_eventos[event_id] = time.perf_counter()
+
+    def finalizar_evento(self, event_id, nombre="evento_latencia_total_ms"):
+        with self._lock:
+            inicio = self._inicio_eventos.pop(event_id, None)
+        if inicio is not None:
+            self.observar(nombre, (time.perf_counter() - inicio) * 1000)
+
+    def eventos_en_curso(self):
+        with self._lock:
+            return len(self._inicio_eventos)
+
+    def snapshot(self):
+        with self._lock:
+            histogramas = [(clave, h.snapshot()) for clave, h in self._histogramas.items()]
+            contadores = list(self._contadores.items())
+            gauges = list(self._gauges.items())
+        valores_gauges = []
+        for clave, funcion in gauges:
+            try:
+                valores_gauges.append((clave, funcion()))
+            except Exception:
+                continue
+        empaquetar = lambda clave, **datos: {"nombre": clave[0], "etiquetas": dict(clave[1]), **datos}
+        return {
+            "generado": time.time(),
+            "histogramas": [empaquetar(clave, **datos) for clave, datos in histogramas],
+            "contadores": [empaquetar(clave, valor=valor) for clave, valor in contadores],
+            "gauges": [empaquetar(clave, valor=valor) for clave, valor in valores_gauges],
+        }
+
+    def reset(self):
+        with self._lock:
+            self._histogramas.clear()
+            self._contadores.clear()
+            self._inicio_eventos.clear()
+
+
+def _etiquetas_prometheus(etiquetas, extra=None):
+    todas = dict(etiquetas, **(extra or {}))
+    if not todas:
+        return ""
+    return "{" + ",".join(f'{k}="{str(v).replace(chr(34), chr(39))}"' for k, v in sorted(todas.items())) + "}"
+
+
+def formato_prometheus(snapshot, prefijo="hedgehog_"):
+    """Convierte una instantánea de Metricas al formato de texto de Prometheus."""
+    lineas, tipos = [], set()
+    def tipo(nombre, clase):
+        if nombre not in tipos:
+            tipos.add(nombre)
+            lineas.append(f"# TYPE {nombre} {clase}")
+    for gauge in snapshot.get("gauges", []):
+        nombre = prefijo + gauge["nombre"]
+        tipo(nombre, "gauge")
+        lineas.append(f"{nombre}{_etiquetas_prometheus(gauge['etiquetas'])} {gauge['valor']}")
+    for contador in snapshot.get("contadores", []):
+        nombre = prefijo + contador["nombre"]
+        tipo(nombre, "counter")
+        lineas.append(f"{nombre}{_etiquetas_prometheus(contador['etiquetas'])} {contador['valor']}")
+    for histograma in snapshot.get("histogramas", []):
+        nombre = prefijo + histograma["nombre"]
+        tipo(nombre, "histogram")
+        for limite, acumulado in histograma["buckets"]:
+            lineas.append(f"{nombre}_bucket{_etiquetas_prometheus(histograma['etiquetas'], {'le': limite})} {acumulado}")
+        lineas.append(f"{nombre}_sum{_etiquetas_prometheus(histograma['etiquetas'])} {histograma['sum']}")
+        lineas.append(f"{nombre}_count{_etiquetas_prometheus(histograma['etiquetas'])} {histograma['count']}")
+    return "\n".join(lineas) + "\n"
+
+
+def resumen_texto(snapshot):
+    """Resumen de una línea por histograma (n, p50/p95/p99) más contadores y gauges."""
+    lineas = []
+    for h in sorted(snapshot.get("histogramas", []), key=lambda h: (h["nombre"], sorted(h["etiquetas"].items()))):
+        etiquetas = ",".join(f"{k}={v}" for k, v in sorted(h["etiquetas"].items()))
+        lineas.append(f"{h['nombre']}[{etiquetas}] n={h['count']} p50={h['p50']}ms p95={h['p95']}ms p99={h['p99']}ms max={h['max'] and round(h['max'], 1)}ms")
+    valores = [f"{m['nombre']}[{','.join(f'{k}={v}' for k, v in sorted(m['etiquetas'].items()))}]={m['valor']}"
+               for m in snapshot.get("contadores", []) + snapshot.get("gauges", [])]
+    if valores:
+        lineas.append(" ".join(valores))
+    return lineas
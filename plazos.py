@@ -0,0 +1,106 @@
+# plazos.py (RUEDA DE PLAZOS DE DECISIÓN)
+#
+# Cada alerta pendiente tiene un plazo; al vencer se toma la decisión automática. En lugar de
+# una espera por alerta, todos los plazos viven en una rueda de temporizadores hash: una lista
+# circular de ranuras de resolucion_seconds en la que cada plazo cae en la ranura de su tick.
+# Un único hilo avanza la rueda cada resolución y solo mira la ranura actual, así que programar,
+# cancelar y disparar cuestan O(1) aunque haya miles de plazos pendientes. Cada plazo se
+# dispara una sola vez y se puede cancelar (p. ej. cuando el jugador decide antes).
+
+import logging
+import math
+import threading
+
+from reloj import RELOJ_SISTEMA
+
+log = logging.getLogger(__name__)
+
+
+class PlanificadorPlazos:
+    """Rueda de temporizadores: programar(clave, deadline, callback), cancelar(clave) y avanzar()."""
+
+    def __init__(self, resolucion_seconds=0.1, ranuras=1024, reloj=RELOJ_SISTEMA):
+        self.resolucion_seconds = resolucion_seconds
+        self.reloj = reloj
+        self._ranuras = [{} for _ in range(ranuras)] # clave -> (tick, deadline, callback)
+        self._ranura_de = {} # clave -> índice de su ranura
+        self._tick = int(reloj.time() / resolucion_seconds) # Último tick procesado
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        self._hilo = None
+
+    def programar(self, clave, deadline, callback):
+        """(Re)programa el plazo de clave: callback() se llama una sola vez al llegar deadline, salvo que se cancele antes."""
+        with self._lock:
+            self._quitar(clave)
+            tick = max(math.ceil(deadline / self.resolucion_seconds), self._tick + 1)
+            indice = tick % len(self._ranuras)
+            self._ranuras[indice][clave] = (tick, deadline, callback)
+            self._ranura_de[clave] = indice
+
+    def _quitar(self, clave):
+        indice = self._ranura_de.pop(clave, None)
+        if indice is None:
+            return False
+        del self._ranuras[indice][clave]
+        return True
+
+    def cancelar(self, clave):
+        """True si el plazo estaba pendiente (ya no se disparará)."""
+        with self._lock:
+            return self._quitar(clave)
+
+    def cancelar_prefijo(self, prefijo):
+        """Cancela los plazos cuyas claves empiezan por prefijo (p. ej. los de una sesión). Devuelve cuántos."""
+        with self._lock:
+            claves = [clave for clave in self._ranura_de if clave.startswith(prefijo)]
+            for clave in claves:
+                self._quitar(clave)
+            return len(claves)
+
+    def deadline(self, clave):
+        with self._lock:
+            indice = self._ranura_de.get(clave)
+            return None if indice is None else self._ranuras[indice][clave][1]
+
+    def avanzar(self, ahora=None):
+        """Dispara los plazos vencidos hasta ahora. Lo llama el hilo de la rueda; con un reloj virtual, a mano."""
+        hasta = int((self.reloj.time() if ahora is None else ahora) / self.resolucion_seconds)
+        vencidos = []
+        with self._lock:
+            # Si el hilo se retrasó más de una vuelta basta con recorrer cada ranura una vez
+            for tick in range(self._tick + 1, min(hasta, self._tick + len(self._ranuras)) + 1):
+                ranura = self._ranuras[tick % len(self._ranuras)]
+                for clave in [clave for clave, (tick_plazo, _, _) in ranura.items() if tick_plazo <= hasta]:
+                    vencidos.append(ranura.pop(clave)[2])
+                    del self._ranura_de[clave]
+            self._tick = max(self._tick, hasta)
+        for callback in vencidos: # Fuera del lock: el callback puede programar o cancelar otros plazos
+            try:
+                callback()
+            except Exception:
+                log.exception("Error en el callback de un plazo vencido")
+        return len(vencidos)
+
+    def iniciar(self):
+        """Arranca el hilo que avanza la rueda cada resolucion_seconds (solo con el reloj del sistema)."""
+        with self._lock:
+            if self._hilo is not None:
+                return
+            self._parar.clear()
+            self._hilo = threading.Thread(target=self._bucle, name="PlanificadorPlazos", daemon=True)
+            self._hilo.start()
+
+    def _bucle(self):
+        while not self._parar.wait(self.resolucion_seconds):
+            self.avanzar()
+
+    def detener(self):
+        self._parar.set()
+        hilo, self._hilo = self._hilo, None
+        if hilo is not None:
+            hilo.join(timeout=1)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._ranura_de)
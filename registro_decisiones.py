@@ -0,0 +1,119 @@
+# registro_decisiones.py (REGISTRO DE DECISIONES TÁCTICAS)
+#
+# Una sola decisión por event_id: la primera que se registra (clic del jugador o timeout)
+# gana y las demás reciben la decisión vigente. En memoria (dict, búsqueda O(1)) y,
+# opcionalmente, respaldado por SQLite en modo WAL para compartirlo entre el dashboard
+# y bots.py. Las entradas más antiguas que ttl_seconds se purgan solas.
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+PURGE_INTERVAL_SECONDS = 60 # Como mucho una purga de SQLite por minuto
+
+
+class RegistroDecisiones:
+    """Decisiones por event_id con reclamación atómica (compare-and-set) y expiración por TTL."""
+
+    def __init__(self, db_path=None, ttl_seconds=3600):
+        self.db_path = db_path or None
+        self.ttl_seconds = ttl_seconds
+        self._decisiones = OrderedDict() # event_id -> (hora_registro, decisión), en orden de registro
+        self._cond = threading.Condition()
+        self._last_purge = 0.0
+        self._conn = None
+        if self.db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, timeout=5, isolation_level=None, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS decisiones (event_id TEXT PRIMARY KEY, registrada REAL NOT NULL, decision TEXT NOT NULL)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_decisiones_registrada ON decisiones (registrada)")
+
+    def _purgar_expiradas(self, ahora):
+        limite = ahora - self.ttl_seconds
+        while self._decisiones:
+            event_id, (registrada, _) = next(iter(self._decisiones.items()))
+            if registrada >= limite:
+                break
+            del self._decisiones[event_id]
+        if self._conn is not None and ahora - self._last_purge >= PURGE_INTERVAL_SECONDS:
+            self._last_purge = ahora
+            self._conn.execute("DELETE FROM decisiones WHERE registrada < ?", (limite,))
+
+    def reclamar(self, event_id, decision):
+        """Registra la decisión solo si el evento no tiene ninguna. Devuelve (ganada, decisión vigente)."""
+        ahora = time.time()
+        with self._cond:
+            self._purgar_expiradas(ahora)
+            vigente = self._obtener(event_id)
+            if vigente is not None:
+                return False, vigente
+            if self._conn is not None:
+                # Una sola sentencia, atómica también entre procesos: solo inserta (o reemplaza una fila expirada aún no purgada).
+                cursor = self._conn.execute("INSERT INTO decisiones (event_id, registrada, decision) VALUES (?, ?, ?) "
+                                            "ON CONFLICT(event_id) DO UPDATE SET registrada = excluded.registrada, decision = excluded.decision "
+                                            "WHERE decisiones.registrada < ?",
+                                            (event_id, ahora, json.dumps(decision, ensure_ascii=False), ahora - self.ttl_seconds))
+                if cursor.rowcount == 0:
+                    return False, self._obtener(event_id)
+            self._decisiones[event_id] = (ahora, decision)
+            self._cond.notify_all()
+            return True, decision
+
+    def _obtener(self, event_id):
+        entrada = self._decisiones.get(event_id)
+        if entrada is not None:
+            return entrada[1]
+        if self._conn is None:
+            return None
+        fila = self._conn.execute("SELECT registrada, decision FROM decisiones WHERE event_id = ?", (event_id,)).fetchone()
+        if fila is None or fila[0] < time.time() - self.ttl_seconds:
+            return None
+        return json.loads(fila[1]) # Registrada por el otro proceso: no se cachea para respetar el orden por hora
+
+    def obtener(self, event_id):
+        with self._cond:
+            return self._obtener(event_id)
+
+    def __contains__(self, event_id):
+        return self.obtener(event_id) is not None
+
+    def esperar(self, event_id, timeout):
+        """Espera hasta timeout segundos a que se registre una decisión en este proceso."""
+        deadline = time.monotonic() + max(0, timeout)
+        with self._cond:
+            while True:
+                decision = self._obtener(event_id)
+                remaining = deadline - time.monotonic()
+                if decision is not None or remaining <= 0:
+                    return decision
+                self._cond.wait(remaining)
+
+    def limpiar(self, prefijo=None):
+        """Borra todas las decisiones, o solo las de los event_id que empiezan por prefijo."""
+        with self._cond:
+            if prefijo is None:
+                self._decisiones.clear()
+            else:
+                for event_id in [event_id for event_id in self._decisiones if event_id.startswith(prefijo)]:
+                    del self._decisiones[event_id]
+            if self._conn is not None:
+                if prefijo is None:
+                    self._conn.execute("DELETE FROM decisiones")
+                else:
+                    self._conn.execute("DELETE FROM decisiones WHERE substr(event_id, 1, ?) = ?", (len(prefijo), prefijo))
+            self._cond.notify_all()
+
+    def __len__(self):
+        with self._cond:
+            return len(self._decisiones)
+
+    def close(self):
+        with self._cond:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
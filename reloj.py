@@ -0,0 +1,45 @@
+# reloj.py (RELOJES INYECTABLES)
+#
+# El bucle del juego no llama a time.sleep directamente sino a un reloj. El juego real usa
+# el reloj del sistema; la simulación usa un reloj virtual en el que "dormir" solo avanza
+# la hora, así que una partida completa de horas simuladas se juega en milisegundos.
+
+import threading
+import time
+
+
+class RelojSistema:
+    """Reloj real: hora del sistema y esperas de verdad."""
+
+    def time(self):
+        return time.time()
+
+    def monotonic(self):
+        return time.monotonic()
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds)
+
+
+class RelojVirtual:
+    """Reloj simulado: sleep() avanza la hora al instante, sin esperar."""
+
+    def __init__(self, inicio=0.0):
+        self._ahora = float(inicio)
+        self._lock = threading.Lock()
+
+    def time(self):
+        with self._lock:
+            return self._ahora
+
+    monotonic = time
+
+    def sleep(self, seconds):
+        with self._lock:
+            self._ahora += max(0.0, seconds)
+
+    avanzar = sleep
+
+
+RELOJ_SISTEMA = RelojSistema()
@@ -0,0 +1,86 @@
+# reportes_journal.py (DIARIO DE REPORTES DE EVENTOS)
+#
+# Cada evento procesado se guarda como una sola línea JSON compacta en un segmento
+# append-only (reports/journal/segment_NNNNNN.jsonl). Un índice aparte (index.jsonl)
+# guarda event_id -> (segmento, offset, longitud) para leer un reporte con un solo seek.
+# bots.py escribe; el dashboard lee y renderiza el HTML solo cuando alguien lo abre.
+
+import json
+import os
+import threading
+
+SEGMENT_PREFIX = "segment_"
+INDEX_FILENAME = "index.jsonl"
+
+
+class ReportJournal:
+    """Diario segmentado de reportes con índice event_id -> posición."""
+
+    def __init__(self, directory, segment_max_bytes=4 * 1024 * 1024):
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self._index = {}
+        self._index_offset = 0 # Hasta dónde se ha leído index.jsonl (para refrescar de forma incremental)
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._segment_number = self._latest_segment_number()
+
+    def _segment_path(self, number):
+        return os.path.join(self.directory, f"{SEGMENT_PREFIX}{number:06d}.jsonl")
+
+    def _latest_segment_number(self):
+        numbers = [int(name[len(SEGMENT_PREFIX):-len(".jsonl")]) for name in os.listdir(self.directory)
+                   if name.startswith(SEGMENT_PREFIX) and name.endswith(".jsonl")]
+        return max(numbers, default=1)
+
+    def append(self, event_id, record):
+        self.append_json(event_id, json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+    def append_json(self, event_id, record_json):
+        """Como append, pero con el reporte ya serializado (JSON compacto en bytes, sin saltos de línea)."""
+        line = record_json + b"\n"
+        with self._lock:
+            segment_path = self._segment_path(self._segment_number)
+            if os.path.exists(segment_path) and os.path.getsize(segment_path) + len(line) > self.segment_max_bytes:
+                self._segment_number += 1
+                segment_path = self._segment_path(self._segment_number)
+            with open(segment_path, "ab") as f:
+                offset = f.tell()
+                f.write(line)
+            entry = {"event_id": event_id, "segment": os.path.basename(segment_path), "offset": offset, "length": len(line)}
+            with open(os.path.join(self.directory, INDEX_FILENAME), "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+            self._index[event_id] = entry
+
+    def _refresh_index(self):
+        index_path = os.path.join(self.directory, INDEX_FILENAME)
+        if not os.path.exists(index_path):
+            return
+        with open(index_path, "rb") as f:
+            f.seek(self._index_offset)
+            for raw_line in f:
+                if not raw_line.endswith(b"\n"):
+                    break # Línea a medio escribir por el otro proceso: se leerá en el próximo refresco
+                self._index_offset += len(raw_line)
+                try:
+                    entry = json.loads(raw_line)
+                except ValueError:
+                    continue
+                self._index[entry["event_id"]] = entry
+
+    def get(self, event_id):
+        with self._lock:
+            entry = self._index.get(event_id)
+            if entry is None:
+                self._refresh_index()
+                entry = self._index.get(event_id)
+        if entry is None:
+            return None
+        with open(os.path.join(self.directory, entry["segment"]), "rb") as f:
+            f.seek(entry["offset"])
+            return json.loads(f.read(entry["length"]))
+
+    def event_ids(self):
+        with self._lock:
+            self._refresh_index()
+            return list(self._index)
@@ -0,0 +1,29 @@
+# sesiones.py (IDENTIFICADORES DE SESIÓN COMPARTIDOS POR bots.py Y EL DASHBOARD)
+#
+# Cada partida simultánea es una sesión con su propio id. El dashboard sirve la sesión
+# predeterminada en las rutas de siempre (/, /stream, /make_decision, ...) y cualquier otra
+# bajo /sesion/<sesion_id>/...; las decisiones de todas comparten el mismo registro con
+# claves "<sesion_id>/<event_id>", así que los event_id solo tienen que ser únicos por sesión.
+
+import re
+
+SESION_PREDETERMINADA = "default"
+SESION_ID_VALIDO = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def sesion_id_valido(sesion_id):
+    return bool(sesion_id) and SESION_ID_VALIDO.match(sesion_id) is not None
+
+
+def ruta_sesion(sesion_id):
+    """Prefijo de las rutas del dashboard para la sesión ("" para la predeterminada)."""
+    return "" if sesion_id == SESION_PREDETERMINADA else f"/sesion/{sesion_id}"
+
+
+def prefijo_decisiones(sesion_id):
+    return f"{sesion_id}/"
+
+
+def clave_decision(sesion_id, event_id):
+    """Clave del evento en el RegistroDecisiones compartido."""
+    return prefijo_decisiones(sesion_id) + event_id
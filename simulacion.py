@@ -0,0 +1,129 @@
+# simulacion.py (SIMULACIÓN SIN CABEZA DEL BUCLE DEL JUEGO)
+#
+# Juega partidas completas con el mismo main_loop de bots.py, pero con un reloj virtual
+# (reloj.py) y una política de decisión scriptada en lugar del jugador: sin Selenium, sin
+# HTTP y sin esperas reales. Las pausas entre ciclos y el tiempo que "tarda" el jugador
+# solo avanzan el reloj virtual, así que se juegan miles de partidas por minuto.
+# Sirve para ajustar el balance del juego (HP de Eggman, pánico, tablas de daño) y para
+# probar el bucle de punta a punta de forma determinista con --seed.
+#
+# Uso:
+#   python simulacion.py --games 1000 --policy optima
+#   python simulacion.py --games 500 --policy timeout --seed 42 --json resultado.json
+
+import argparse
+import json
+import random
+import statistics
+import tempfile
+import time
+
+import bots
+from reloj import RelojVirtual
+
+POLITICAS = ("optima", "todos", "timeout", "registrar")
+
+
+def crear_politica(nombre, reloj, tiempo_decision_seconds):
+    """Devuelve la función de decisión de la política: recibe el evento enriquecido y devuelve el enrutamiento."""
+    heroes_con_endpoint = [hero for hero in bots.CONFIG["bot_notificador"].get("endpoints", {}) if hero != "LogDB"]
+    timeout_seconds = bots.CONFIG.get("dashboard_tactico", {}).get("decision_timeout_seconds", 30)
+
+    def decision_usuario(enriched_data, heroes, accion):
+        reloj.sleep(tiempo_decision_seconds) # Lo que tarda el jugador en decidir
+        return {"event_id": enriched_data["event_id"], "target_destinations": ["LogDB", *heroes], "user_decision": accion,
+                "alert_payload_to_send": enriched_data, "decision_type": f"Usuario: {accion}"}
+
+    def optima(enriched_data):
+        cercanos = enriched_data.get("location_details", {}).get("known_nearby_heroes", [])
+        heroes = [hero for hero in cercanos if hero in heroes_con_endpoint] or heroes_con_endpoint[:1]
+        return decision_usuario(enriched_data, heroes, "Enviar héroes cercanos")
+
+    def todos(enriched_data):
+        return decision_usuario(enriched_data, heroes_con_endpoint, "Enviar a todos")
+
+    def registrar(enriched_data):
+        return decision_usuario(enriched_data, [], "Solo registrar")
+
+    def timeout(enriched_data):
+        reloj.sleep(timeout_seconds) # El jugador no responde y vence el plazo
+        return bots.tomar_decision_automatica_por_timeout(enriched_data["event_id"], enriched_data, "Timeout")
+
+    return {"optima": optima, "todos": todos, "timeout": timeout, "registrar": registrar}[nombre]
+
+
+def jugar_partida(politica, tiempo_decision_seconds):
+    """Una partida completa con reloj virtual. Devuelve (estado final, ciclos, segundos simulados)."""
+    reloj = RelojVirtual()
+    ciclos = [0]
+    def monitor():
+        ciclos[0] += 1
+        return bots.bot_monitor()
+    entorno = bots.EntornoBucle(reloj=reloj, monitor=monitor, decidir=crear_politica(politica, reloj, tiempo_decision_seconds),
+                                notificar=lambda routing_data: None, al_terminar=lambda final_data: None, servicios=False)
+    final_data = bots.main_loop(entorno)
+    return (final_data or {}).get("game_status", "SIN_TERMINAR"), ciclos[0], reloj.time()
+
+
+def run_simulacion(args):
+    bots.LOGS_DIR = tempfile.mkdtemp(prefix="simulacion_logs_") # Por si algo escribe; no mezclar con los logs del juego
+    bots.load_config()
+    if bots.DECISION_REGISTRY is not None:
+        bots.DECISION_REGISTRY.close() # La simulación no pasa por el dashboard
+        bots.DECISION_REGISTRY = None
+    bots.DEDUPLICADOR = None # Los eventos aleatorios se repiten a propósito; cada uno cuenta para el balance
+    bots.LOG_SETTINGS["enabled"] = False
+    bots.CONFIG["bot_monitor"]["use_selenium_source"] = False # Eventos aleatorios: sin navegador ni ficheros
+    bots.CONFIG["bot_maestro"]["max_cycles_to_run"] = args.max_cycles
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    resultados = []
+    inicio = time.perf_counter()
+    for _ in range(args.games):
+        resultados.append(jugar_partida(args.policy, args.decision_seconds))
+    duracion = time.perf_counter() - inicio
+
+    estados = [estado for estado, _, _ in resultados]
+    ciclos = [n for _, n, _ in resultados]
+    minutos_simulados = [segundos / 60 for _, _, segundos in resultados]
+    return {
+        "politica": args.policy,
+        "partidas": args.games,
+        "victorias": estados.count("VICTORY"),
+        "derrotas": estados.count("DEFEAT"),
+        "sin_terminar": estados.count("SIN_TERMINAR"),
+        "tasa_victoria": round(estados.count("VICTORY") / max(1, args.games), 4),
+        "eventos_por_partida": {"media": round(statistics.mean(ciclos), 2), "min": min(ciclos), "max": max(ciclos)},
+        "minutos_simulados_por_partida": round(statistics.mean(minutos_simulados), 1),
+        "duracion_real_s": round(duracion, 2),
+        "partidas_por_minuto": round(args.games / duracion * 60) if duracion else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulación sin cabeza de partidas completas con reloj virtual.")
+    parser.add_argument("--games", type=int, default=1000, help="número de partidas")
+    parser.add_argument("--policy", choices=POLITICAS, default="optima", help="política de decisión scriptada")
+    parser.add_argument("--decision-seconds", type=float, default=5, help="segundos simulados que tarda el jugador en decidir")
+    parser.add_argument("--max-cycles", type=int, default=1000, help="máximo de eventos por partida (0 = sin límite)")
+    parser.add_argument("--seed", type=int, default=None, help="semilla para repetir exactamente la simulación")
+    parser.add_argument("--json", default=None, help="guardar los resultados en este fichero JSON")
+    args = parser.parse_args()
+    if args.games < 1:
+        parser.error("--games debe ser al menos 1.")
+
+    results = run_simulacion(args)
+    print(f"Política: {results['politica']}  Partidas: {results['partidas']}  Victorias: {results['victorias']} "
+          f"({results['tasa_victoria'] * 100:.1f}%)  Derrotas: {results['derrotas']}  Sin terminar: {results['sin_terminar']}")
+    eventos = results["eventos_por_partida"]
+    print(f"Eventos por partida: media {eventos['media']} (min {eventos['min']}, max {eventos['max']})  "
+          f"Duración simulada media: {results['minutos_simulados_por_partida']} min")
+    print(f"Tiempo real: {results['duracion_real_s']}s ({results['partidas_por_minuto']} partidas/min)")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
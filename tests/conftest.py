@@ -0,0 +1,35 @@
+# Los módulos del juego están en la raíz del repositorio y leen config.json del directorio actual.
+# Las pruebas se ejecutan en una carpeta temporal con una copia de config.json sin la base de datos
+# del registro de decisiones: así no dejan nada en data/, logs/ ni reports/ del repositorio.
+import json
+import os
+import sys
+import tempfile
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+with open(os.path.join(RAIZ, "config.json"), "r", encoding="utf-8") as f:
+    _config = json.load(f)
+_config.setdefault("decision_registry", {})["db_path"] = "" # Registro en memoria
+os.chdir(tempfile.mkdtemp(prefix="hedgehog_tests_"))
+with open("config.json", "w", encoding="utf-8") as f:
+    json.dump(_config, f, ensure_ascii=False, indent=4)
+
+
+@pytest.fixture
+def bots_aislado(tmp_path, monkeypatch):
+    """bots con los logs y el diario de reportes en tmp_path (no en logs/ ni reports/ del repositorio)."""
+    import bots
+    bots.stop_log_writer() # El escritor de logs ya creado seguiría escribiendo en su carpeta
+    monkeypatch.setattr(bots, "LOGS_DIR", str(tmp_path / "logs"))
+    monkeypatch.setitem(bots.LOG_SETTINGS, "console", False)
+    monkeypatch.setitem(bots.CONFIG, "reports", {"enabled": True, "journal_dir": str(tmp_path / "journal")})
+    monkeypatch.setattr(bots, "REPORT_JOURNAL", None)
+    monkeypatch.setattr(bots, "REPORT_WRITER", None)
+    bots.start_report_writer()
+    yield bots
+    bots.stop_report_writer()
+    bots.stop_log_writer()
@@ -0,0 +1,38 @@
+import json
+import time
+
+import dashboard_tactico_app as dashboard
+from registro_decisiones import RegistroDecisiones
+
+
+def eventos_sse(respuesta, segundos=5):
+    """(evento, datos) de la respuesta de /stream, a medida que llegan, durante unos segundos como mucho."""
+    limite = time.monotonic() + segundos
+    for bloque in respuesta.response:
+        if time.monotonic() > limite:
+            return
+        bloque = bloque.decode("utf-8") if isinstance(bloque, bytes) else bloque
+        if bloque.startswith("event: "):
+            evento, datos = bloque.strip().split("\n", 1)
+            yield evento[len("event: "):], json.loads(datos[len("data: "):])
+
+
+def test_plazo_vencido_se_publica_en_el_stream(monkeypatch):
+    monkeypatch.setitem(dashboard.CONFIG.setdefault("dashboard_tactico", {}), "decision_timeout_seconds", 0.3)
+    monkeypatch.setitem(dashboard.CONFIG["dashboard_tactico"], "stream_keepalive_seconds", 1) # Para no esperar al keepalive
+    monkeypatch.setattr(dashboard, "decisiones", RegistroDecisiones(None))
+    monkeypatch.setattr(dashboard, "sesiones", {})
+    cliente = dashboard.app.test_client()
+    alerta = {"event_id": "PLAZO-1", "threat_assessment": {"priority_score": 5, "initial_level": "medio"}, "location_details": {}}
+    assert cliente.post("/sesion/test-plazos/submit_alert_data", json=alerta).status_code == 200
+
+    respuesta = cliente.get("/sesion/test-plazos/stream", buffered=False)
+    try:
+        eventos = eventos_sse(respuesta)
+        assert next(eventos)[1]["event_id"] == "PLAZO-1"
+        # La rueda de plazos toma la decisión en su propio hilo, sin petición en curso
+        vencida = next(((evento, datos) for evento, datos in eventos if evento == "alert" and datos["event_id"] is None), None)
+    finally:
+        respuesta.close()
+    assert vencida is not None # El navegador se entera de que ya no queda ninguna alerta pendiente
+    assert dashboard.decisiones.obtener(dashboard.clave_decision("test-plazos", "PLAZO-1"))["decision_type"] == "timeout_auto"
@@ -0,0 +1,24 @@
+from deduplicador import Deduplicador
+from reloj import RelojVirtual
+
+
+def canonico(event_id):
+    return {"event_id": event_id, "session_id": "default", "timestamp_event": "2025-01-01T00:00:00",
+            "source_system_name": "Fuente", "location_reported": "Station Square",
+            "threat_assessment": {"initial_level": "medio", "description": "Actividad"}}
+
+
+def test_repeticion_se_suprime_y_queda_en_su_reporte(bots_aislado, monkeypatch):
+    bots = bots_aislado
+    monkeypatch.setattr(bots, "DEDUPLICADOR", Deduplicador(window_seconds=60, reloj=RelojVirtual()))
+    original = bots.bot_deduplicador(canonico("DUP-1"))
+    bots.start_report("DUP-2")
+    assert bots.bot_deduplicador(canonico("DUP-2")) is None
+    bots.end_report("DUP-2")
+    assert original["agregado"]["ocurrencias"] == 2
+    assert original["agregado"]["event_ids_duplicados"] == ["DUP-2"]
+
+    bots.stop_report_writer() # Espera a que el diario tenga el reporte
+    pasos = bots.REPORT_JOURNAL.get("DUP-2")["steps"]
+    assert [(paso["bot"], paso["details"]) for paso in pasos] == [("BotDeduplicador", "Alerta repetida: agregada a la original.")]
+    assert pasos[0]["data"]["event_id_original"] == "DUP-1"
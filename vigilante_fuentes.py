@@ -0,0 +1,84 @@
+# vigilante_fuentes.py (VIGILANCIA DE CAMBIOS EN LAS FUENTES DEL MONITOR)
+#
+# En lugar de elegir una fuente al azar en cada ciclo y releerla aunque no haya cambiado,
+# BotMonitor puede vigilar todas las fuentes a la vez y generar eventos solo cuando cambia
+# su contenido. Se sondea os.stat (mtime y tamaño) de todas las fuentes cada
+# poll_interval_seconds, así que un cambio se detecta como mucho en ese tiempo; si la firma
+# cambió, un hash del contenido descarta los falsos cambios (touch, reescritura idéntica).
+# Solo se usa la biblioteca estándar: funciona igual en Windows, Linux y macOS.
+
+import hashlib
+import os
+import time
+
+
+class VigilanteFuentes:
+    """Detecta qué fuentes cambiaron desde la última comprobación (sondeo de mtime/tamaño y hash)."""
+
+    def __init__(self, fuentes, poll_interval_seconds=1.0, hash_check=True, emitir_al_iniciar=True):
+        self.fuentes = list(fuentes)
+        self.poll_interval_seconds = poll_interval_seconds
+        self.hash_check = hash_check
+        self._vistas = {} # fuente -> (mtime_ns, tamaño, hash del contenido o None)
+        if not emitir_al_iniciar:
+            self.comprobar() # El contenido actual cuenta como ya visto
+
+    @staticmethod
+    def _firma(fuente):
+        try:
+            stat = os.stat(fuente)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    @staticmethod
+    def _hash(fuente):
+        digest = hashlib.blake2b(digest_size=16)
+        with open(fuente, "rb") as f:
+            for bloque in iter(lambda: f.read(1 << 16), b""):
+                digest.update(bloque)
+        return digest.hexdigest()
+
+    def comprobar(self):
+        """Fuentes cuyo contenido cambió desde la última comprobación: [(fuente, mtime_ns)].
+
+        mtime_ns es None la primera vez que se ve una fuente (no es un cambio reciente).
+        """
+        cambios = []
+        for fuente in self.fuentes:
+            firma = self._firma(fuente)
+            anterior = self._vistas.get(fuente)
+            if firma is None:
+                self._vistas.pop(fuente, None) # Borrada: si vuelve a aparecer cuenta como cambio
+                continue
+            if anterior is not None and anterior[:2] == firma:
+                continue
+            contenido = None
+            if self.hash_check:
+                try:
+                    contenido = self._hash(fuente)
+                except OSError:
+                    continue # Se está reemplazando: se vuelve a mirar en la siguiente comprobación
+            self._vistas[fuente] = (*firma, contenido)
+            if anterior is not None and contenido is not None and anterior[2] == contenido:
+                continue
+            cambios.append((fuente, firma[0] if anterior is not None else None))
+        return cambios
+
+    def esperar_cambios(self, stop_event=None, timeout=None):
+        """Bloquea hasta que cambie alguna fuente, se active stop_event o venza timeout. Devuelve los cambios."""
+        limite = None if timeout is None else time.monotonic() + timeout
+        while True:
+            cambios = self.comprobar()
+            if cambios:
+                return cambios
+            espera = self.poll_interval_seconds
+            if limite is not None:
+                espera = min(espera, limite - time.monotonic())
+                if espera <= 0:
+                    return []
+            if stop_event is not None:
+                if stop_event.wait(espera):
+                    return []
+            else:
+                time.sleep(espera)